@@ -0,0 +1,140 @@
+"""Measure the memory allocated per compile with and without AST interning.
+
+A generated program is compiled (parse, semantic analysis, code generation)
+under tracemalloc, once with the ASTInterner that mini_compiler uses and once
+with an interner that hands out a fresh string and type node for every
+occurrence, which is how the frontends and the checker allocated before
+interning. Reported are the bytes the AST keeps alive after parsing (for the
+ANTLR frontend this includes its token buffer), the peak above each phase's
+starting point, the type nodes the checker allocates (its short-lived
+allocations barely move the peak) and how many distinct type node and name
+objects the AST holds.
+
+    python benchmarks/bench_allocations.py [--lines N] [--frontend rd|antlr]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from antlr4 import InputStream
+from codegen_visitor import CodeGenVisitor
+from mini_ast_visitor import MiniToASTVisitor
+from mini_frontend import MiniFrontend
+from mini_rd_parser import MiniRDParser
+from miniast import mini_ast, type_ast, expression_ast
+from miniast.interning import ASTInterner
+from static_semantic_ast_visitor import StaticSemanticASTVisitor
+from mini_gen import generate_program
+
+
+class UnsharedInterner(ASTInterner):
+    # Allocates like the pre-interning frontends and checker: nothing is shared
+    __slots__ = ("allocated",)
+
+    def __init__(self):
+        super().__init__()
+        self.allocated = 0
+
+    def name(self, text):
+        return text
+
+    def int_type(self):
+        self.allocated += 1
+        return type_ast.IntType()
+
+    def bool_type(self):
+        self.allocated += 1
+        return type_ast.BoolType()
+
+    def void_type(self):
+        self.allocated += 1
+        return type_ast.ReturnTypeVoid()
+
+    def struct_type(self, linenum, name):
+        self.allocated += 1
+        return type_ast.StructType(linenum, expression_ast.IdentifierExpression(linenum, self.name(name)))
+
+
+def allocated_types(interner):
+    # Type nodes handed out so far that were not shared with an earlier request
+    return getattr(interner, "allocated", 0) + len(interner.struct_types)
+
+
+def phase(run):
+    # Runs run() under tracemalloc; returns (result, bytes retained, peak bytes)
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    result = run()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current - before, peak - before
+
+
+def sharing(program):
+    # Returns (type node occurrences, distinct type nodes, name occurrences, distinct name objects)
+    type_ids, name_ids = set(), set()
+    counts = [0, 0]
+    def walk(value):
+        if isinstance(value, list):
+            for item in value:
+                walk(item)
+        elif isinstance(value, (type_ast.Type, type_ast.ReturnType)):
+            counts[0] += 1
+            type_ids.add(id(value))
+        elif isinstance(value, mini_ast.MiniASTNode):
+            if isinstance(value, expression_ast.IdentifierExpression):
+                counts[1] += 1
+                name_ids.add(id(value.id))
+            for klass in type(value).__mro__:
+                for name in klass.__dict__.get("__slots__", ()):
+                    walk(getattr(value, name, None))
+    walk(program)
+    return counts[0], len(type_ids), counts[1], len(name_ids)
+
+
+def compile_source(source, frontend, interner):
+    if frontend == "rd":
+        parse = lambda: MiniRDParser().parse(source, interner)
+    else:
+        antlr = MiniFrontend()
+        parse = lambda: MiniToASTVisitor(interner).visitProgram(antlr.parse(InputStream(source)))
+    program, ast_bytes, parse_peak = phase(parse)
+    before = allocated_types(interner)
+    with contextlib.redirect_stdout(io.StringIO()):
+        errors, _, check_peak = phase(lambda: StaticSemanticASTVisitor(interner).analyze(program))
+    if errors:
+        raise RuntimeError("generated program failed semantic analysis")
+    check_types = allocated_types(interner) - before
+    _, _, codegen_peak = phase(lambda: CodeGenVisitor().visit_program(program))
+    return program, check_types, ast_bytes, parse_peak, check_peak, codegen_peak
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=5000, help="lines of the generated program")
+    parser.add_argument("--frontend", choices=["rd", "antlr"], default="rd")
+    args = parser.parse_args(argv[1:])
+
+    source = generate_program(args.lines, seed=1)
+    # Warm up imports, regex and ANTLR caches outside of the measurements
+    compile_source(source, args.frontend, ASTInterner())
+
+    print(f"{args.lines}-line program, {args.frontend} frontend (KiB)")
+    print(f"{'interner':<10} {'AST':>9} {'parse peak':>11} {'check peak':>11} {'codegen peak':>13}"
+          f" {'check types':>12} {'AST type nodes':>16} {'AST names':>16}")
+    for label, interner_cls in (("unshared", UnsharedInterner), ("shared", ASTInterner)):
+        program, check_types, *sizes = compile_source(source, args.frontend, interner_cls())
+        types, distinct_types, names, distinct_names = sharing(program)
+        ast_bytes, parse_peak, check_peak, codegen_peak = (size / 1024 for size in sizes)
+        print(f"{label:<10} {ast_bytes:>9,.0f} {parse_peak:>11,.0f} {check_peak:>11,.0f} {codegen_peak:>13,.0f}"
+              f" {check_types:>12,} {distinct_types:>7,} of {types:<6,} {distinct_names:>7,} of {names:<6,}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,89 @@
+"""Report the memory cost per AST node of the slotted miniast classes.
+
+The AST of a large generated program is cloned twice under tracemalloc: once
+into the real (slotted) miniast classes and once into plain classes that keep
+the same attributes in a per-instance __dict__, which is the layout the node
+classes had before they declared __slots__. Leaf values (strings, operators)
+are shared by both clones, so the difference is purely the node layout.
+
+    python benchmarks/bench_ast_memory.py [--lines N]
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from miniast import mini_ast
+from mini_rd_parser import MiniRDParser
+from mini_gen import generate_program
+
+
+def node_fields(node):
+    if hasattr(node, "__dict__"):
+        return list(vars(node))
+    names = []
+    for klass in reversed(type(node).__mro__):
+        names.extend(klass.__dict__.get("__slots__", ()))
+    return names
+
+
+def clone(value, make_node, counts):
+    # Deep-copies AST nodes and lists; make_node(cls) returns an empty node instance
+    if isinstance(value, list):
+        return [clone(item, make_node, counts) for item in value]
+    if isinstance(value, mini_ast.MiniASTNode):
+        cls = type(value)
+        counts[cls.__name__] += 1
+        node = make_node(cls)
+        for name in node_fields(value):
+            if hasattr(value, name):
+                setattr(node, name, clone(getattr(value, name), make_node, counts))
+        return node
+    return value
+
+
+def measure(program, make_node):
+    counts = Counter()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    copy = clone(program, make_node, counts)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del copy
+    return used, counts
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=20000, help="lines of the generated program")
+    args = parser.parse_args(argv[1:])
+
+    program = MiniRDParser().parse(generate_program(args.lines, seed=1))
+
+    dict_classes = {}
+    def dict_node(cls):
+        if cls not in dict_classes:
+            dict_classes[cls] = type(cls.__name__, (), {})
+        return dict_classes[cls]()
+
+    # An untraced pass first, so that reading the fields of __dict__-based nodes
+    # (vars() materializes the dict) is not charged to the measured copies
+    clone(program, lambda cls: object.__new__(cls), Counter())
+    slotted, counts = measure(program, lambda cls: object.__new__(cls))
+    unslotted, _ = measure(program, dict_node)
+    nodes = sum(counts.values())
+
+    print(f"{nodes:,} nodes from a {args.lines}-line program")
+    for name, count in counts.most_common(6):
+        print(f"  {name:<22} {count:>9,}")
+    print(f"__dict__ layout {unslotted / 2**20:8.1f} MiB {unslotted / nodes:6.1f} bytes/node")
+    print(f"__slots__ layout {slotted / 2**20:7.1f} MiB {slotted / nodes:6.1f} bytes/node")
+    print(f"saved            {(1 - slotted / unslotted) * 100:7.1f} %")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
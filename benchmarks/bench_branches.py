@@ -0,0 +1,124 @@
+"""Dynamic branch and instruction counts of loop-heavy programs.
+
+Each kernel spends its time in loops whose guards compare integers: nested
+counting loops, primes by trial division, a Collatz walk with && and || in
+its guards, and a binary search. The kernels are compiled by the AST backend
+with guards lowered to compare-and-branch instructions, and with every guard
+computed as a boolean in a0 and tested with beqz/bnez, without the dead
+register mark that would let the peephole pass fuse the two; each as is and
+after folding. They are executed by rv_sim.py.
+
+    python benchmarks/bench_branches.py [--scale N]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from codegen_visitor import CodeGenVisitor
+from diff_backends import BACKENDS, folded
+from kernels import run_kernels
+
+
+class BooleanGuardCodeGen(CodeGenVisitor):
+    def branch(self, expression, label, when):
+        expression.accept(self)
+        self.emit("bnez" if when else "beqz", "a0", label)
+
+
+def boolean_guards(program):
+    return BooleanGuardCodeGen().visit_program(program)
+
+
+CONFIGURATIONS = {
+    "booleans": boolean_guards,
+    "branches": BACKENDS["ast"],
+    "fold bool": folded(boolean_guards),
+    "fold br": BACKENDS["fold"],
+}
+
+KERNELS = {
+    "nested loops": """fun main() int {
+   int i, j, s;
+   i = 0;
+   s = 0;
+   while (i < {N}) {
+      j = 0;
+      while (j <= i) {
+         if (j != 3) { s = s + j; }
+         j = j + 1;
+      }
+      i = i + 1;
+   }
+   print s endl;
+   return 0;
+}
+""",
+    "primes": """fun main() int {
+   int n, d, count;
+   count = 0;
+   n = 2;
+   while (n <= {N} * 20) {
+      d = 2;
+      while (d * d <= n && n - n / d * d != 0) {
+         d = d + 1;
+      }
+      if (d * d > n) { count = count + 1; }
+      n = n + 1;
+   }
+   print count endl;
+   return 0;
+}
+""",
+    "collatz": """fun main() int {
+   int n, x, steps, longest;
+   n = 1;
+   longest = 0;
+   while (n < {N} * 4 && longest < 1000) {
+      x = n;
+      steps = 0;
+      while (x != 1 && !(steps >= 500)) {
+         if (x - x / 2 * 2 == 0 || x < 0) { x = x / 2; } else { x = 3 * x + 1; }
+         steps = steps + 1;
+      }
+      if (steps > longest) { longest = steps; }
+      n = n + 1;
+   }
+   print longest endl;
+   return 0;
+}
+""",
+    "binary search": """fun main() int {
+   int k, lo, hi, mid, found;
+   found = 0;
+   k = 0;
+   while (k < {N} * 10) {
+      lo = 0;
+      hi = {N} * 100;
+      while (lo < hi) {
+         mid = (lo + hi) / 2;
+         if (mid * 3 < k * 7) { lo = mid + 1; } else { hi = mid; }
+      }
+      if (lo * 3 >= k * 7 && (lo == 0 || (lo - 1) * 3 < k * 7)) { found = found + 1; }
+      k = k + 1;
+   }
+   print found endl;
+   return 0;
+}
+""",
+}
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=100, help="size N of the kernels")
+    args = parser.parse_args(argv[1:])
+
+    sys.setrecursionlimit(100000)
+    failures = run_kernels(KERNELS, CONFIGURATIONS, args.scale, ["instructions", "branches", "taken"])
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,94 @@
+"""Dynamic instruction counts of call-heavy programs.
+
+Each kernel spends its time in calls: the doubly recursive fib, Ackermann's
+function, a leaf helper called in a loop and a call with more arguments
+than registers. The kernels are compiled by the AST backend, as is and
+after folding, and through the IR at -O1 and -O2, then executed by
+rv_sim.py.
+
+    python benchmarks/bench_calls.py [--scale N]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from diff_backends import BACKENDS, folded, ir_backend
+from kernels import run_kernels
+from miniir.regalloc import linear_scan
+
+CONFIGURATIONS = {
+    "ast": BACKENDS["ast"],
+    "fold": BACKENDS["fold"],
+    "O1": folded(ir_backend(allocate=linear_scan)),
+    "O2": BACKENDS["O2"],
+}
+
+KERNELS = {
+    "fib": """fun fib(int n) int {
+   if (n < 2) { return n; }
+   return fib(n - 1) + fib(n - 2);
+}
+fun main() int {
+   print fib({N}) endl;
+   return 0;
+}
+""",
+    "ackermann": """fun ack(int m, int n) int {
+   if (m == 0) { return n + 1; }
+   if (n == 0) { return ack(m - 1, 1); }
+   return ack(m - 1, ack(m, n - 1));
+}
+fun main() int {
+   print ack(2, {N}) endl;
+   print ack(3, 4) endl;
+   return 0;
+}
+""",
+    "leaf helper": """fun mix(int a, int b, int c) int {
+   if (a < b) { return a * c + b; }
+   return b * c - a;
+}
+fun main() int {
+   int i, s;
+   i = 0;
+   s = 0;
+   while (i < {N} * 20) {
+      s = s + mix(i, s / 3, i - 7);
+      i = i + 1;
+   }
+   print s endl;
+   return 0;
+}
+""",
+    "wide call": """fun wide(int a, int b, int c, int d, int e, int f, int g, int h, int i, int j) int {
+   return a - b + c - d + e - f + g - h + i - j;
+}
+fun main() int {
+   int i, s;
+   i = 0;
+   while (i < {N} * 20) {
+      s = s + wide(i, 1, i + 2, 3, s, 5, i * 2, 7, 8, i / 2);
+      i = i + 1;
+   }
+   print s endl;
+   return 0;
+}
+""",
+}
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=20, help="size N of the kernels (fib's argument)")
+    args = parser.parse_args(argv[1:])
+
+    sys.setrecursionlimit(100000)
+    failures = run_kernels(KERNELS, CONFIGURATIONS, args.scale,
+                           ["instructions", "loads", "stores", "calls", "max_stack"])
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
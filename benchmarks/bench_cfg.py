@@ -0,0 +1,117 @@
+"""Time CFG, dominator tree and dominance frontier construction on long functions.
+
+For each size S a program is generated whose function bodies hold S
+statements (with nested ifs and loops), lowered to IR, and the CFG analyses
+are timed next to the checker and the IR builder. With --verify the
+dominators and frontiers of every function are also checked against the
+textbook data-flow definitions on smaller programs.
+
+    python benchmarks/bench_cfg.py [--sizes 2500,5000,...] [--verify N]
+"""
+import argparse
+import contextlib
+import gc
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from mini_gen import generate_program
+from mini_rd_parser import MiniRDParser
+from miniast.interning import ASTInterner
+from miniir.cfg import CFG, UNREACHABLE
+from miniir.ir_builder import IRBuilder
+from static_semantic_ast_visitor import StaticSemanticASTVisitor
+
+
+def lower(source):
+    interner = ASTInterner()
+    program = MiniRDParser().parse(source, interner)
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        if StaticSemanticASTVisitor(interner).analyze(program):
+            raise RuntimeError("generated program failed semantic analysis")
+    check_time = time.perf_counter() - start
+    start = time.perf_counter()
+    module = IRBuilder().build(program)
+    return module, check_time, time.perf_counter() - start
+
+
+def naive_dominators(cfg):
+    # Dom(entry) = {entry}; Dom(b) = {b} | intersection of Dom(p) over the predecessors of b
+    reachable = [b for b in range(len(cfg.blocks)) if cfg.reachable(b)]
+    dom = {b: set(reachable) for b in reachable}
+    dom[0] = {0}
+    changed = True
+    while changed:
+        changed = False
+        for b in reachable[1:]:
+            new = set.intersection(*(dom[p] for p in cfg.preds[b] if cfg.reachable(p))) | {b}
+            if new != dom[b]:
+                dom[b] = new
+                changed = True
+    return dom
+
+
+def verify(cfg):
+    # Returns a description of the first disagreement with the definitions, or None
+    dom = naive_dominators(cfg)
+    for b, dominators in dom.items():
+        strict = dominators - {b}
+        # the immediate dominator is the strict dominator that all the others dominate
+        expected = 0 if b == 0 else max(strict, key=lambda d: len(dom[d]))
+        if cfg.idom[b] != expected:
+            return f"{cfg.function.name}: idom of {cfg.blocks[b].label}"
+        for a in dom:
+            if cfg.dominates(a, b) != (a in dominators):
+                return f"{cfg.function.name}: dominates({cfg.blocks[a].label}, {cfg.blocks[b].label})"
+    for x in dom:
+        expected = {y for y in dom
+                    if any(x in dom[p] for p in cfg.preds[y] if cfg.reachable(p))
+                    and not (x in dom[y] and x != y)}
+        if set(cfg.frontiers[x]) != expected:
+            return f"{cfg.function.name}: frontier of {cfg.blocks[x].label}"
+    for b in range(len(cfg.blocks)):
+        if not cfg.reachable(b) and cfg.idom[b] != UNREACHABLE:
+            return f"{cfg.function.name}: unreachable {cfg.blocks[b].label} has a dominator"
+    return None
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="2500,5000,10000,20000,40000",
+                        help="comma separated statements per function")
+    parser.add_argument("--verify", type=int, default=0, metavar="N",
+                        help="also check N generated programs against the definitions")
+    args = parser.parse_args(argv[1:])
+    sys.setrecursionlimit(100000)
+
+    failures = 0
+    for seed in range(args.verify):
+        module, _, _ = lower(generate_program(200, seed, statements=30))
+        for function in module.functions:
+            failure = verify(CFG(function))
+            if failure:
+                failures += 1
+                print(f"seed {seed}: {failure}")
+    if args.verify:
+        print(f"{args.verify} programs verified, {failures} failures")
+
+    print(f"{'stmts':>7} {'blocks':>8} {'check ms':>9} {'ir ms':>8} {'cfg ms':>8} {'us/block':>9}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        module, check_time, build_time = lower(generate_program(size, 0, statements=size))
+        blocks = sum(len(function.blocks) for function in module.functions)
+        gc.collect()
+        start = time.perf_counter()
+        for function in module.functions:
+            CFG(function)
+        cfg_time = time.perf_counter() - start
+        print(f"{size:>7} {blocks:>8,} {check_time * 1e3:>9.1f} {build_time * 1e3:>8.1f}"
+              f" {cfg_time * 1e3:>8.1f} {cfg_time / blocks * 1e6:>9.2f}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,64 @@
+"""Measure StaticSemanticASTVisitor throughput (AST nodes/sec) on generated programs.
+
+Programs are parsed once with the recursive-descent frontend; only analyze()
+is timed, with its report discarded. The best of several runs is reported.
+
+    python benchmarks/bench_checker.py [--lines N] [--files K] [--repeat R]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from mini_rd_parser import MiniRDParser
+from miniast import mini_ast
+from miniast.interning import ASTInterner
+from static_semantic_ast_visitor import StaticSemanticASTVisitor
+from mini_gen import generate_program
+
+
+def count_nodes(value):
+    if isinstance(value, list):
+        return sum(count_nodes(item) for item in value)
+    if not isinstance(value, mini_ast.MiniASTNode):
+        return 0
+    count = 1
+    for klass in type(value).__mro__:
+        for name in klass.__dict__.get("__slots__", ()):
+            count += count_nodes(getattr(value, name, None))
+    return count
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=20000, help="lines per generated program")
+    parser.add_argument("--files", type=int, default=3, help="programs checked per run")
+    parser.add_argument("--repeat", type=int, default=3, help="runs, the best is reported")
+    args = parser.parse_args(argv[1:])
+
+    programs = []
+    for seed in range(args.files):
+        interner = ASTInterner()
+        programs.append((MiniRDParser().parse(generate_program(args.lines, seed), interner), interner))
+    nodes = sum(count_nodes(program) for program, _ in programs)
+
+    best = None
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        for program, interner in programs:
+            with contextlib.redirect_stdout(io.StringIO()):
+                if StaticSemanticASTVisitor(interner).analyze(program):
+                    raise RuntimeError("generated program failed semantic analysis")
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    print(f"{args.files} programs of ~{args.lines} lines, {nodes:,} AST nodes")
+    print(f"checked in {best:.3f} s, {nodes / best:,.0f} nodes/sec")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,85 @@
+"""Bytes of assembly saved by dead code elimination, per function.
+
+Each program is compiled four ways: by the AST backend as is and after
+folding (which also drops statements that can never run), and through the
+IR with SSA form, constant propagation and graph coloring without and with
+dead code elimination. Every RISC-V instruction the backends emit is 4
+bytes; the table shows each function's size and how many bytes the second
+compilation of each pair saved over the first.
+
+    python benchmarks/bench_dce.py [--seeds N] [--lines N] [file.mini ...]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from diff_backends import BACKENDS, PROGRAMS, folded, ir_backend
+from bench_regalloc import KERNELS
+from compare_regalloc import function_sizes
+from miniir.dce import eliminate_dead_code
+from miniir.regalloc import graph_coloring
+from miniir.sccp import propagate_constants
+from mini_gen import generate_program
+from mini_interp import check
+
+INSTRUCTION_BYTES = 4
+
+# (label, before, after): the bytes saved are those of before minus those of after
+PAIRS = [
+    ("ast", BACKENDS["ast"], BACKENDS["fold"]),
+    ("ir", folded(ir_backend(allocate=graph_coloring, passes=[propagate_constants])),
+     folded(ir_backend(allocate=graph_coloring, passes=[propagate_constants, eliminate_dead_code]))),
+]
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seeds", type=int, default=5, help="generated programs to include")
+    parser.add_argument("--lines", type=int, default=300, help="lines per generated program")
+    parser.add_argument("files", nargs="*", help=".mini programs to include")
+    args = parser.parse_args(argv[1:])
+
+    sources = [(name, template.replace("{N}", "100")) for name, template in KERNELS.items()]
+    sources += [(f"edge{i}", source) for i, source in enumerate(PROGRAMS)]
+    sources += [(f"seed{seed}", generate_program(args.lines, seed)) for seed in range(args.seeds)]
+    for path in args.files:
+        with open(path) as f:
+            sources.append((os.path.basename(path), f.read()))
+
+    header = f"{'program':<16} {'function':<14}"
+    for label, before, after in PAIRS:
+        header += f" | {label + ' bytes':>10} {'saved':>7}"
+    print(header)
+    totals = {label: [0, 0] for label, before, after in PAIRS}
+    for name, source in sources:
+        program = check(source)
+        functions = [function.name.id for function in program.functions]
+        results = []
+        for label, before, after in PAIRS:
+            # Only the instruction counts matter here
+            sizes = [function_sizes(compile(program), functions) for compile in (before, after)]
+            results.append({function: (sizes[0][function][1] * INSTRUCTION_BYTES,
+                                       sizes[1][function][1] * INSTRUCTION_BYTES) for function in functions})
+        for function in functions:
+            row = f"{name:<16} {function:<14}"
+            for (label, before, after), result in zip(PAIRS, results):
+                size, saved = result[function][0], result[function][0] - result[function][1]
+                row += f" | {size:>10,} {saved:>7,}"
+                totals[label][0] += size
+                totals[label][1] += saved
+            print(row)
+    row = f"{'total':<31}"
+    for label, before, after in PAIRS:
+        size, saved = totals[label]
+        row += f" | {size:>10,} {saved:>7,}"
+    print(row)
+    for label, before, after in PAIRS:
+        size, saved = totals[label]
+        print(f"{label}: {saved:,} of {size:,} bytes saved ({100 * saved / size:.1f}%)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
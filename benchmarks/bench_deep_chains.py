@@ -0,0 +1,76 @@
+"""Show that checking and code generation scale linearly with field-access depth.
+
+For each depth D a program is generated whose statements read and write
+chains like a.n.n...n.v with D field accesses. Semantic analysis and code
+generation are timed separately; with per-node types and offsets the time
+per field access stays flat as D grows, whereas re-deriving the struct type
+of every prefix of a chain makes it grow linearly (quadratic overall).
+
+    python benchmarks/bench_deep_chains.py [--depths 100,200,...] [--statements S]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from codegen_visitor import CodeGenVisitor
+from mini_rd_parser import MiniRDParser
+from miniast.interning import ASTInterner
+from static_semantic_ast_visitor import StaticSemanticASTVisitor
+
+
+def chain_program(depth, statements):
+    chain = "a" + ".n" * (depth - 1)
+    body = []
+    for i in range(statements):
+        if i % 2:
+            body.append(f"   {chain}.v = x + {i};")
+        else:
+            body.append(f"   x = {chain}.v;")
+    return ("struct node { int v; struct node n; };\n"
+            "fun main() int {\n   struct node a; int x;\n   x = 0;\n"
+            + "\n".join(body) + "\n   return x;\n}\n")
+
+
+def best_time(run, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--depths", default="100,200,400,800,1600",
+                        help="comma separated chain depths")
+    parser.add_argument("--statements", type=int, default=20, help="chained statements per program")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per depth, the best is reported")
+    args = parser.parse_args(argv[1:])
+
+    # The visitors recurse once per field access
+    sys.setrecursionlimit(100000)
+    print(f"{'depth':>6} {'accesses':>9} {'check ms':>9} {'us/access':>10} {'codegen ms':>11} {'us/access':>10}")
+    for depth in (int(d) for d in args.depths.split(",")):
+        interner = ASTInterner()
+        program = MiniRDParser().parse(chain_program(depth, args.statements), interner)
+        accesses = depth * args.statements
+
+        def check():
+            with contextlib.redirect_stdout(io.StringIO()):
+                if StaticSemanticASTVisitor(interner).analyze(program):
+                    raise RuntimeError("chain program failed semantic analysis")
+        check_time = best_time(check, args.repeat)
+        codegen_time = best_time(lambda: CodeGenVisitor().visit_program(program), args.repeat)
+        print(f"{depth:>6} {accesses:>9,} {check_time * 1e3:>9.1f} {check_time / accesses * 1e6:>10.2f}"
+              f" {codegen_time * 1e3:>11.1f} {codegen_time / accesses * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
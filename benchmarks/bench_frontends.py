@@ -0,0 +1,58 @@
+"""Compare source-to-AST time of the ANTLR frontend and the recursive-descent parser.
+
+The ANTLR time covers lexing, parsing (two-stage prediction, warm caches) and
+MiniToASTVisitor; the recursive-descent time covers tokenize() and parsing
+straight into the miniast classes.
+
+    python benchmarks/bench_frontends.py [--lines N] [--repeat K]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from antlr4 import InputStream
+from mini_ast_visitor import MiniToASTVisitor
+from mini_frontend import MiniFrontend
+from mini_rd_parser import MiniRDParser
+from mini_gen import generate_program
+
+
+def antlr_ast(frontend, source):
+    tree = frontend.parse(InputStream(source))
+    return MiniToASTVisitor().visitProgram(tree)
+
+
+def best_time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=20000, help="lines of the generated program")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per frontend, best is reported")
+    args = parser.parse_args(argv[1:])
+
+    source = generate_program(args.lines, seed=1)
+    frontend = MiniFrontend()
+    antlr_ast(frontend, generate_program(500, seed=2)) # warm the prediction DFAs
+    rd = MiniRDParser()
+
+    antlr_time = best_time(lambda: antlr_ast(frontend, source), args.repeat)
+    rd_time = best_time(lambda: rd.parse(source), args.repeat)
+    lines = source.count("\n")
+    print(f"{lines} lines, {len(source)} bytes")
+    print(f"antlr + MiniToASTVisitor {antlr_time:8.3f} s {lines / antlr_time:10,.0f} lines/s")
+    print(f"recursive descent        {rd_time:8.3f} s {lines / rd_time:10,.0f} lines/s")
+    print(f"speedup                  {antlr_time / rd_time:8.1f} x")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
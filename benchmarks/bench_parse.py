@@ -0,0 +1,62 @@
+"""Compare parser throughput (tokens/sec) of full LL and two-stage SLL/LL prediction.
+
+Each mode is measured cold (prediction DFAs cleared first) and warm (the same
+MiniFrontend then parses further files of the same shape), which is the
+situation when mini_compiler is given many input files.
+
+    python benchmarks/bench_parse.py [--lines N] [--files K]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from antlr4 import InputStream
+from mini_frontend import MiniFrontend, PREDICTION_MODES
+from mini_gen import generate_program
+
+
+def timed_parse(frontend, source):
+    start = time.perf_counter()
+    frontend.parse(InputStream(source))
+    elapsed = time.perf_counter() - start
+    if frontend.syntax_errors():
+        raise RuntimeError("generated program failed to parse")
+    return frontend.token_count(), elapsed
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=5000, help="lines per generated program")
+    parser.add_argument("--files", type=int, default=3, help="programs parsed per mode")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per mode, best is reported")
+    args = parser.parse_args(argv[1:])
+
+    sources = [generate_program(args.lines, seed) for seed in range(args.files)]
+    print(f"{args.files} programs of ~{args.lines} lines")
+    print(f"{'mode':<10} {'cold tok/s':>12} {'warm tok/s':>12} {'LL fallbacks':>13}")
+
+    for mode in PREDICTION_MODES:
+        cold = warm = 0.0
+        fallbacks = 0
+        for _ in range(args.repeat):
+            MiniFrontend.clear_caches()
+            frontend = MiniFrontend(mode)
+            tokens, elapsed = timed_parse(frontend, sources[0])
+            cold = max(cold, tokens / elapsed)
+            fallbacks += int(frontend.used_ll_fallback)
+
+            warm_tokens, warm_elapsed = 0, 0.0
+            for source in sources[1:] or sources:
+                tokens, elapsed = timed_parse(frontend, source)
+                warm_tokens += tokens
+                warm_elapsed += elapsed
+                fallbacks += int(frontend.used_ll_fallback)
+            warm = max(warm, warm_tokens / warm_elapsed)
+        print(f"{mode:<10} {cold:>12,.0f} {warm:>12,.0f} {fallbacks:>13}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,89 @@
+"""Speed of the peephole pass against the regex pass it replaced.
+
+Generated programs are compiled by the AST backend with the peephole pass
+switched off, and their code is repeated up to --lines lines. The table shows
+the time peephole.py takes on those instructions and the time the old pass,
+which matched every line against three regular expressions and looked at two
+lines at a time, takes on the same code as text, with the number of lines
+each leaves.
+
+    python benchmarks/bench_peephole.py [--lines N] [--seeds N]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from codegen_visitor import CodeGenVisitor
+from mini_gen import generate_program
+from mini_interp import check
+from peephole import peephole_optimize
+
+
+def regex_peephole(instructions):
+    # The pass peephole.py replaced, kept as the baseline
+    optimized = []
+    i = 0
+    while i < len(instructions):
+        curr = instructions[i].strip()
+        next_instr = instructions[i + 1].strip() if i + 1 < len(instructions) else ""
+
+        mv_same = re.match(r'mv\s+(\w+),\s+(\w+)$', curr)
+        if mv_same and mv_same.group(1) == mv_same.group(2):
+            i += 1
+            continue
+
+        j_match = re.match(r'j\s+(\w+)$', curr)
+        label_match = re.match(r'(\w+):$', next_instr)
+        if j_match and label_match and j_match.group(1) == label_match.group(1):
+            i += 1
+            continue
+
+        sw_match = re.match(r'sw\s+(\w+),\s+(-?\d+\(\w+\))$', curr)
+        lw_match = re.match(r'lw\s+(\w+),\s+(-?\d+\(\w+\))$', next_instr)
+        if sw_match and lw_match:
+            if sw_match.group(1) == lw_match.group(1) and sw_match.group(2) == lw_match.group(2):
+                optimized.append(instructions[i])
+                i += 2
+                continue
+
+        optimized.append(instructions[i])
+        i += 1
+
+    return optimized
+
+
+class UnoptimizedCodeGen(CodeGenVisitor):
+    def peephole_optimize(self, instructions):
+        return instructions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=1_000_000, help="lines of code to optimize")
+    parser.add_argument("--seeds", type=int, default=20, help="generated programs to compile")
+    args = parser.parse_args(argv[1:])
+
+    sys.setrecursionlimit(100000)
+    code = []
+    for seed in range(args.seeds):
+        codegen = UnoptimizedCodeGen()
+        codegen.visit_program(check(generate_program(300, seed)))
+        code.extend(codegen.output)
+    items = (code * (args.lines // len(code) + 1))[:args.lines]
+    lines = [str(item) for item in items]
+
+    print(f"{'pass':<10} {'lines in':>10} {'lines out':>10} {'seconds':>8}")
+    for name, optimize, source in (("regex", regex_peephole, lines), ("peephole", peephole_optimize, items)):
+        start = time.perf_counter()
+        output = optimize(source)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<10} {len(source):>10,} {len(output):>10,} {elapsed:>8.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
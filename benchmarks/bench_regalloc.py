@@ -0,0 +1,144 @@
+"""Dynamic instruction and memory-operation counts of loop-heavy programs.
+
+Each kernel is compiled by the AST backend, by the IR backend with every
+value in a stack slot, by the IR backend with linear-scan register
+allocation (directly and via SSA form) and with graph coloring via SSA form
+(-O2), then executed by rv_sim.py.
+
+    python benchmarks/bench_regalloc.py [--scale N] [--backends ast,ir,linear,ssa-linear,ssa-graph]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from diff_backends import BACKENDS
+from kernels import run_kernels
+
+KERNELS = {
+    "nested sums": """fun main() int {
+   int i, j, n, sum, sq;
+   n = {N};
+   i = 0;
+   while (i < n) {
+      j = 0;
+      while (j < 20) {
+         sq = i * j;
+         sum = sum + sq - j / 3 + i;
+         j = j + 1;
+      }
+      i = i + 1;
+   }
+   print sum endl;
+   return 0;
+}
+""",
+    "collatz": """fun main() int {
+   int i, x, steps, longest, best;
+   i = 1;
+   while (i < {N}) {
+      x = i;
+      steps = 0;
+      while (x != 1) {
+         if (x / 2 * 2 == x) { x = x / 2; } else { x = 3 * x + 1; }
+         steps = steps + 1;
+      }
+      if (steps > longest) { longest = steps; best = i; }
+      i = i + 1;
+   }
+   print best endl;
+   print longest endl;
+   return 0;
+}
+""",
+    "gcd table": """fun gcd(int a, int b) int {
+   int t;
+   while (b != 0) {
+      t = b;
+      b = a - a / b * b;
+      a = t;
+   }
+   return a;
+}
+fun main() int {
+   int i, j, total, g;
+   i = 1;
+   while (i < {N} / 4) {
+      j = 1;
+      while (j < 40) {
+         g = gcd(i, j);
+         total = total + g;
+         j = j + 1;
+      }
+      i = i + 1;
+   }
+   print total endl;
+   return 0;
+}
+""",
+    "linked list": """struct node { int value; struct node next; };
+fun main() int {
+   struct node head, p;
+   int i, round, sum;
+   i = 0;
+   while (i < 200) {
+      p = new node;
+      p.value = i;
+      p.next = head;
+      head = p;
+      i = i + 1;
+   }
+   round = 0;
+   while (round < {N} / 40) {
+      p = head;
+      while (p != null) {
+         sum = sum + p.value;
+         p.value = p.value + 1;
+         p = p.next;
+      }
+      round = round + 1;
+   }
+   print sum endl;
+   return 0;
+}
+""",
+    "fib iterative": """fun main() int {
+   int i, k, a, b, t, checksum;
+   k = 0;
+   while (k < {N} / 10) {
+      a = 0;
+      b = 1;
+      i = 0;
+      while (i < 40) {
+         t = a + b;
+         a = b;
+         b = t;
+         i = i + 1;
+      }
+      checksum = checksum + a / 1000 - k;
+      k = k + 1;
+   }
+   print checksum endl;
+   return 0;
+}
+""",
+}
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=400, help="outer iteration count N of the kernels")
+    parser.add_argument("--backends", default="ast,ir,linear,ssa-linear,ssa-graph",
+                        help="comma separated backends: " + ", ".join(BACKENDS))
+    args = parser.parse_args(argv[1:])
+    backends = args.backends.split(",")
+
+    configurations = {backend: BACKENDS[backend] for backend in backends}
+    failures = run_kernels(KERNELS, configurations, args.scale, ["instructions", "loads", "stores"],
+                           ratio="vs " + backends[0])
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,107 @@
+"""Per-function comparison of the register allocators of the IR backend.
+
+Every function of the selected programs is compiled with each allocator on
+the same IR (taken through SSA form unless --no-ssa is given). For each one
+the table shows how many VRegs were spilled to frame slots, how many copies
+survived as mv instructions, and the static size of the function in
+instructions after the peephole pass.
+
+    python benchmarks/compare_regalloc.py [--allocators linear,graph] [--seeds N] [--no-ssa] [file.mini ...]
+"""
+import argparse
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from miniir.ir_builder import IRBuilder
+from miniir.regalloc import ALLOCATORS
+from miniir.riscv_backend import RiscVBackend
+from miniir.ssa import construct_ssa, destruct_ssa
+from bench_regalloc import KERNELS
+from diff_backends import PROGRAMS
+from mini_gen import generate_program
+from mini_interp import check
+
+LABEL = re.compile(r"^(\w+):$")
+
+
+def function_sizes(assembly, names):
+    # Returns {function: [mv count, instruction count]} for the functions named in names
+    sizes = {name: [0, 0] for name in names}
+    current = None
+    for line in assembly.splitlines():
+        label = LABEL.match(line)
+        if label:
+            name = label.group(1)
+            if name in sizes:
+                current = name
+        elif line.startswith("    ") and current is not None:
+            sizes[current][1] += 1
+            if line.split()[0] == "mv":
+                sizes[current][0] += 1
+    return sizes
+
+
+def compile_with(program, allocate, ssa):
+    # Returns {function: (spilled VRegs, mv count, instruction count)} in layout order
+    module = IRBuilder().build(program)
+    if ssa:
+        for function in module.functions:
+            construct_ssa(function)
+            destruct_ssa(function)
+    spilled = {}
+
+    def recording(function):
+        allocation = allocate(function)
+        spilled[function.name] = len(allocation.slots)
+        return allocation
+
+    assembly = RiscVBackend(recording).emit_module(module)
+    sizes = function_sizes(assembly, spilled)
+    return {name: (spilled[name], moves, size) for name, (moves, size) in sizes.items()}
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--allocators", default="linear,graph",
+                        help="comma separated allocators: " + ", ".join(ALLOCATORS))
+    parser.add_argument("--seeds", type=int, default=5, help="generated programs to include")
+    parser.add_argument("--lines", type=int, default=300, help="lines per generated program")
+    parser.add_argument("--no-ssa", dest="ssa", action="store_false", help="allocate the IR as built")
+    parser.add_argument("files", nargs="*", help=".mini programs to include")
+    args = parser.parse_args(argv[1:])
+    allocators = args.allocators.split(",")
+
+    sources = [(name, template.replace("{N}", "100")) for name, template in KERNELS.items()]
+    sources += [(f"edge{i}", source) for i, source in enumerate(PROGRAMS)]
+    sources += [(f"seed{seed}", generate_program(args.lines, seed)) for seed in range(args.seeds)]
+    for path in args.files:
+        with open(path) as f:
+            sources.append((os.path.basename(path), f.read()))
+
+    header = f"{'program':<16} {'function':<14}"
+    for allocator in allocators:
+        header += f" | {allocator + ' spills':>13} {'mv':>5} {'size':>6}"
+    print(header)
+    totals = {allocator: [0, 0, 0] for allocator in allocators}
+    for name, source in sources:
+        results = [compile_with(check(source), ALLOCATORS[allocator], args.ssa) for allocator in allocators]
+        for function in results[0]:
+            row = f"{name:<16} {function:<14}"
+            for allocator, result in zip(allocators, results):
+                counts = result[function]
+                row += f" | {counts[0]:>13,} {counts[1]:>5,} {counts[2]:>6,}"
+                for i, count in enumerate(counts):
+                    totals[allocator][i] += count
+            print(row)
+    row = f"{'total':<31}"
+    for allocator in allocators:
+        row += f" | {totals[allocator][0]:>13,} {totals[allocator][1]:>5,} {totals[allocator][2]:>6,}"
+    print(row)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
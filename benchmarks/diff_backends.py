@@ -0,0 +1,493 @@
+"""Differential check of the code generators against the reference interpreter.
+
+Every program is run by mini_interp.py and compiled by each selected backend;
+the assembly is executed by rv_sim.py and its output must match the
+interpreter's exactly. The simulator's dynamic counts are summed per backend.
+The AST backend is not selected by default: it does not zero locals, which
+some of the built-in programs read before assigning.
+
+    python benchmarks/diff_backends.py [--seeds N] [--backends ir,linear,...] [file.mini ...]
+"""
+import argparse
+import copy
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from codegen_visitor import CodeGenVisitor
+from constant_folding_ast_visitor import ConstantFoldingASTVisitor
+from miniir.dce import eliminate_dead_code
+from miniir.gvn import number_values
+from miniir.induction import reduce_strength
+from miniir.inline import Inliner
+from miniir.ir_builder import IRBuilder
+from miniir.licm import hoist_invariants
+from miniir.regalloc import graph_coloring, linear_scan, spill_everything
+from miniir.riscv_backend import RiscVBackend
+from miniir.sccp import propagate_constants
+from miniir.ssa import construct_ssa, destruct_ssa, verify_ssa
+from mini_gen import generate_program
+from mini_interp import MiniInterpreter, check
+import rv_sim
+
+def ir_backend(ssa=False, allocate=spill_everything, passes=(), rotate=False):
+    # Compiles through the IR, optionally via SSA form where the module passes run;
+    # the SSA form is checked with verify_ssa before and after them
+    def verify(module):
+        for function in module.functions:
+            problems = verify_ssa(function)
+            if problems:
+                raise ValueError(problems[0])
+
+    def compile(program):
+        module = IRBuilder(rotate_loops=rotate).build(program)
+        if ssa or passes:
+            for function in module.functions:
+                construct_ssa(function)
+            verify(module)
+            for optimize in passes:
+                optimize(module)
+                verify(module)
+            for function in module.functions:
+                destruct_ssa(function)
+        return RiscVBackend(allocate).emit_module(module)
+    return compile
+
+
+def folded(compile):
+    # Folds a copy of the program first, since folding rewrites the AST in place
+    def compile_folded(program):
+        program = copy.deepcopy(program)
+        ConstantFoldingASTVisitor().fold(program)
+        return compile(program)
+    return compile_folded
+
+
+BACKENDS = {
+    "ast": lambda program: CodeGenVisitor().visit_program(program),
+    "ir": ir_backend(),
+    "ssa": ir_backend(ssa=True),
+    "linear": ir_backend(allocate=linear_scan),
+    "ssa-linear": ir_backend(ssa=True, allocate=linear_scan),
+    "graph": ir_backend(allocate=graph_coloring),
+    "ssa-graph": ir_backend(ssa=True, allocate=graph_coloring),
+    "fold": folded(lambda program: CodeGenVisitor().visit_program(program)),
+    "fold-ssa-graph": folded(ir_backend(ssa=True, allocate=graph_coloring)),
+    "sccp": ir_backend(allocate=linear_scan, passes=[propagate_constants]),
+    "dce": ir_backend(allocate=linear_scan, passes=[eliminate_dead_code]),
+    "gvn": ir_backend(allocate=linear_scan, passes=[number_values]),
+    "licm": ir_backend(allocate=linear_scan, passes=[hoist_invariants], rotate=True),
+    "strength": ir_backend(allocate=linear_scan, passes=[reduce_strength, eliminate_dead_code], rotate=True),
+    "inline": ir_backend(allocate=linear_scan, passes=[lambda module: Inliner().run(module)]),
+    "inline-all": ir_backend(allocate=linear_scan, passes=[lambda module: Inliner(10 ** 6, 0, 10 ** 6).run(module)]),
+    "O2": folded(ir_backend(allocate=graph_coloring, rotate=True,
+                            passes=[lambda module: Inliner().run(module), propagate_constants, number_values, hoist_invariants, reduce_strength,
+                                    eliminate_dead_code])),
+}
+
+PROGRAMS = [
+    # more than eight arguments, calls inside operands and nested calls
+    """fun many(int a, int b, int c, int d, int e, int f, int g, int h, int i, int j, int k) int {
+   return a - b + c * d - e / f + g - h * i + j - k;
+}
+fun id(int x) int { return x; }
+fun main() int {
+   print many(1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11) endl;
+   print id(3) + id(4) * many(id(1), 2, 3, 4, 5, 1, 7, 8, 9, id(10), 11) endl;
+   print many(many(1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1), 2, 3, 4, 5, 6, 7, 8, 9, 10, id(11)) endl;
+   return 0;
+}
+""",
+    # short circuits with side effects, 32-bit wraparound and division corner cases
+    """int calls;
+fun t(int x) bool { calls = calls + 1; return x > 0; }
+fun main() int {
+   int x, y;
+   bool b;
+   b = t(0) && t(1);
+   b = t(1) || t(0);
+   b = (t(1) && t(0)) || (t(0) || t(1)) && !t(0);
+   print calls endl;
+   if (b) { print 1 endl; }
+   x = 2147483647;
+   print x + 1 endl;
+   print x * x endl;
+   y = 0 - x - 1;
+   print y / -1 endl;
+   print 7 / 0 endl;
+   print -7 / 2 endl;
+   print 7 / -2 endl;
+   return 0;
+}
+""",
+    # structs, null, globals, loops and early returns
+    """struct node { int v; struct node next; };
+struct node head;
+int n;
+fun push(int v) void {
+   struct node p;
+   p = new node;
+   p.v = v;
+   p.next = head;
+   head = p;
+   n = n + 1;
+}
+fun sum(struct node p) int {
+   int s;
+   while (p != null) {
+      if (p.v == 13) { return s; }
+      s = s + p.v;
+      p = p.next;
+   }
+   return s;
+}
+fun main() int {
+   int i;
+   while (i < 20) { push(i); i = i + 1; }
+   print sum(head) endl;
+   head.next.next.v = 100;
+   print head.next.next.v + head.next.v endl;
+   print n endl;
+   return 0;
+}
+""",
+    # values rotated around loops, which become cycles of phi copies once copies are propagated
+    """fun rotate(int a, int b, int c, int n) int {
+   int t;
+   while (n > 0) {
+      t = a;
+      a = b;
+      b = c;
+      c = t;
+      if (n / 2 * 2 == n) { t = a; a = b; b = t; }
+      n = n - 1;
+   }
+   return a * 100 + b * 10 + c;
+}
+fun main() int {
+   print rotate(1, 2, 3, 0) endl;
+   print rotate(1, 2, 3, 7) endl;
+   print rotate(4, 5, 6, 10) endl;
+   return 0;
+}
+""",
+    # constant folding: wraparound, division corner cases, identities next to effects, constant guards
+    """int calls;
+fun f(int x) int { calls = calls + 1; return x; }
+fun t() bool { calls = calls + 1; return true; }
+fun main() int {
+   int x, y;
+   bool b;
+   x = 3 * 4 + 7;
+   y = 2147483647 + 1;
+   print y endl;
+   print (0 - 2147483647 - 1) / -1 endl;
+   print 7 / 0 endl;
+   print -7 / 2 endl;
+   print x * 1 + 0 - 0 endl;
+   print f(x) * 0 endl;
+   print 0 * f(2) endl;
+   print calls endl;
+   b = t() && false;
+   b = false && t();
+   b = t() || true;
+   b = !!(x > 3) && true;
+   if (b) { print 1 endl; } else { print 2 endl; }
+   if (3 > 4) { print 3 endl; }
+   if (1 < 2 && true) { print 4 endl; } else { print 5 endl; }
+   while (false) { print 6 endl; }
+   while (1 > 2 || false) { print 7 endl; }
+   print calls endl;
+   print --x endl;
+   print x / -1 endl;
+   print 0 - x endl;
+   print x * -1 endl;
+   return 0;
+}
+""",
+    # constants through locals, loops and calls; functions called with one constant argument
+    """int g;
+fun scale(int x, int k) int { if (k > 1) { return x * k; } return x; }
+fun step(int n, int d) int {
+   int i, s;
+   i = 0;
+   while (i < n) { s = s + scale(i, d); i = i + 1; }
+   return s;
+}
+fun main() int {
+   int n, m, i;
+   bool debug;
+   n = 10;
+   m = n * 2;
+   debug = false;
+   i = 0;
+   while (i < n) {
+      if (debug) { print i endl; }
+      if (m > 5) { g = g + i; } else { g = g - i; }
+      i = i + 1;
+   }
+   print g endl;
+   print step(m, 3) endl;
+   print step(5, 3) endl;
+   return 0;
+}
+""",
+    # dead stores and expressions, code after returns, results of calls that are dropped
+    """int g;
+fun bump(int x) int { g = g + x; return g; }
+fun pick(int a, int b) int {
+   int t, u;
+   t = a * b;
+   u = a - b;
+   if (a > b) { return a; } else { return b; }
+   print t endl;
+   return u;
+}
+fun loop(int n) int {
+   int i, dead, k;
+   i = 0;
+   k = 0;
+   while (i < n) {
+      dead = i * 7 + k;
+      k = bump(i);
+      if (i > 100) { } else { }
+      i = i + 1;
+   }
+   return i;
+   i = i + 1;
+}
+fun main() int {
+   int x, y;
+   x = g + 9;
+   y = x * 3;
+   y = pick(x, 4);
+   bump(y);
+   print loop(5) endl;
+   print g endl;
+   while (true) {
+      print y endl;
+      return 0;
+   }
+   print x endl;
+   return 1;
+}
+""",
+    # repeated field loads around stores to the same and other fields and types, calls and delete
+    """struct node { int value; struct node next; };
+struct box { int value; struct node item; };
+int g;
+fun poke(struct node n) int { n.value = n.value + 100; g = g + 1; return g; }
+fun main() int {
+   struct node p, q;
+   struct box b;
+   int s, i;
+   p = new node;
+   p.next = new node;
+   p.next.value = 5;
+   p.value = 1;
+   b = new box;
+   b.item = p.next;
+   b.value = 7;
+   s = p.next.value + p.next.value;
+   print s endl;
+   q = p.next;
+   q.value = 9;
+   print p.next.value + b.value endl;
+   b.item.value = b.item.value * 2;
+   print p.next.value * p.next.value endl;
+   i = 0;
+   while (i < 3) {
+      s = s + p.next.value;
+      if (i == 1) { p.next.value = 1; } else { b.value = b.value + 1; }
+      s = s + p.next.value + b.value;
+      i = i + 1;
+   }
+   print s endl;
+   print p.next.value endl;
+   s = poke(p.next) + p.next.value;
+   print s + g endl;
+   g = 3;
+   s = g * g;
+   print s endl;
+   delete p.next;
+   p.next = p;
+   print p.next.value + p.next.value endl;
+   return 0;
+}
+""",
+    # induction variables times constants and invariants, exit tests on them, powers of two
+    """fun scaled(int n, int stride) int {
+   int i, s;
+   i = 0;
+   while (i < n) { s = s + i * 4 + i * stride; i = i + 1; }
+   return s;
+}
+fun down(int from) int {
+   int i, s;
+   i = 10;
+   while (i >= -3) { s = s + i * -6; i = i - 2; }
+   i = from;
+   while (i > 0) { s = s + 3 * i; i = i - 1; }
+   return s + i;
+}
+fun halves(int x) int {
+   int s;
+   s = x / 2 + x / 8 - x / 1024 + x * 16 + x / 4 * 32;
+   return s;
+}
+fun main() int {
+   int i, j, t;
+   print scaled(10, 7) endl;
+   print scaled(0, 7) endl;
+   print down(5) endl;
+   print halves(100) endl;
+   print halves(-101) endl;
+   print halves(-2147483647) endl;
+   print halves(-7) endl;
+   i = 0;
+   while (i < 6) {
+      j = 1;
+      while (j <= 5) { t = t + i * j + (j + 1) * 3; j = j + 1; }
+      i = i + 1;
+   }
+   print t endl;
+   i = 2147483600;
+   while (i < 2147483640) { t = t + i * 3; i = i + 8; }
+   print t + i endl;
+   return 0;
+}
+""",
+    # inlining: helpers with several returns, void and single-call functions, recursion,
+    # mutual recursion, calls in loops and as arguments, and a call with more than eight arguments
+    """struct node { int v; struct node next; };
+int g;
+fun sq(int x) int { return x * x; }
+fun clamp(int x, int lo, int hi) int {
+   if (x < lo) { return lo; }
+   if (x > hi) { return hi; }
+   return x;
+}
+fun bump(struct node n) void { n.v = n.v + 1; g = g + n.v; }
+fun fact(int n) int { if (n <= 1) { return 1; } return n * fact(n - 1); }
+fun even(int n) bool { if (n == 0) { return true; } return odd(n - 1); }
+fun odd(int n) bool { if (n == 0) { return false; } return even(n - 1); }
+fun wide(int a, int b, int c, int d, int e, int f, int g, int h, int i, int j) int {
+   return a + b * 2 + c * 3 + d * 4 + e * 5 + f * 6 + g * 7 + h * 8 + i * 9 + j * 10;
+}
+fun once(int n) int {
+   int s;
+   s = 0;
+   while (n > 0) { s = s + clamp(sq(n), 3, 50); n = n - 1; }
+   return s;
+}
+fun main() int {
+   struct node p;
+   int i;
+   p = new node;
+   p.v = 5;
+   bump(p);
+   bump(p);
+   print p.v endl;
+   print g endl;
+   print sq(sq(3)) + sq(-4) endl;
+   print clamp(7, 0, 5) endl;
+   print clamp(-7, 0, 5) endl;
+   print clamp(3, 0, 5) endl;
+   print fact(10) endl;
+   if (even(10)) { print 1 endl; } else { print 0 endl; }
+   if (odd(7)) { print 1 endl; } else { print 0 endl; }
+   print wide(1, 2, 3, 4, 5, 6, 7, 8, 9, sq(2)) endl;
+   i = 0;
+   while (i < 3) { print once(i + 4) endl; i = i + 1; }
+   delete p;
+   return 0;
+}
+""",
+    # tail calls: accumulators, mutual recursion, arguments that read the parameters they
+    # replace, and calls of and between functions with more than eight arguments
+    """fun sum(int n, int acc) int { if (n == 0) { return acc; } return sum(n - 1, acc + n); }
+fun swap(int n, int a, int b) int { if (n == 0) { return a * 1000 + b; } return swap(n - 1, b, a + 1); }
+fun even(int n) bool { if (n == 0) { return true; } return odd(n - 1); }
+fun odd(int n) bool { if (n == 0) { return false; } return even(n - 1); }
+fun gcd(int a, int b) int { if (b == 0) { return a; } return gcd(b, a - a / b * b); }
+fun spin(int n, int a, int b, int c, int d, int e, int f, int g, int h, int i, int j) int {
+   if (n == 0) { return a + b * 2 + c * 3 + d * 4 + e * 5 + f * 6 + g * 7 + h * 8 + i * 9 + j * 10; }
+   return spin(n - 1, j, a, b, c, d, e, f, g, h, i + n);
+}
+fun hop(int n, int a, int b, int c, int d, int e, int f, int g, int h, int i, int j) int {
+   if (n == 0) { return spin(3, a, b, c, d, e, f, g, h, i, j); }
+   return skip(n - 1, b, c, d, e, f, g, h, i, j, a + sum(n, 0));
+}
+fun skip(int n, int a, int b, int c, int d, int e, int f, int g, int h, int i, int j) int {
+   return hop(n, j, i, h, g, f, e, d, c, b, a);
+}
+fun depth(int n) int { if (n == 0) { return 0; } return 1 + depth(n - 1); }
+fun main() int {
+   print sum(3000, 0) endl;
+   print swap(7, 1, 2) endl;
+   if (even(2001)) { print 1 endl; } else { print 0 endl; }
+   if (odd(2001)) { print 1 endl; } else { print 0 endl; }
+   print gcd(1071, 462) endl;
+   print spin(25, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10) endl;
+   print hop(9, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10) endl;
+   print depth(100) endl;
+   return 0;
+}
+""",
+]
+
+
+def compare(label, source, backends, totals, inputs=()):
+    # Returns a failure description, or None if every backend matches the interpreter
+    program = check(source)
+    expected = MiniInterpreter(inputs).run(program)
+    for name in backends:
+        try:
+            result = rv_sim.run(BACKENDS[name](program), inputs)
+        except (rv_sim.SimError, ValueError) as e:
+            return f"{label}: {name} backend: {type(e).__name__}: {e}"
+        if result.output != expected:
+            return f"{label}: {name} backend printed {result.output[:60]!r}, expected {expected[:60]!r}"
+        for key, value in result.stats.as_dict().items():
+            totals[name][key] = totals[name].get(key, 0) + value
+    return None
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*", help="additional .mini files to run")
+    parser.add_argument("--seeds", type=int, default=20, help="generated programs to run")
+    parser.add_argument("--lines", type=int, default=300, help="lines per generated program")
+    parser.add_argument("--backends", default="ir,ssa,linear,ssa-linear",
+                        help="comma separated backends: " + ", ".join(BACKENDS))
+    parser.add_argument("--inputs", default="", help="comma separated values for read in the files")
+    args = parser.parse_args(argv[1:])
+    backends = args.backends.split(",")
+    inputs = [int(value) for value in args.inputs.split(",") if value]
+
+    sys.setrecursionlimit(100000)
+    programs = [(f"program {i}", source, ()) for i, source in enumerate(PROGRAMS)]
+    for path in args.files:
+        with open(path) as f:
+            programs.append((path, f.read(), inputs))
+    for seed in range(args.seeds):
+        programs.append((f"generated seed {seed}", generate_program(args.lines, seed), ()))
+
+    totals = {name: {} for name in backends}
+    failures = 0
+    for label, source, program_inputs in programs:
+        failure = compare(label, source, backends, totals, program_inputs)
+        if failure:
+            failures += 1
+            print(failure)
+
+    for name in backends:
+        counts = ", ".join(f"{key} {value:,}" for key, value in totals[name].items())
+        print(f"{name}: {counts}")
+    print(f"{len(programs)} programs run, {failures} mismatches")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,168 @@
+"""Differential check of the ANTLR and recursive-descent frontends.
+
+Every program is parsed by MiniParser + MiniToASTVisitor and by MiniRDParser.
+The resulting ASTs must be structurally identical: same node classes, same
+field values (including line numbers) and same list shapes. Each program is
+also mutated by deleting or duplicating single tokens, and both frontends must
+agree on whether the mutant is syntactically valid (and on its AST if it is).
+
+    python benchmarks/diff_frontends.py [--seeds N] [--mutants M] [file.mini ...]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from antlr4 import InputStream
+from mini_ast_visitor import MiniToASTVisitor
+from mini_frontend import MiniFrontend
+from mini_rd_parser import MiniRDParser, MiniSyntaxError, tokenize
+from miniast import mini_ast
+from mini_gen import generate_program
+
+EDGE_CASES = [
+    # every statement and expression form, odd line breaks and comments
+    """struct a { int x; struct a next; bool f; };
+struct b { struct a head; };
+int g, h; bool k;
+struct a
+   top;
+fun v(int p, struct a q, bool r) void { # trailing comment
+   return;
+}
+fun main() int {
+   int i, j; struct b z;
+   i = read;
+   z.head.next.x = -i * -(j + 1) - !k == !!true;
+   j = (new a).x + (z
+      .head).next.x + v(1, null, false) - g / h * 3 < 4 || k && i != j >= 2;
+   print (((i)));
+   print i endl;
+   if (i <= j) { } else { print 1; }
+   if (true) { { { } } }
+   while (z.head == null) { delete z; v(i, z.head, k); }
+   return -(-(i));
+}
+""",
+    "fun main() int { return 0; }\n# comment without trailing newline at EOF",
+    "fun main() int { return 1 +\n 2\n *\n 3 <\n 4 == false; }\n",
+    "fun main() int { return f(g(h(1), 2), i.j.k, (a).b, -c.d, !e.f); }\n",
+    "struct s { int x; }; struct s q; fun main() int { q = new s; return q.x; }\n",
+    "fun main() int { int x; x = 0007; x = 12ab; return x; }\n",
+    "fun main() int { x = 1 @ 2; return 0; }\n",
+    "fun main() int { bool b; b = true &\n& false | true; return 0; }\n",
+    "fun main() int { if (x) { } else return 0; }\n",
+    "struct",
+    "fun main() int { print 1 endl }\n",
+    # a struct type first named in a signature, on different lines (interning order)
+    "struct s { int x; };\nfun f(int a,\n struct s p)\n struct s { return p; }\nfun main() int { return 0; }\n",
+]
+
+
+def ast_fields(node):
+    # Attribute names of an AST node, whether it stores them in __dict__ or __slots__
+    names = set(getattr(node, "__dict__", ()))
+    for cls in type(node).__mro__:
+        slots = cls.__dict__.get("__slots__", ())
+        names.update([slots] if isinstance(slots, str) else slots)
+    names.discard("__dict__")
+    names.discard("__weakref__")
+    return sorted(names)
+
+
+def ast_diff(a, b, path="program"):
+    # Returns a description of the first difference between two ASTs, or None
+    if type(a) is not type(b):
+        return f"{path}: {type(a).__name__} != {type(b).__name__}"
+    if isinstance(a, list):
+        if len(a) != len(b):
+            return f"{path}: list length {len(a)} != {len(b)}"
+        for i, (x, y) in enumerate(zip(a, b)):
+            diff = ast_diff(x, y, f"{path}[{i}]")
+            if diff:
+                return diff
+        return None
+    if isinstance(a, mini_ast.MiniASTNode):
+        for name in ast_fields(a):
+            diff = ast_diff(getattr(a, name, None), getattr(b, name, None), f"{path}.{name}")
+            if diff:
+                return diff
+        return None
+    return None if a == b else f"{path}: {a!r} != {b!r}"
+
+
+def parse_both(source, antlr):
+    # Returns (antlr_ast, rd_ast); either is None when that frontend rejects the source
+    with contextlib.redirect_stderr(io.StringIO()):
+        tree = antlr.parse(InputStream(source))
+        antlr_ast = None if antlr.syntax_errors() else MiniToASTVisitor().visitProgram(tree)
+        try:
+            rd_ast = MiniRDParser().parse(source)
+        except MiniSyntaxError:
+            rd_ast = None
+    return antlr_ast, rd_ast
+
+
+def check(source, antlr, label):
+    antlr_ast, rd_ast = parse_both(source, antlr)
+    if (antlr_ast is None) != (rd_ast is None):
+        verdict = "ANTLR rejects, RD accepts" if antlr_ast is None else "ANTLR accepts, RD rejects"
+        return f"{label}: {verdict}"
+    if antlr_ast is not None:
+        diff = ast_diff(antlr_ast, rd_ast)
+        if diff:
+            return f"{label}: {diff}"
+    return None
+
+
+def mutate(source, rng):
+    # Deletes or duplicates one token of source
+    with contextlib.redirect_stderr(io.StringIO()):
+        _, texts, _, _ = tokenize(source)
+    texts = texts[:-1]
+    i = rng.randrange(len(texts))
+    if rng.random() < 0.5:
+        del texts[i]
+    else:
+        texts.insert(i, texts[i])
+    return " ".join(texts)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*", help="additional .mini files to check")
+    parser.add_argument("--seeds", type=int, default=20, help="generated programs to check")
+    parser.add_argument("--lines", type=int, default=300, help="lines per generated program")
+    parser.add_argument("--mutants", type=int, default=20, help="token mutants per program")
+    args = parser.parse_args(argv[1:])
+
+    programs = [(f"edge case {i}", source) for i, source in enumerate(EDGE_CASES)]
+    for path in args.files:
+        with open(path) as f:
+            programs.append((path, f.read()))
+    for seed in range(args.seeds):
+        programs.append((f"generated seed {seed}", generate_program(args.lines, seed)))
+
+    antlr = MiniFrontend()
+    rng = random.Random(0)
+    failures = checked = 0
+    for label, source in programs:
+        cases = [(label, source)]
+        cases += [(f"{label} mutant {i}", mutate(source, rng)) for i in range(args.mutants)]
+        for case_label, case_source in cases:
+            checked += 1
+            failure = check(case_source, antlr, case_label)
+            if failure:
+                failures += 1
+                print(failure)
+
+    print(f"{checked} sources checked, {failures} mismatches")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,44 @@
+"""The runner shared by the benchmarks that time kernels on rv_sim.py.
+
+A benchmark is a dict of kernels, Mini programs with {N} standing for their
+size, and a dict of configurations, each a function from a checked program
+to assembly. run_kernels compiles every kernel with every configuration,
+executes it and checks its output against the reference interpreter.
+"""
+from mini_interp import MiniInterpreter, check
+import rv_sim
+
+
+def run_kernels(kernels, configurations, scale, columns, ratio=None) -> int:
+    """Prints a row of the simulator statistics named by columns for each
+    kernel and configuration, and returns the number of runs whose output
+    was wrong. With ratio set, a last column headed ratio gives each run's
+    instructions over those of the kernel's first run."""
+    kernel_width = max(len("kernel"), *map(len, kernels))
+    configuration_width = max(len("compiled"), *map(len, configurations))
+    widths = [max(len(column), 9) + 1 for column in columns]
+    header = f"{'kernel':<{kernel_width}} {'compiled':<{configuration_width}}"
+    header += "".join(f" {column.replace('_', ' '):>{width}}" for column, width in zip(columns, widths))
+    if ratio:
+        header += f" {ratio:>{max(len(ratio), 8)}}"
+    print(header)
+
+    failures = 0
+    for name, template in kernels.items():
+        program = check(template.replace("{N}", str(scale)))
+        expected = MiniInterpreter().run(program)
+        baseline = None
+        for configuration, compile in configurations.items():
+            result = rv_sim.run(compile(program))
+            if result.output != expected:
+                failures += 1
+                print(f"{name}: {configuration} printed {result.output!r}, expected {expected!r}")
+                continue
+            stats = result.stats
+            baseline = baseline or stats.instructions
+            row = f"{name:<{kernel_width}} {configuration:<{configuration_width}}"
+            row += "".join(f" {getattr(stats, column):>{width},}" for column, width in zip(columns, widths))
+            if ratio:
+                row += f" {stats.instructions / baseline:>{max(len(ratio), 8)}.2f}"
+            print(row)
+    return failures
@@ -0,0 +1,218 @@
+"""Deterministic generator of large, well-typed .mini programs.
+
+Generated programs also terminate and never dereference null or divide by
+zero, so besides feeding the parser/checker benchmarks they can be compiled
+and executed to compare the output of different compiler configurations.
+"""
+import random
+import sys
+
+HEADER = """\
+struct node { int value; struct node next; bool flag; };
+struct pair { int a; int b; struct node head; };
+
+int gcount, gtotal;
+bool gflag;
+struct node ghead;
+
+fun leafadd(int p, int q) int {
+   return p * 3 + q - (p - q) / 7;
+}
+
+fun leafmax(int p, int q) int {
+   if (p > q) { return p; }
+   return q;
+}
+
+fun touch(struct node p, int v) void {
+   p.value = p.value + v;
+   gcount = gcount + 1;
+}
+"""
+
+INT_LOCALS = ["x0", "x1", "x2", "x3"]
+BOOL_LOCALS = ["b0", "b1"]
+PARAMS_DECL = "int a, int b, bool c, struct node n"
+
+# Binary operator precedence, higher binds tighter (mirrors Mini.g4)
+PRECEDENCE = {"*": 6, "/": 6, "+": 5, "-": 5, "<": 4, ">": 4, "<=": 4, ">=": 4,
+              "==": 3, "!=": 3, "&&": 2, "||": 1}
+
+
+class ProgramGenerator:
+    def __init__(self, seed: int = 0, max_depth: int = 4, loop_bound: int = 3):
+        self.rng = random.Random(seed)
+        self.max_depth = max_depth
+        self.loop_bound = loop_bound
+        self.functions = []     # names of generated fN functions, callable from main
+
+    # ---- expressions, built as (precedence, text) pairs ----
+
+    def _binary(self, op, left, right):
+        prec = PRECEDENCE[op]
+        ltext = left[1] if left[0] >= prec else f"({left[1]})"
+        rtext = right[1] if right[0] > prec else f"({right[1]})"
+        return (prec, f"{ltext} {op} {rtext}")
+
+    def int_expr(self, depth=0):
+        rng = self.rng
+        if depth >= self.max_depth or rng.random() < 0.25:
+            choice = rng.randrange(7)
+            if choice == 0:
+                return (9, str(rng.randrange(100)))
+            if choice == 1:
+                return (9, rng.choice(INT_LOCALS))
+            if choice == 2:
+                return (9, rng.choice(["a", "b", "gcount", "gtotal"]))
+            if choice == 3:
+                return (9, "m.value")
+            if choice == 4:
+                return (9, rng.choice(["m.next.value", "n.value", "n.next.next.value"]))
+            if choice == 5:
+                return (9, "p.a")
+            return (9, str(rng.randrange(1, 10)))
+        choice = rng.randrange(10)
+        if choice < 5:
+            op = rng.choice(["+", "-", "*", "+", "-"])
+            return self._binary(op, self.int_expr(depth + 1), self.int_expr(depth + 1))
+        if choice == 5:
+            divisor = self.int_expr(depth + 2)
+            denominator = self._binary("+", self._binary("*", divisor, divisor), (9, "1"))
+            return self._binary("/", self.int_expr(depth + 1), (9, f"({denominator[1]})"))
+        if choice == 6:
+            operand = self.int_expr(depth + 1)
+            text = operand[1] if operand[0] >= 7 else f"({operand[1]})"
+            return (7, f"-{text}")
+        if choice == 7:
+            name = rng.choice(["leafadd", "leafmax"])
+            return (9, f"{name}({self.int_expr(depth + 1)[1]}, {self.int_expr(depth + 1)[1]})")
+        return (9, f"({self.int_expr(depth + 1)[1]})")
+
+    def bool_expr(self, depth=0):
+        rng = self.rng
+        if depth >= self.max_depth or rng.random() < 0.2:
+            return (9, rng.choice(["true", "false", "c", "gflag", "m.flag"] + BOOL_LOCALS))
+        choice = rng.randrange(8)
+        if choice < 4:
+            op = rng.choice(["<", ">", "<=", ">=", "==", "!="])
+            return self._binary(op, self.int_expr(depth + 1), self.int_expr(depth + 1))
+        if choice == 4:
+            op = rng.choice(["==", "!="])
+            return self._binary(op, (9, rng.choice(["m", "n", "m.next"])),
+                                (9, rng.choice(["n", "null", "m.next"])))
+        if choice == 5:
+            operand = self.bool_expr(depth + 1)
+            text = operand[1] if operand[0] >= 7 else f"({operand[1]})"
+            return (7, f"!{text}")
+        op = rng.choice(["&&", "||"])
+        return self._binary(op, self.bool_expr(depth + 1), self.bool_expr(depth + 1))
+
+    # ---- statements ----
+
+    def statements(self, out, indent, count, loop_depth):
+        rng = self.rng
+        pad = "   " * indent
+        for _ in range(count):
+            choice = rng.randrange(14)
+            if choice < 4:
+                out.append(f"{pad}{rng.choice(INT_LOCALS)} = {self.int_expr()[1]};")
+            elif choice == 4:
+                out.append(f"{pad}{rng.choice(BOOL_LOCALS)} = {self.bool_expr()[1]};")
+            elif choice == 5:
+                target = rng.choice(["m.value", "m.next.value", "p.b", "gtotal"])
+                out.append(f"{pad}{target} = {self.int_expr()[1]};")
+            elif choice == 6:
+                out.append(f"{pad}{rng.choice(['m.flag', 'gflag'])} = {self.bool_expr()[1]};")
+            elif choice == 7:
+                out.append(f"{pad}print {self.int_expr()[1]} endl;")
+            elif choice == 8:
+                out.append(f"{pad}touch({rng.choice(['m', 'n'])}, {self.int_expr()[1]});")
+            elif choice == 9 and indent < 4:
+                out.append(f"{pad}if ({self.bool_expr()[1]}) {{")
+                self.statements(out, indent + 1, rng.randrange(1, 4), loop_depth)
+                if rng.random() < 0.6:
+                    out.append(f"{pad}}} else {{")
+                    self.statements(out, indent + 1, rng.randrange(1, 4), loop_depth)
+                out.append(f"{pad}}}")
+            elif choice == 10 and loop_depth < 2:
+                counter = f"i{loop_depth}"
+                bound = rng.randrange(1, self.loop_bound + 1)
+                # A || in the extra condition must not escape the counter test
+                extra = self.bool_expr(self.max_depth - 1)
+                text = extra[1] if extra[0] > PRECEDENCE["&&"] else f"({extra[1]})"
+                out.append(f"{pad}{counter} = 0;")
+                out.append(f"{pad}while ({counter} < {bound} && {text}) {{")
+                self.statements(out, indent + 1, rng.randrange(1, 4), loop_depth + 1)
+                out.append(f"{pad}   {counter} = {counter} + 1;")
+                out.append(f"{pad}}}")
+            elif choice == 11:
+                out.append(f"{pad}s = new node;")
+                out.append(f"{pad}s.value = {self.int_expr()[1]};")
+                out.append(f"{pad}s.next = m;")
+                out.append(f"{pad}print s.value + s.next.value endl;")
+                out.append(f"{pad}delete s;")
+            else:
+                out.append(f"{pad}x{rng.randrange(4)} = x{rng.randrange(4)} + {rng.randrange(1, 5)};")
+
+    def function(self, out, index, statements):
+        name = f"f{index}"
+        out.append(f"fun {name}({PARAMS_DECL}) int {{")
+        out.append("   int x0, x1, x2, x3, i0, i1;")
+        out.append("   bool b0, b1;")
+        out.append("   struct node m, s;")
+        out.append("   struct pair p;")
+        out.append("   m = new node;")
+        out.append("   m.value = a;")
+        out.append("   m.next = n;")
+        out.append("   m.flag = c;")
+        out.append("   p = new pair;")
+        out.append("   p.a = b;")
+        out.append("   p.head = m;")
+        for i, local in enumerate(INT_LOCALS):
+            out.append(f"   {local} = a + {i};")
+        out.append("   b0 = c;")
+        out.append("   b1 = !c;")
+        self.statements(out, 1, statements, 0)
+        out.append(f"   gtotal = gtotal + {self.int_expr()[1]};")
+        out.append(f"   return {self.int_expr()[1]};")
+        out.append("}")
+        out.append("")
+        self.functions.append(name)
+
+    def main(self, out):
+        out.append("fun main() int {")
+        out.append("   int r;")
+        out.append("   ghead = new node;")
+        out.append("   ghead.value = 7;")
+        out.append("   ghead.next = ghead;")
+        out.append("   ghead.flag = true;")
+        out.append("   gflag = false;")
+        out.append("   r = 0;")
+        for i, name in enumerate(self.functions):
+            out.append(f"   r = r + {name}({i}, r, {'true' if i % 2 else 'false'}, ghead);")
+            out.append("   print r endl;")
+        out.append("   print gcount endl;")
+        out.append("   print gtotal endl;")
+        out.append("   return 0;")
+        out.append("}")
+
+    def program(self, lines: int = 1000, statements: int = 40) -> str:
+        # Emits functions until roughly `lines` lines have been generated
+        out = HEADER.splitlines()
+        out.append("")
+        index = 0
+        while len(out) < lines or index == 0:
+            self.function(out, index, statements)
+            index += 1
+        self.main(out)
+        return "\n".join(out) + "\n"
+
+
+def generate_program(lines: int = 1000, seed: int = 0, statements: int = 40) -> str:
+    return ProgramGenerator(seed).program(lines, statements)
+
+
+if __name__ == "__main__":
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    sys.stdout.write(generate_program(lines, seed))
@@ -0,0 +1,281 @@
+"""Reference interpreter for checked .mini ASTs.
+
+Executes a program straight from the AST with the semantics the backends
+implement: 32-bit wrapping integers, RISC-V division (x / 0 is -1,
+INT_MIN / -1 is INT_MIN), locals, globals and fields starting out as 0, and
+operands and arguments evaluated left to right. Its output is the oracle
+that compiled programs are compared against.
+
+    python benchmarks/mini_interp.py file.mini [inputs ...]
+"""
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from mini_rd_parser import MiniRDParser
+from miniast import mini_ast, expression_ast, lvalue_ast
+from miniast.interning import ASTInterner
+from static_semantic_ast_visitor import StaticSemanticASTVisitor
+
+Operator = expression_ast.Operator
+
+
+def s32(value):
+    value &= 0xFFFFFFFF
+    return value - 0x100000000 if value & 0x80000000 else value
+
+
+def divide(left, right):
+    if right == 0:
+        return -1
+    quotient = abs(left) // abs(right)
+    return s32(quotient if (left < 0) == (right < 0) else -quotient)
+
+
+ARITHMETIC = {
+    Operator.PLUS: lambda l, r: s32(l + r),
+    Operator.MINUS: lambda l, r: s32(l - r),
+    Operator.TIMES: lambda l, r: s32(l * r),
+    Operator.DIVIDE: divide,
+    Operator.LT: lambda l, r: int(l < r),
+    Operator.LE: lambda l, r: int(l <= r),
+    Operator.GT: lambda l, r: int(l > r),
+    Operator.GE: lambda l, r: int(l >= r),
+}
+
+
+class InterpreterError(Exception):
+    pass
+
+
+class Return(Exception):
+    def __init__(self, value):
+        self.value = value
+
+
+class Struct:
+    """A heap allocated struct; fields are keyed by byte offset."""
+
+    __slots__ = ("fields",)
+
+    def __init__(self):
+        self.fields = {}
+
+
+class MiniInterpreter(mini_ast.ASTVisitor):
+    """Runs a program that StaticSemanticASTVisitor has checked without errors.
+
+    Integers, booleans and null are Python ints; struct values are Struct
+    objects, which compare by identity.
+    """
+
+    def __init__(self, inputs=(), max_steps=50_000_000):
+        self.inputs = list(inputs)
+        self.output = []
+        self.functions = {}
+        self.globals = {}
+        self.frame = None # VariableInfo index -> value
+        self.steps = max_steps
+
+    def run(self, program) -> str:
+        for function in program.functions:
+            self.functions[function.name.id] = function
+        for declaration in program.declarations:
+            self.globals[declaration.name.id] = 0
+        self.call(self.functions["main"], [])
+        return "".join(self.output)
+
+    def call(self, function, arguments):
+        saved = self.frame
+        self.frame = arguments + [0] * len(function.locals)
+        try:
+            for statement in function.body:
+                statement.accept(self)
+            result = 0
+        except Return as ret:
+            result = ret.value
+        self.frame = saved
+        return result
+
+    def tick(self):
+        self.steps -= 1
+        if self.steps < 0:
+            raise InterpreterError("step limit exceeded")
+
+    def lookup(self, binding):
+        if binding.is_global:
+            return self.globals[binding.name]
+        return self.frame[binding.index]
+
+    def assign(self, binding, value):
+        if binding.is_global:
+            self.globals[binding.name] = value
+        else:
+            self.frame[binding.index] = value
+
+    def deref(self, value, linenum):
+        if not isinstance(value, Struct):
+            raise InterpreterError(f"line {linenum}: null dereference")
+        return value.fields
+
+    # ---- declarations, visited only through run() and call() ----
+
+    def visit_program(self, program):
+        return self.run(program)
+
+    def visit_declaration(self, declaration):
+        pass
+
+    def visit_type_declaration(self, type_declaration):
+        pass
+
+    def visit_function(self, function):
+        pass
+
+    def visit_int_type(self, int_type):
+        pass
+
+    def visit_bool_type(self, bool_type):
+        pass
+
+    def visit_struct_type(self, struct_type):
+        pass
+
+    def visit_return_type_real(self, return_type_real):
+        pass
+
+    def visit_return_type_void(self, return_type_void):
+        pass
+
+    # ---- statements ----
+
+    def visit_assignment_statement(self, assignment_statement):
+        self.tick()
+        target = assignment_statement.target
+        if isinstance(target, lvalue_ast.LValueID):
+            self.assign(target.id.binding, assignment_statement.source.accept(self))
+        else:
+            fields = self.deref(target.left.accept(self), target.linenum)
+            fields[target.offset] = assignment_statement.source.accept(self)
+
+    def visit_block_statement(self, block_statement):
+        for statement in block_statement.statements:
+            statement.accept(self)
+
+    def visit_conditional_statement(self, conditional_statement):
+        self.tick()
+        if conditional_statement.guard.accept(self):
+            conditional_statement.then_block.accept(self)
+        elif conditional_statement.else_block:
+            conditional_statement.else_block.accept(self)
+
+    def visit_while_statement(self, while_statement):
+        self.tick()
+        while while_statement.guard.accept(self):
+            while_statement.body.accept(self)
+            self.tick()
+
+    def visit_delete_statement(self, delete_statement):
+        self.tick()
+        delete_statement.expression.accept(self)
+
+    def visit_invocation_statement(self, invocation_statement):
+        self.tick()
+        invocation_statement.expression.accept(self)
+
+    def visit_println_statement(self, println_statement):
+        self.tick()
+        self.output.append(f"{println_statement.expression.accept(self)}\n")
+
+    def visit_print_statement(self, print_statement):
+        self.tick()
+        self.output.append(str(print_statement.expression.accept(self)))
+
+    def visit_return_empty_statement(self, return_empty_statement):
+        raise Return(0)
+
+    def visit_return_statement(self, return_statement):
+        raise Return(return_statement.expression.accept(self))
+
+    # ---- expressions ----
+
+    def visit_dot_expression(self, dot_expression):
+        fields = self.deref(dot_expression.left.accept(self), dot_expression.linenum)
+        return fields.get(dot_expression.offset, 0)
+
+    def visit_false_expression(self, false_expression):
+        return 0
+
+    def visit_true_expression(self, true_expression):
+        return 1
+
+    def visit_identifier_expression(self, identifier_expression):
+        return self.lookup(identifier_expression.binding)
+
+    def visit_new_expression(self, new_expression):
+        return Struct()
+
+    def visit_null_expression(self, null_expression):
+        return 0
+
+    def visit_read_expression(self, read_expression):
+        if not self.inputs:
+            raise InterpreterError("read past end of input")
+        return s32(self.inputs.pop(0))
+
+    def visit_integer_expression(self, integer_expression):
+        return s32(int(integer_expression.value))
+
+    def visit_invocation_expression(self, invocation_expression):
+        arguments = [argument.accept(self) for argument in invocation_expression.arguments]
+        return self.call(self.functions[invocation_expression.name.id], arguments)
+
+    def visit_unary_expression(self, unary_expression):
+        operand = unary_expression.operand.accept(self)
+        if unary_expression.operator is Operator.MINUS:
+            return s32(-operand)
+        return int(not operand)
+
+    def visit_binary_expression(self, binary_expression):
+        op = binary_expression.operator
+        left = binary_expression.left.accept(self)
+        if op is Operator.AND:
+            return int(bool(left) and bool(binary_expression.right.accept(self)))
+        if op is Operator.OR:
+            return int(bool(left) or bool(binary_expression.right.accept(self)))
+        right = binary_expression.right.accept(self)
+        if op is Operator.EQ:
+            return int(left == right)
+        if op is Operator.NE:
+            return int(left != right)
+        return ARITHMETIC[op](left, right)
+
+    def visit_lvalue_dot(self, lvalue_dot):
+        fields = self.deref(lvalue_dot.left.accept(self), lvalue_dot.linenum)
+        return fields.get(lvalue_dot.offset, 0)
+
+    def visit_lvalue_id(self, lvalue_id):
+        return self.lookup(lvalue_id.id.binding)
+
+
+def check(source):
+    """Parses and checks source, returning its AST or raising ValueError."""
+    interner = ASTInterner()
+    program = MiniRDParser().parse(source, interner)
+    with contextlib.redirect_stdout(io.StringIO()) as messages:
+        if StaticSemanticASTVisitor(interner).analyze(program):
+            raise ValueError(messages.getvalue())
+    return program
+
+
+def interpret(source, inputs=()):
+    return MiniInterpreter(inputs).run(check(source))
+
+
+if __name__ == "__main__":
+    sys.setrecursionlimit(100000)
+    with open(sys.argv[1]) as f:
+        sys.stdout.write(interpret(f.read(), [int(value) for value in sys.argv[2:]]))
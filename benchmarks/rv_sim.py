@@ -0,0 +1,400 @@
+"""A small interpreter for the RISC-V dialect emitted by the Mini compiler.
+
+It understands the subset of RV32IM (plus the usual pseudo instructions) that
+the backends emit, and stubs the berkeley_utils.s / read_int.s entry points
+(print_int, print_char, malloc, free, read_int, exit).  Besides the program
+output it counts dynamically executed instructions, loads, stores, branches,
+calls, multiplies and divides, which is what the benchmarks report.
+
+Library calls deliberately scramble every caller-saved register except a0, and
+every call into compiled code is checked on return for a preserved sp and
+s0-s11, so register allocation bugs show up as wrong output or an ABIError
+instead of passing by accident.
+"""
+import argparse
+import re
+import sys
+
+REG_NAMES = {
+    'zero': 0, 'ra': 1, 'sp': 2, 'gp': 3, 'tp': 4, 't0': 5, 't1': 6, 't2': 7,
+    's0': 8, 'fp': 8, 's1': 9, 'a0': 10, 'a1': 11, 'a2': 12, 'a3': 13, 'a4': 14,
+    'a5': 15, 'a6': 16, 'a7': 17, 's2': 18, 's3': 19, 's4': 20, 's5': 21,
+    's6': 22, 's7': 23, 's8': 24, 's9': 25, 's10': 26, 's11': 27, 't3': 28,
+    't4': 29, 't5': 30, 't6': 31,
+}
+for _i in range(32):
+    REG_NAMES[f'x{_i}'] = _i
+
+CALLER_SAVED = [REG_NAMES[r] for r in
+                ('ra', 't0', 't1', 't2', 't3', 't4', 't5', 't6',
+                 'a1', 'a2', 'a3', 'a4', 'a5', 'a6', 'a7')]
+CALLEE_SAVED = [REG_NAMES[r] for r in
+                ('sp', 's0', 's1', 's2', 's3', 's4', 's5', 's6', 's7', 's8',
+                 's9', 's10', 's11')]
+
+LIBRARY = ('print_int', 'print_char', 'malloc', 'free', 'read_int', 'exit')
+
+DATA_BASE = 0x10000000
+HEAP_BASE = 0x10040000
+STACK_TOP = 0x7FFFFFF0
+EXIT_ADDR = -8
+MEM_OPERAND = re.compile(r'(-?\w+)\((\w+)\)$')
+
+LOADS = {'lw'}
+STORES = {'sw'}
+BRANCHES = {'beq', 'bne', 'blt', 'bge', 'bltu', 'bgeu', 'beqz', 'bnez',
+            'blez', 'bgez', 'bltz', 'bgtz', 'bgt', 'ble', 'bgtu', 'bleu'}
+
+
+class SimError(Exception):
+    pass
+
+
+class ABIError(SimError):
+    pass
+
+
+def to_s32(v):
+    v &= 0xFFFFFFFF
+    return v - 0x100000000 if v & 0x80000000 else v
+
+
+def div32(a, b):
+    if b == 0:
+        return -1
+    if a == -0x80000000 and b == -1:
+        return a
+    q = abs(a) // abs(b)
+    return q if (a < 0) == (b < 0) else -q
+
+
+def rem32(a, b):
+    if b == 0:
+        return a
+    if a == -0x80000000 and b == -1:
+        return 0
+    return a - div32(a, b) * b
+
+
+class Stats:
+    def __init__(self):
+        self.instructions = 0
+        self.loads = 0
+        self.stores = 0
+        self.branches = 0
+        self.taken = 0
+        self.calls = 0
+        self.library_calls = 0
+        self.multiplies = 0
+        self.divides = 0
+        self.max_stack = 0
+
+    def as_dict(self):
+        return dict(self.__dict__)
+
+
+class Result:
+    def __init__(self, output, stats):
+        self.output = output
+        self.stats = stats
+
+
+class Machine:
+    def __init__(self, asm: str, inputs=(), max_steps=200_000_000):
+        self.code = []          # list of (op, args, line)
+        self.labels = {}        # code label -> index
+        self.data = {}          # data label -> address
+        self.mem = {}
+        self.regs = [0] * 32
+        self.inputs = list(inputs)
+        self.out = []
+        self.stats = Stats()
+        self.max_steps = max_steps
+        self.heap = HEAP_BASE
+        self.shadow = []
+        self._load(asm)
+
+    def _load(self, asm):
+        section = 'text'
+        data_ptr = DATA_BASE
+        for raw in asm.splitlines():
+            line = raw.split('#', 1)[0].strip()
+            if not line:
+                continue
+            if line.startswith('.'):
+                d = line.split()[0]
+                if d == '.data':
+                    section = 'data'
+                elif d == '.text':
+                    section = 'text'
+                continue
+            m = re.match(r'([A-Za-z_][\w.]*):\s*(.*)$', line)
+            if m:
+                name, rest = m.group(1), m.group(2)
+                if section == 'data':
+                    self.data[name] = data_ptr
+                    if rest.startswith('.word'):
+                        vals = rest[5:].replace(',', ' ').split() or ['0']
+                        for v in vals:
+                            self.mem[data_ptr] = int(v, 0)
+                            data_ptr += 4
+                    elif rest.startswith('.space'):
+                        data_ptr += int(rest.split()[1])
+                    continue
+                self.labels[name] = len(self.code)
+                line = rest
+                if not line:
+                    continue
+            parts = line.replace(',', ' ').split()
+            self.code.append((parts[0], parts[1:], raw))
+
+    def reg(self, name):
+        try:
+            return REG_NAMES[name]
+        except KeyError:
+            raise SimError(f'unknown register {name}')
+
+    def r(self, name):
+        return self.regs[self.reg(name)]
+
+    def w(self, name, value):
+        idx = self.reg(name)
+        if idx:
+            self.regs[idx] = to_s32(value)
+
+    def addr(self, operand):
+        m = MEM_OPERAND.match(operand)
+        if not m:
+            raise SimError(f'bad memory operand {operand}')
+        return to_s32(int(m.group(1), 0) + self.r(m.group(2)))
+
+    def load(self, a):
+        if a % 4:
+            raise SimError(f'misaligned load at {a:#x}')
+        if a not in self.mem:
+            if 0 <= a < 4096:
+                raise SimError(f'null pointer load at {a:#x}')
+        return self.mem.get(a, 0)
+
+    def store(self, a, v):
+        if a % 4:
+            raise SimError(f'misaligned store at {a:#x}')
+        if 0 <= a < 4096:
+            raise SimError(f'null pointer store at {a:#x}')
+        self.mem[a] = to_s32(v)
+
+    def target(self, label):
+        if label in self.labels:
+            return self.labels[label]
+        raise SimError(f'unknown label {label}')
+
+    def library(self, name):
+        st = self.stats
+        st.library_calls += 1
+        a0 = self.regs[10]
+        result = a0
+        if name == 'print_int':
+            self.out.append(str(a0))
+        elif name == 'print_char':
+            self.out.append(chr(a0 & 0xFF))
+        elif name == 'malloc':
+            result = self.heap
+            self.heap += (max(a0, 4) + 15) & ~15
+        elif name == 'free':
+            pass
+        elif name == 'read_int':
+            if not self.inputs:
+                raise SimError('read past end of input')
+            result = self.inputs.pop(0)
+        elif name == 'exit':
+            return True
+        for i in CALLER_SAVED:
+            if i != 1:
+                self.regs[i] = to_s32(0x5EEDBEEF ^ (i * 0x01010101))
+        self.regs[10] = to_s32(result)
+        return False
+
+    def call(self, name, ret_pc):
+        if name in LIBRARY and name not in self.labels:
+            return self.library(name)
+        self.stats.calls += 1
+        self.shadow.append((ret_pc, [self.regs[i] for i in CALLEE_SAVED]))
+        return None
+
+    def ret(self, pc):
+        if self.shadow and self.shadow[-1][0] == pc:
+            _, saved = self.shadow.pop()
+            now = [self.regs[i] for i in CALLEE_SAVED]
+            if now != saved:
+                names = [n for n, i in REG_NAMES.items() if i in CALLEE_SAVED]
+                bad = [n for n, i in REG_NAMES.items()
+                       if i in CALLEE_SAVED and not n.startswith('x')
+                       and saved[CALLEE_SAVED.index(i)] != now[CALLEE_SAVED.index(i)]]
+                raise ABIError(f'callee-saved registers clobbered: {bad}')
+
+    def run(self):
+        self.regs[2] = STACK_TOP
+        argv = HEAP_BASE - 64
+        self.mem[argv] = 0
+        self.mem[argv + 4] = 0x1000_0FF0
+        self.regs[11] = argv
+        self.regs[1] = EXIT_ADDR
+        pc = self.target('main')
+        self.shadow.append((EXIT_ADDR, [self.regs[i] for i in CALLEE_SAVED]))
+        st = self.stats
+        code = self.code
+        low_sp = STACK_TOP
+        while True:
+            if pc < 0:
+                break
+            if pc >= len(code):
+                raise SimError('fell off the end of the text section')
+            op, a, raw = code[pc]
+            st.instructions += 1
+            if st.instructions > self.max_steps:
+                raise SimError('step limit exceeded')
+            npc = pc + 1
+            if op == 'li':
+                self.w(a[0], int(a[1], 0))
+            elif op == 'la':
+                if a[1] not in self.data:
+                    raise SimError(f'unknown data label {a[1]}')
+                self.w(a[0], self.data[a[1]])
+            elif op == 'lw':
+                st.loads += 1
+                self.w(a[0], self.load(self.addr(a[1])))
+            elif op == 'sw':
+                st.stores += 1
+                self.store(self.addr(a[1]), self.r(a[0]))
+            elif op == 'mv':
+                self.w(a[0], self.r(a[1]))
+            elif op == 'add':
+                self.w(a[0], self.r(a[1]) + self.r(a[2]))
+            elif op == 'addi':
+                self.w(a[0], self.r(a[1]) + int(a[2], 0))
+            elif op == 'sub':
+                self.w(a[0], self.r(a[1]) - self.r(a[2]))
+            elif op == 'mul':
+                st.multiplies += 1
+                self.w(a[0], self.r(a[1]) * self.r(a[2]))
+            elif op == 'div':
+                st.divides += 1
+                self.w(a[0], div32(self.r(a[1]), self.r(a[2])))
+            elif op == 'rem':
+                st.divides += 1
+                self.w(a[0], rem32(self.r(a[1]), self.r(a[2])))
+            elif op == 'slt':
+                self.w(a[0], int(self.r(a[1]) < self.r(a[2])))
+            elif op == 'slti':
+                self.w(a[0], int(self.r(a[1]) < int(a[2], 0)))
+            elif op == 'sltu':
+                self.w(a[0], int((self.r(a[1]) & 0xFFFFFFFF) < (self.r(a[2]) & 0xFFFFFFFF)))
+            elif op == 'xor':
+                self.w(a[0], self.r(a[1]) ^ self.r(a[2]))
+            elif op == 'xori':
+                self.w(a[0], self.r(a[1]) ^ int(a[2], 0))
+            elif op == 'and':
+                self.w(a[0], self.r(a[1]) & self.r(a[2]))
+            elif op == 'andi':
+                self.w(a[0], self.r(a[1]) & int(a[2], 0))
+            elif op == 'or':
+                self.w(a[0], self.r(a[1]) | self.r(a[2]))
+            elif op == 'ori':
+                self.w(a[0], self.r(a[1]) | int(a[2], 0))
+            elif op == 'sll':
+                self.w(a[0], self.r(a[1]) << (self.r(a[2]) & 31))
+            elif op == 'slli':
+                self.w(a[0], self.r(a[1]) << int(a[2], 0))
+            elif op == 'sra':
+                self.w(a[0], self.r(a[1]) >> (self.r(a[2]) & 31))
+            elif op == 'srai':
+                self.w(a[0], self.r(a[1]) >> int(a[2], 0))
+            elif op == 'srl':
+                self.w(a[0], (self.r(a[1]) & 0xFFFFFFFF) >> (self.r(a[2]) & 31))
+            elif op == 'srli':
+                self.w(a[0], (self.r(a[1]) & 0xFFFFFFFF) >> int(a[2], 0))
+            elif op == 'seqz':
+                self.w(a[0], int(self.r(a[1]) == 0))
+            elif op == 'snez':
+                self.w(a[0], int(self.r(a[1]) != 0))
+            elif op == 'neg':
+                self.w(a[0], -self.r(a[1]))
+            elif op == 'not':
+                self.w(a[0], ~self.r(a[1]))
+            elif op == 'nop':
+                pass
+            elif op in BRANCHES:
+                st.branches += 1
+                if op.endswith('z'):
+                    x, y, label = self.r(a[0]), 0, a[1]
+                    op = op[:-1]
+                else:
+                    x, y, label = self.r(a[0]), self.r(a[1]), a[2]
+                if op.endswith('u'):
+                    x &= 0xFFFFFFFF
+                    y &= 0xFFFFFFFF
+                    op = op[:-1]
+                taken = {'beq': x == y, 'bne': x != y, 'blt': x < y,
+                         'bge': x >= y, 'bgt': x > y, 'ble': x <= y}[op]
+                if taken:
+                    st.taken += 1
+                    npc = self.target(label)
+            elif op == 'j':
+                npc = self.target(a[0])
+            elif op in ('jal', 'call', 'tail'):
+                if op == 'tail':
+                    rd, label = 'zero', a[0]
+                elif len(a) == 1:
+                    rd, label = ('ra' if op == 'call' or op == 'jal' else 'zero'), a[0]
+                else:
+                    rd, label = a[0], a[1]
+                if rd == 'zero':
+                    if label in LIBRARY and label not in self.labels:
+                        if self.library(label):
+                            break
+                        npc = self.regs[1] // 4 if self.regs[1] != EXIT_ADDR else EXIT_ADDR // 4
+                        if label != 'exit':
+                            self.ret(self.regs[1])
+                    else:
+                        npc = self.target(label)
+                else:
+                    ret_addr = (pc + 1) * 4
+                    self.w(rd, ret_addr)
+                    res = self.call(label, ret_addr)
+                    if res is True:
+                        break
+                    if res is None:
+                        npc = self.target(label)
+            elif op == 'ret' or (op == 'jr' and a[0] == 'ra') or (op == 'jalr' and a[-1] in ('ra', '0(ra)')):
+                dest = self.regs[1]
+                self.ret(dest)
+                npc = dest // 4
+            else:
+                raise SimError(f'unsupported instruction: {raw.strip()}')
+            sp = self.regs[2]
+            if sp < low_sp:
+                low_sp = sp
+            pc = npc
+        st.max_stack = STACK_TOP - low_sp
+        return Result(''.join(self.out), st)
+
+
+def run(asm: str, inputs=(), max_steps=200_000_000) -> Result:
+    """Execute an assembly program and return its output and dynamic counts."""
+    return Machine(asm, inputs, max_steps).run()
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Run Mini compiler output')
+    parser.add_argument('asm_file')
+    parser.add_argument('inputs', nargs='*', type=int, help='values for read')
+    args = parser.parse_args(argv[1:])
+    with open(args.asm_file) as f:
+        result = run(f.read(), args.inputs)
+    sys.stdout.write(result.output)
+    for key, value in result.stats.as_dict().items():
+        print(f'{key}: {value}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -1,229 +1,359 @@
 from miniast import mini_ast, program_ast, type_ast, statement_ast, expression_ast, lvalue_ast
-import re
+from peephole import Instr, Label, peephole_optimize
+
+# Registers that hold the left operands of pending binary operations, innermost last
+TEMP_REGISTERS = ['t1', 't2', 't3', 't4', 't5', 't6']
+
+# Code for each binary operator with the left operand in a, the right in b
+BINARY_OPERATIONS = {
+    expression_ast.Operator.PLUS: [("add", "a0", "a", "b")],
+    expression_ast.Operator.MINUS: [("sub", "a0", "a", "b")],
+    expression_ast.Operator.TIMES: [("mul", "a0", "a", "b")],
+    expression_ast.Operator.DIVIDE: [("div", "a0", "a", "b")],
+    expression_ast.Operator.LT: [("slt", "a0", "a", "b")],
+    expression_ast.Operator.LE: [("slt", "a0", "b", "a"), ("xori", "a0", "a0", "1")],
+    expression_ast.Operator.GT: [("slt", "a0", "b", "a")],
+    expression_ast.Operator.GE: [("slt", "a0", "a", "b"), ("xori", "a0", "a0", "1")],
+    expression_ast.Operator.EQ: [("sub", "a0", "a", "b"), ("seqz", "a0", "a0")],
+    expression_ast.Operator.NE: [("sub", "a0", "a", "b"), ("snez", "a0", "a0")],
+}
+
+# The branch taken when each comparison of a with b holds
+BRANCHES = {
+    expression_ast.Operator.LT: ("blt", "a", "b"),
+    expression_ast.Operator.LE: ("bge", "b", "a"),
+    expression_ast.Operator.GT: ("blt", "b", "a"),
+    expression_ast.Operator.GE: ("bge", "a", "b"),
+    expression_ast.Operator.EQ: ("beq", "a", "b"),
+    expression_ast.Operator.NE: ("bne", "a", "b"),
+}
+# The comparison that holds exactly when each one does not
+NEGATED = {
+    expression_ast.Operator.LT: expression_ast.Operator.GE,
+    expression_ast.Operator.GE: expression_ast.Operator.LT,
+    expression_ast.Operator.LE: expression_ast.Operator.GT,
+    expression_ast.Operator.GT: expression_ast.Operator.LE,
+    expression_ast.Operator.EQ: expression_ast.Operator.NE,
+    expression_ast.Operator.NE: expression_ast.Operator.EQ,
+}
+
+# The RISC-V ABI keeps sp a multiple of this many bytes
+STACK_ALIGNMENT = 16
+
+# Placeholder in a function body for the code that pops its frame, whose size is only
+# known once the body has been generated
+POP_FRAME = "    # pop frame"
+
+# Effects of evaluating an expression, as bits
+CALLS = 1   # runs a function, which may write globals and fields
+IMPURE = 2  # calls, reads input or allocates
+
+def aligned(size):
+    # size in bytes rounded up to a multiple of STACK_ALIGNMENT
+    return -(-size // STACK_ALIGNMENT) * STACK_ALIGNMENT
 
 class CodeGenVisitor(mini_ast.ASTVisitor):
+    # Expects an AST that StaticSemanticASTVisitor has checked without errors:
+    # variables, field offsets and struct sizes come from its annotations.
+    #
+    # Every expression leaves its value in a0. A binary operation holds the
+    # operand it evaluates first in a temporary while it evaluates the other;
+    # temporaries nest like a stack, in TEMP_REGISTERS and then in frame slots
+    # below the variables, with t0 as scratch for reloading them. Operands are
+    # ordered by Sethi-Ullman number when that cannot change what the program
+    # does, and the temporaries in registers are saved to their slots around
+    # calls, since the callee may overwrite every t register.
+    #
+    # A call whose value is returned is a tail call and reuses the frame: a
+    # call of the function itself stores the arguments in the parameters'
+    # slots and jumps back to the start of the body, and a call of another
+    # function pops the frame and jumps to it, as long as its stack arguments
+    # fit where the current function's own arrived.
+    #
+    # Arguments are computed straight into a0-a7 and their outgoing stack
+    # slots; one is held in a temporary only while a later argument could
+    # overwrite it, because that one calls something or because the argument
+    # is bound for a0. A function that calls nothing (no library routine
+    # either) keeps its first eight parameters in argument registers instead
+    # of its frame, the first moved out of a0 when a register is free.
+    #
+    # Frames hold only what needs a slot and are rounded up to STACK_ALIGNMENT
+    # bytes. A function that calls nothing saves neither ra nor fp and
+    # addresses its slots from sp, which never moves inside it; it has no
+    # frame at all when nothing spills. Other functions save ra, and save and
+    # set up fp only when they have slots or stack arguments. frames records
+    # the layout of every function, for mini_compiler.py --stats.
     def __init__(self):
         self.output = []
         self.label_counter = 0
-        self.local_offset_map = {}
-        self.local_type_map = {}
-        self.global_type_map = {}
-        self.current_offset = 0
         self.current_function = None
-        self.temp_reg_counter = 0
-        self.struct_field_offsets = {}
-        self.struct_field_types = {}
-        self.struct_sizes = {}
-
-    def emit(self, instruction):
-        self.output.append(instruction)
+        self.temps = []         # register of each live temporary, None once it is in its slot
+        self.num_variables = 0  # frame slots of the parameters and locals
+        self.slots = {}         # frame slot of each parameter and local that has one, by index
+        self.leaf = False       # whether the current function calls nothing
+        self.num_params = 0
+        self.homes = {}         # register of each parameter kept out of the frame, by index
+        self.restarted = False  # whether the current function tail calls itself
+        self.temp_slots = 0     # frame slots used by temporaries in the current function
+        self.labels = {}        # expression -> (Sethi-Ullman number, effects), per function
+        self.frame_size = 0
+        self.saved = []         # registers the current function saves at the top of its frame
+        self.frames = {}        # function name -> {statistic: count}
+
+    def emit(self, op, *operands, dead=()):
+        # dead lists the registers whose values the code that follows never reads
+        self.output.append(Instr(op, *map(str, operands), dead=dead))
+
+    def emit_label(self, name, spaced=False):
+        self.output.append(Label(name, spaced))
+
+    def emit_line(self, text):
+        self.output.append(text)
 
     def peephole_optimize(self, instructions):
-        optimized = []
-        i = 0
-        while i < len(instructions):
-            curr = instructions[i].strip()
-            next_instr = instructions[i + 1].strip() if i + 1 < len(instructions) else ""
-            
-            mv_same = re.match(r'mv\s+(\w+),\s+(\w+)$', curr)
-            if mv_same and mv_same.group(1) == mv_same.group(2):
-                i += 1
-                continue
-            
-            j_match = re.match(r'j\s+(\w+)$', curr)
-            label_match = re.match(r'(\w+):$', next_instr)
-            if j_match and label_match and j_match.group(1) == label_match.group(1):
-                i += 1
-                continue
-            
-            sw_match = re.match(r'sw\s+(\w+),\s+(-?\d+\(\w+\))$', curr)
-            lw_match = re.match(r'lw\s+(\w+),\s+(-?\d+\(\w+\))$', next_instr)
-            if sw_match and lw_match:
-                if sw_match.group(1) == lw_match.group(1) and sw_match.group(2) == lw_match.group(2):
-                    optimized.append(instructions[i])
-                    i += 2
-                    continue
-
-            optimized.append(instructions[i])
-            i += 1
-        
-        return optimized
-
-    def get_temp_reg(self):
-        regs = ['t0', 't1', 't2', 't3', 't4', 't5', 't6']
-        reg = regs[self.temp_reg_counter % len(regs)]
-        self.temp_reg_counter += 1
-        return reg
-
-    def release_temp_reg(self):
-        self.temp_reg_counter -= 1
+        return peephole_optimize(instructions)
+
+    def temp_slot(self, depth):
+        self.temp_slots = max(self.temp_slots, depth + 1)
+        return self.slot_address(self.num_variables + depth)
+
+    def push_temp(self):
+        # Holds the value in a0 as the innermost temporary
+        depth = len(self.temps)
+        if depth < len(TEMP_REGISTERS):
+            register = TEMP_REGISTERS[depth]
+            self.emit("mv", register, "a0")
+        else:
+            register = None
+            self.emit("sw", "a0", self.temp_slot(depth))
+        self.temps.append(register)
+
+    def pop_temp(self):
+        # Releases the innermost temporary and returns a register holding it
+        register = self.temps.pop()
+        if register is None:
+            self.emit("lw", "t0", self.temp_slot(len(self.temps)))
+            return "t0"
+        return register
+
+    def save_temps(self):
+        # Before a call: moves the temporaries in registers to their slots and returns
+        # them for restore_temps; calls nested in the arguments find nothing to save
+        saved = []
+        for depth, register in enumerate(self.temps):
+            if register is not None:
+                self.emit("sw", register, self.temp_slot(depth))
+                self.temps[depth] = None
+                saved.append((depth, register))
+        return saved
+
+    def restore_temps(self, saved):
+        for depth, register in saved:
+            self.emit("lw", register, self.temp_slot(depth))
+            self.temps[depth] = register
+
+    def label(self, expression):
+        # (Sethi-Ullman number, effects) of expression: the number is how many
+        # temporaries evaluating it needs at once
+        label = self.labels.get(expression)
+        if label is not None:
+            return label
+        if isinstance(expression, expression_ast.BinaryExpression):
+            left_need, left_effects = self.label(expression.left)
+            right_need, right_effects = self.label(expression.right)
+            effects = left_effects | right_effects
+            if expression.operator in (expression_ast.Operator.AND, expression_ast.Operator.OR):
+                need = max(left_need, right_need)
+            elif isinstance(expression.right, expression_ast.IntegerExpression):
+                need = left_need
+            elif self.evaluate_right_first(expression):
+                need = max(right_need, left_need + 1)
+            else:
+                need = max(left_need, right_need + 1)
+        elif isinstance(expression, expression_ast.UnaryExpression):
+            need, effects = self.label(expression.operand)
+        elif isinstance(expression, expression_ast.DotExpression):
+            need, effects = self.label(expression.left)
+        elif isinstance(expression, expression_ast.InvocationExpression):
+            # Arguments held for later ones take a temporary each, at most all but the last
+            need = max((self.label(arg)[0] + i for i, arg in enumerate(expression.arguments)), default=0)
+            effects = CALLS | IMPURE
+        elif isinstance(expression, (expression_ast.ReadExpression, expression_ast.NewExpression)):
+            need, effects = 0, IMPURE
+        else:
+            need, effects = 0, 0
+        label = self.labels[expression] = (need, effects)
+        return label
+
+    def evaluate_right_first(self, binary_expression):
+        # The operand that needs more temporaries goes first, so its result is held
+        # while the cheaper one is computed. Swapping is only allowed when the left
+        # operand has no effects and the right one calls nothing that could change
+        # what the left one reads.
+        left_need, left_effects = self.label(binary_expression.left)
+        right_need, right_effects = self.label(binary_expression.right)
+        return right_need > left_need and not left_effects and not right_effects & CALLS
 
     def get_label(self, prefix="L"):
         label = f"{prefix}{self.label_counter}"
         self.label_counter += 1
         return label
 
-    def get_expr_type(self, expr):
-        if isinstance(expr, expression_ast.IdentifierExpression):
-            var_name = expr.id
-            if var_name in self.local_type_map:
-                return self.local_type_map[var_name]
-            if var_name in self.global_type_map:
-                return self.global_type_map[var_name]
-            return None
-        elif isinstance(expr, expression_ast.DotExpression):
-            left_type = self.get_expr_type(expr.left)
-            if left_type and left_type in self.struct_field_types:
-                field_name = expr.id.id
-                if field_name in self.struct_field_types[left_type]:
-                    return self.struct_field_types[left_type][field_name]
-            return None
-        elif isinstance(expr, expression_ast.NewExpression):
-            return expr.id.id
-        elif isinstance(expr, expression_ast.InvocationExpression):
-            func_name = expr.name.id
-            if func_name in self.function_return_types:
-                return self.function_return_types[func_name]
-            return None
-        return None
-
-    def get_lvalue_type(self, lvalue):
-        if isinstance(lvalue, lvalue_ast.LValueID):
-            var_name = lvalue.id.id
-            if var_name in self.local_type_map:
-                return self.local_type_map[var_name]
-            if var_name in self.global_type_map:
-                return self.global_type_map[var_name]
-            return None
-        elif isinstance(lvalue, lvalue_ast.LValueDot):
-            left_type = self.get_lvalue_type(lvalue.left)
-            if left_type and left_type in self.struct_field_types:
-                field_name = lvalue.id.id
-                if field_name in self.struct_field_types[left_type]:
-                    return self.struct_field_types[left_type][field_name]
-            return None
-        return None
-
-    def visit_program(self, program: program_ast.Program):
-        self.emit(".globl main")
-        self.emit(".import berkeley_utils.s")
-        self.emit(".import read_int.s")
+    def frame_offset(self, slot):
+        # fp-relative home of a frame slot: parameters, then locals, then temporaries, below the saved ra and fp
+        return -12 - 4 * slot
+
+    def slot_address(self, slot):
+        if self.leaf:
+            return f"{4 * slot}(sp)"
+        return f"{self.frame_offset(slot)}(fp)"
+
+    def load_variable(self, identifier):
+        # Loads the variable bound to identifier into a0
+        binding = identifier.binding
+        if binding.is_global:
+            self.emit("la", "a0", binding.name)
+            self.emit("lw", "a0", "0(a0)")
+        elif binding.index in self.homes:
+            self.emit("mv", "a0", self.homes[binding.index])
+        else:
+            self.emit("lw", "a0", self.slot_address(self.slots[binding.index]))
 
-        self.function_return_types = {}
-        for func in program.functions:
-            func_name = func.name.id
-            ret_type = func.ret_type
-            if isinstance(ret_type, type_ast.StructType):
-                self.function_return_types[func_name] = ret_type.name.id
-            else:
-                self.function_return_types[func_name] = None
+    def store_local(self, index, register, dead=()):
+        # Stores register to the parameter or local in frame slot index
+        if index in self.homes:
+            self.emit("mv", self.homes[index], register, dead=dead)
+        else:
+            self.emit("sw", register, self.slot_address(self.slots[index]), dead=dead)
+
+    def makes_calls(self, statement):
+        # Whether running statement may call a function or a library routine
+        if isinstance(statement, statement_ast.BlockStatement):
+            return any(self.makes_calls(s) for s in statement.statements)
+        if isinstance(statement, statement_ast.ConditionalStatement):
+            return self.label(statement.guard)[1] != 0 or self.makes_calls(statement.then_block) or \
+                statement.else_block is not None and self.makes_calls(statement.else_block)
+        if isinstance(statement, statement_ast.WhileStatement):
+            return self.label(statement.guard)[1] != 0 or self.makes_calls(statement.body)
+        if isinstance(statement, statement_ast.AssignmentStatement):
+            return self.label(statement.source)[1] != 0
+        if isinstance(statement, statement_ast.ReturnStatement):
+            return statement.expression is not None and self.label(statement.expression)[1] != 0
+        # print, delete and invocation statements call; an empty return does not
+        return not isinstance(statement, statement_ast.ReturnEmptyStatement)
 
-        if hasattr(program, 'types') and program.types:
-            for type_decl in program.types:
-                type_decl.accept(self)
-        elif hasattr(program, 'type_declarations') and program.type_declarations:
-            for type_decl in program.type_declarations:
-                type_decl.accept(self)
+    def visit_program(self, program: program_ast.Program):
+        self.emit_line(".globl main")
+        self.emit_line(".import berkeley_utils.s")
+        self.emit_line(".import read_int.s")
 
-        self.emit("\n.data")
-        self.emit("input_file_ptr: .word")
+        self.emit_line("\n.data")
+        self.emit_line("input_file_ptr: .word")
 
         if program.declarations:
             for var in program.declarations:
                 var_name = var.name.id
-                self.emit(f"{var_name}: .word 0")
-                if isinstance(var.type, type_ast.StructType):
-                    self.global_type_map[var_name] = var.type.name.id
-                else:
-                    self.global_type_map[var_name] = None
+                self.emit_line(f"{var_name}: .word 0")
 
-        self.emit("\n.text")
+        self.emit_line("\n.text")
 
         for func in program.functions:
             func.accept(self)
 
         self.output = self.peephole_optimize(self.output)
-        return "\n".join(self.output)
+        return "\n".join(map(str, self.output))
 
     def visit_declaration(self, declaration: program_ast.Declaration):
         pass
 
     def visit_type_declaration(self, type_declaration: program_ast.TypeDeclaration):
-        struct_name = type_declaration.name.id
-        self.struct_field_offsets[struct_name] = {}
-        self.struct_field_types[struct_name] = {}
-        offset = 0
-        for field in type_declaration.fields:
-            field_name = field.name.id
-            self.struct_field_offsets[struct_name][field_name] = offset
-            if isinstance(field.type, type_ast.StructType):
-                self.struct_field_types[struct_name][field_name] = field.type.name.id
-            else:
-                self.struct_field_types[struct_name][field_name] = None
-            offset += 4
-        self.struct_sizes[struct_name] = offset
+        pass
 
     def visit_function(self, function: program_ast.Function):
-        self.temp_reg_counter = 0
         func_name = function.name.id
         self.current_function = func_name
+        num_locals = len(function.locals)
+        num_params = len(function.params)
+        self.num_params = num_params
+        self.restarted = False
+        self.temp_slots = 0
+        self.labels = {}
+        self.homes = {}
+        self.leaf = not any(self.makes_calls(statement) for statement in function.body)
+        if self.leaf:
+            self.homes = {i: f"a{i}" for i in range(1, min(num_params, 8))}
+            if 0 < num_params < 8:
+                self.homes[0] = f"a{num_params}"
+        variables = [i for i in range(num_params + num_locals) if i not in self.homes]
+        self.slots = {index: slot for slot, index in enumerate(variables)}
+        self.num_variables = len(self.slots)
+
+        # The frame size depends on the temporaries the body spills, so the body is generated first
+        function_start = len(self.output)
+        for statement in function.body:
+            statement.accept(self)
+        body = self.output[function_start:]
+        del self.output[function_start:]
 
-        self.emit(f"\n{func_name}:")
+        self.emit_label(func_name, spaced=True)
 
         if func_name == "main":
-            self.emit("    lw t0, 4(a1)")
-            self.emit("    la t1, input_file_ptr")
-            self.emit("    sw t0, 0(t1)")
-
-        num_locals = len(function.locals)
-        num_params = len(function.params)
-        total_stack_size = (num_locals + num_params) * 4 + 8
-
-        self.emit(f"    addi sp, sp, -{total_stack_size}")
-        self.emit(f"    sw ra, {total_stack_size - 4}(sp)")
-        self.emit(f"    sw fp, {total_stack_size - 8}(sp)")
-        self.emit(f"    addi fp, sp, {total_stack_size}")
-
-        self.local_offset_map = {}
-        self.local_type_map = {}
-        current_offset = -8
-
-        for i, param in enumerate(function.params):
-            param_name = param.name.id
-            current_offset -= 4
-            self.local_offset_map[param_name] = current_offset
-            if isinstance(param.type, type_ast.StructType):
-                self.local_type_map[param_name] = param.type.name.id
-            else:
-                self.local_type_map[param_name] = None
-            if i < 8:
-                self.emit(f"    sw a{i}, {current_offset}(fp)")
+            self.emit("lw", "t0", "4(a1)")
+            self.emit("la", "t1", "input_file_ptr")
+            self.emit("sw", "t0", "0(t1)")
+
+        slot_bytes = (self.num_variables + self.temp_slots) * 4
+        if self.leaf:
+            self.saved = []
+        elif slot_bytes > 0 or num_params > 8:
+            self.saved = ["ra", "fp"]
+        else:
+            self.saved = ["ra"]
+        self.frame_size = aligned(slot_bytes + 4 * len(self.saved))
+        self.frames[func_name] = {"bytes": self.frame_size, "variable slots": self.num_variables,
+                                  "temporary slots": self.temp_slots, "saved registers": len(self.saved),
+                                  "parameters in registers": len(self.homes)}
+
+        if self.frame_size > 0:
+            self.emit("addi", "sp", "sp", f"-{self.frame_size}")
+        for k, register in enumerate(self.saved):
+            self.emit("sw", register, f"{self.frame_size - 4 - 4 * k}(sp)")
+        if "fp" in self.saved:
+            self.emit("addi", "fp", "sp", self.frame_size)
+
+        for i in range(num_params):
+            if i in self.homes:
+                self.emit("mv", self.homes[i], f"a{i}")
+            elif i < 8:
+                self.emit("sw", f"a{i}", self.slot_address(self.slots[i]))
             else:
-                caller_stack_offset = (i - 8) * 4
-                self.emit(f"    lw t0, {caller_stack_offset}(fp)")
-                self.emit(f"    sw t0, {current_offset}(fp)")
-
-        for local in function.locals:
-            local_name = local.name.id
-            current_offset -= 4
-            self.local_offset_map[local_name] = current_offset
-            if isinstance(local.type, type_ast.StructType):
-                self.local_type_map[local_name] = local.type.name.id
+                if self.leaf:
+                    self.emit("lw", "t0", f"{self.frame_size + (i - 8) * 4}(sp)")
+                else:
+                    self.emit("lw", "t0", f"{(i - 8) * 4}(fp)")
+                self.emit("sw", "t0", self.slot_address(self.slots[i]))
+        if self.restarted:
+            self.emit_label(f"{func_name}_body")
+
+        for line in body:
+            if line is POP_FRAME:
+                self.pop_frame()
             else:
-                self.local_type_map[local_name] = None
-
-        for statement in function.body:
-            statement.accept(self)
+                self.output.append(line)
 
-        self.emit(f"\n{func_name}_epilog:")
-        self.emit(f"    lw ra, {total_stack_size - 4}(sp)")
-        self.emit(f"    lw fp, {total_stack_size - 8}(sp)")
-        self.emit(f"    addi sp, sp, {total_stack_size}")
+        self.emit_label(f"{func_name}_epilog", spaced=True)
+        self.pop_frame()
         if func_name == "main":
-            self.emit("    li a0, 0")
-            self.emit("    jal zero, exit")
+            self.emit("li", "a0", "0")
+            self.emit("jal", "zero", "exit")
         else:
-            self.emit("    ret")
+            self.emit("ret")
+
+    def pop_frame(self):
+        for k, register in enumerate(self.saved):
+            self.emit("lw", register, f"{self.frame_size - 4 - 4 * k}(sp)")
+        if self.frame_size > 0:
+            self.emit("addi", "sp", "sp", self.frame_size)
 
     def visit_int_type(self, int_type: type_ast.IntType):
         pass
@@ -241,294 +371,304 @@ class CodeGenVisitor(mini_ast.ASTVisitor):
         pass
 
     def visit_assignment_statement(self, assignment_statement: statement_ast.AssignmentStatement):
-        self.temp_reg_counter = 0
         target = assignment_statement.target
 
         if isinstance(target, lvalue_ast.LValueID):
             assignment_statement.source.accept(self)
-            var_name = target.id.id
-            offset = self.local_offset_map.get(var_name)
-            if offset is not None:
-                self.emit(f"    sw a0, {offset}(fp)")
+            binding = target.id.binding
+            if binding.is_global:
+                self.emit("la", "t0", binding.name)
+                self.emit("sw", "a0", "0(t0)")
             else:
-                self.emit(f"    la t0, {var_name}")
-                self.emit(f"    sw a0, 0(t0)")
+                self.store_local(binding.index, "a0")
         elif isinstance(target, lvalue_ast.LValueDot):
             self.compute_lvalue_address(target)
-            temp_addr = self.get_temp_reg()
-            self.emit(f"    mv {temp_addr}, a0")
+            self.push_temp()
             assignment_statement.source.accept(self)
-            self.emit(f"    sw a0, 0({temp_addr})")
-            self.release_temp_reg()
+            address = self.pop_temp()
+            self.emit("sw", "a0", f"0({address})", dead=(address,))
 
     def compute_lvalue_address(self, lvalue):
         if isinstance(lvalue, lvalue_ast.LValueID):
-            var_name = lvalue.id.id
-            offset = self.local_offset_map.get(var_name)
-            if offset is not None:
-                self.emit(f"    lw a0, {offset}(fp)")
-            else:
-                self.emit(f"    la a0, {var_name}")
-                self.emit(f"    lw a0, 0(a0)")
+            self.load_variable(lvalue.id)
         elif isinstance(lvalue, lvalue_ast.LValueDot):
             if isinstance(lvalue.left, lvalue_ast.LValueID):
-                var_name = lvalue.left.id.id
-                offset = self.local_offset_map.get(var_name)
-                if offset is not None:
-                    self.emit(f"    lw a0, {offset}(fp)")
-                else:
-                    self.emit(f"    la a0, {var_name}")
-                    self.emit(f"    lw a0, 0(a0)")
+                self.load_variable(lvalue.left.id)
             else:
                 self.compute_lvalue_address(lvalue.left)
-                self.emit(f"    lw a0, 0(a0)")
-            left_type = self.get_lvalue_type(lvalue.left)
-            field_name = lvalue.id.id
-            if left_type and left_type in self.struct_field_offsets:
-                field_offset = self.struct_field_offsets[left_type].get(field_name, 0)
-                if field_offset != 0:
-                    self.emit(f"    addi a0, a0, {field_offset}")
-
-    def get_struct_type(self, lvalue):
-        return self.get_lvalue_type(lvalue)
+                self.emit("lw", "a0", "0(a0)")
+            if lvalue.offset != 0:
+                self.emit("addi", "a0", "a0", lvalue.offset)
 
     def visit_block_statement(self, block_statement: statement_ast.BlockStatement):
         for statement in block_statement.statements:
             statement.accept(self)
 
+    def branch(self, expression, label, when):
+        # Jumps to label if the boolean expression evaluates to when and falls through
+        # otherwise. Comparisons become a single compare-and-branch and && and || jump
+        # on each operand in turn, so no boolean is computed on the way.
+        if isinstance(expression, (expression_ast.TrueExpression, expression_ast.FalseExpression)):
+            if isinstance(expression, expression_ast.TrueExpression) == when:
+                self.emit("j", label)
+            return
+        if isinstance(expression, expression_ast.UnaryExpression) \
+                and expression.operator == expression_ast.Operator.NOT:
+            self.branch(expression.operand, label, not when)
+            return
+        if isinstance(expression, expression_ast.BinaryExpression):
+            op = expression.operator
+            if op in (expression_ast.Operator.AND, expression_ast.Operator.OR):
+                # Either operand decides the whole when it is false for && and true for ||
+                decides = op == expression_ast.Operator.OR
+                if when == decides:
+                    self.branch(expression.left, label, when)
+                    self.branch(expression.right, label, when)
+                else:
+                    decided = self.get_label("and_false" if op == expression_ast.Operator.AND else "or_true")
+                    self.branch(expression.left, decided, decides)
+                    self.branch(expression.right, label, when)
+                    self.emit_label(decided)
+                return
+            if op in BRANCHES:
+                left, right = self.evaluate_operands(expression)
+                name, a, b = BRANCHES[op if when else NEGATED[op]]
+                registers = {"a": left, "b": right}
+                self.emit(name, registers[a], registers[b], label, dead=self.operand_temps(left, right))
+                return
+        expression.accept(self)
+        self.emit("bnez" if when else "beqz", "a0", label, dead=("a0",))
+
     def visit_conditional_statement(self, conditional_statement: statement_ast.ConditionalStatement):
-        self.temp_reg_counter = 0
         else_label = self.get_label("else")
         end_label = self.get_label("endif")
 
-        conditional_statement.guard.accept(self)
-
-        self.emit(f"    beqz a0, {else_label}")
+        self.branch(conditional_statement.guard, else_label, False)
 
         conditional_statement.then_block.accept(self)
 
-        self.emit(f"    j {end_label}")
+        self.emit("j", end_label)
 
-        self.emit(f"{else_label}:")
+        self.emit_label(else_label)
 
         if conditional_statement.else_block:
             conditional_statement.else_block.accept(self)
 
-        self.emit(f"{end_label}:")
+        self.emit_label(end_label)
 
     def visit_while_statement(self, while_statement: statement_ast.WhileStatement):
-        self.temp_reg_counter = 0
+        # The guard is tested at the bottom, so each iteration takes one branch back
         loop_start = self.get_label("while_start")
-        loop_end = self.get_label("while_end")
+        loop_test = self.get_label("while_test")
 
-        self.emit(f"{loop_start}:")
+        self.emit("j", loop_test)
 
-        while_statement.guard.accept(self)
-
-        self.emit(f"    beqz a0, {loop_end}")
+        self.emit_label(loop_start)
 
         while_statement.body.accept(self)
 
-        self.emit(f"    j {loop_start}")
+        self.emit_label(loop_test)
 
-        self.emit(f"{loop_end}:")
+        self.branch(while_statement.guard, loop_start, True)
 
     def visit_delete_statement(self, delete_statement: statement_ast.DeleteStatement):
-        self.temp_reg_counter = 0
         delete_statement.expression.accept(self)
-        self.emit("    jal ra, free")
+        self.emit("jal", "ra", "free")
 
     def visit_invocation_statement(self, invocation_statement: statement_ast.InvocationStatement):
         invocation_statement.expression.accept(self)
 
     def visit_println_statement(self, println_statement: statement_ast.PrintLnStatement):
-        self.temp_reg_counter = 0
         println_statement.expression.accept(self)
-        self.emit("    jal ra, print_int")
-        self.emit("    li a0, 10")
-        self.emit("    jal ra, print_char")
+        self.emit("jal", "ra", "print_int")
+        self.emit("li", "a0", "10")
+        self.emit("jal", "ra", "print_char")
 
     def visit_print_statement(self, print_statement: statement_ast.PrintStatement):
-        self.temp_reg_counter = 0
         print_statement.expression.accept(self)
-        self.emit("    jal ra, print_int")
+        self.emit("jal", "ra", "print_int")
 
     def visit_return_empty_statement(self, return_empty_statement: statement_ast.ReturnEmptyStatement):
-        self.emit(f"    j {self.current_function}_epilog")
+        self.emit("j", f"{self.current_function}_epilog")
 
     def visit_return_statement(self, return_statement: statement_ast.ReturnStatement):
-        self.temp_reg_counter = 0
+        expression = return_statement.expression
+        if isinstance(expression, expression_ast.InvocationExpression) and self.tail_call(expression):
+            return
         if return_statement.expression:
             return_statement.expression.accept(self)
-        self.emit(f"    j {self.current_function}_epilog")
+        self.emit("j", f"{self.current_function}_epilog")
+
+    def tail_call(self, invocation_expression: expression_ast.InvocationExpression):
+        # Emits a returned call as a jump that reuses the frame; returns False, emitting
+        # nothing, when the call needs a frame of its own. main's epilogue exits, so its
+        # returned calls are never tail calls.
+        func_name = invocation_expression.name.id
+        args = invocation_expression.arguments
+        recursive = func_name == self.current_function
+        if self.current_function == "main" or \
+                not recursive and len(args) - 8 > max(0, self.num_params - 8):
+            return False
+
+        def place(i, register, dead):
+            if recursive:
+                self.store_local(i, register, dead)
+            elif i < 8:
+                self.emit("mv", f"a{i}", register, dead=dead)
+            else:
+                self.emit("sw", register, f"{(i - 8) * 4}(fp)", dead=dead)
+        # The new values of the parameters are all computed before any is stored, since they may read them
+        self.pass_arguments(args, place, hold=recursive)
+
+        if recursive:
+            self.restarted = True
+            self.emit("j", f"{func_name}_body")
+        else:
+            self.output.append(POP_FRAME)
+            self.emit("j", func_name)
+        return True
 
     def visit_dot_expression(self, dot_expression: expression_ast.DotExpression):
         dot_expression.left.accept(self)
-        left_type = self.get_expr_type(dot_expression.left)
-        field_name = dot_expression.id.id
-        if left_type and left_type in self.struct_field_offsets:
-            field_offset = self.struct_field_offsets[left_type].get(field_name, 0)
-            self.emit(f"    lw a0, {field_offset}(a0)")
-        else:
-            self.emit(f"    lw a0, 0(a0)")
+        self.emit("lw", "a0", f"{dot_expression.offset}(a0)")
         return "a0"
 
-    def get_expression_struct_type(self, expr):
-        return self.get_expr_type(expr)
-
     def visit_false_expression(self, false_expression: expression_ast.FalseExpression):
-        self.emit("    li a0, 0")
+        self.emit("li", "a0", "0")
         return "a0"
 
     def visit_true_expression(self, true_expression: expression_ast.TrueExpression):
-        self.emit("    li a0, 1")
+        self.emit("li", "a0", "1")
         return "a0"
 
     def visit_identifier_expression(self, identifier_expression: expression_ast.IdentifierExpression):
-        var_name = identifier_expression.id
-        offset = self.local_offset_map.get(var_name)
-        if offset is not None:
-            self.emit(f"    lw a0, {offset}(fp)")
-        else:
-            self.emit(f"    la a0, {var_name}")
-            self.emit(f"    lw a0, 0(a0)")
+        self.load_variable(identifier_expression)
         return "a0"
 
     def visit_new_expression(self, new_expression: expression_ast.NewExpression):
-        struct_name = new_expression.id.id
-        size = self.struct_sizes.get(struct_name, 4)
-        self.emit(f"    li a0, {size}")
-        self.emit("    jal ra, malloc")
+        saved = self.save_temps()
+        self.emit("li", "a0", new_expression.id.binding.size)
+        self.emit("jal", "ra", "malloc")
+        self.restore_temps(saved)
         return "a0"
 
     def visit_null_expression(self, null_expression: expression_ast.NullExpression):
-        self.emit("    li a0, 0")
+        self.emit("li", "a0", "0")
         return "a0"
 
     def visit_read_expression(self, read_expression: expression_ast.ReadExpression):
-        self.emit("    la a0, input_file_ptr")
-        self.emit("    lw a0, 0(a0)")
-        self.emit("    jal ra, read_int")
+        saved = self.save_temps()
+        self.emit("la", "a0", "input_file_ptr")
+        self.emit("lw", "a0", "0(a0)")
+        self.emit("jal", "ra", "read_int")
+        self.restore_temps(saved)
         return "a0"
 
     def visit_integer_expression(self, integer_expression: expression_ast.IntegerExpression):
-        self.emit(f"    li a0, {integer_expression.value}")
+        self.emit("li", "a0", integer_expression.value)
         return "a0"
 
     def visit_invocation_expression(self, invocation_expression: expression_ast.InvocationExpression):
         func_name = invocation_expression.name.id
         args = invocation_expression.arguments
         num_args = len(args)
+        saved = self.save_temps()
 
-        if num_args == 0:
-            self.emit(f"    jal ra, {func_name}")
-            return "a0"
+        # The outgoing stack arguments sit at the bottom of an aligned block
+        outgoing = aligned(max(0, num_args - 8) * 4)
+        if outgoing > 0:
+            self.emit("addi", "sp", "sp", f"-{outgoing}")
 
-        num_stack_args = max(0, num_args - 8)
-        
-        self.emit(f"    addi sp, sp, -{num_args * 4}")
-        
-        for i, arg in enumerate(args):
-            arg.accept(self)
-            offset = (num_args - 1 - i) * 4
-            self.emit(f"    sw a0, {offset}(sp)")
-
-        for i in range(min(num_args, 8)):
-            offset = (num_args - 1 - i) * 4
-            self.emit(f"    lw a{i}, {offset}(sp)")
-
-        if num_stack_args > 0:
-            for i in range(num_stack_args):
-                src_offset = (num_stack_args - 1 - i) * 4
-                dst_offset = i * 4
-                if src_offset != dst_offset:
-                    self.emit(f"    lw t0, {src_offset}(sp)")
-                    self.emit(f"    sw t0, {dst_offset}(sp)")
-            cleanup = (num_args - num_stack_args) * 4
-            self.emit(f"    addi sp, sp, {cleanup}")
-        else:
-            self.emit(f"    addi sp, sp, {num_args * 4}")
+        def place(i, register, dead):
+            if i < 8:
+                self.emit("mv", f"a{i}", register, dead=dead)
+            else:
+                self.emit("sw", register, f"{(i - 8) * 4}(sp)", dead=dead)
+        self.pass_arguments(args, place)
 
-        self.emit(f"    jal ra, {func_name}")
+        self.emit("jal", "ra", func_name)
 
-        if num_stack_args > 0:
-            self.emit(f"    addi sp, sp, {num_stack_args * 4}")
+        if outgoing > 0:
+            self.emit("addi", "sp", "sp", outgoing)
 
+        self.restore_temps(saved)
         return "a0"
 
+    def pass_arguments(self, args, place, hold=False):
+        # Computes args in order, calling place(i, register, dead) to pass each, with dead
+        # naming the temporary the argument was held in, if any. An argument is held
+        # in a temporary until all are computed when hold is set, when it is bound for a0, or
+        # when a later argument calls something, which could overwrite the argument registers.
+        effects = [self.label(arg)[1] for arg in args]
+        held = []
+        for i, arg in enumerate(args):
+            arg.accept(self)
+            if i < len(args) - 1 and (hold or i == 0 or any(effects[i + 1:])):
+                self.push_temp()
+                held.append(i)
+            else:
+                place(i, "a0", ())
+        for i in reversed(held):
+            register = self.pop_temp()
+            place(i, register, (register,))
+
     def visit_unary_expression(self, unary_expression: expression_ast.UnaryExpression):
         unary_expression.operand.accept(self)
         op = unary_expression.operator
 
         if op == expression_ast.Operator.MINUS:
-            self.emit("    neg a0, a0")
+            self.emit("neg", "a0", "a0")
         elif op == expression_ast.Operator.NOT:
-            self.emit("    seqz a0, a0")
+            self.emit("seqz", "a0", "a0")
 
         return "a0"
 
     def visit_binary_expression(self, binary_expression: expression_ast.BinaryExpression):
         op = binary_expression.operator
 
-        if op == expression_ast.Operator.AND:
-            false_label = self.get_label("and_false")
-            end_label = self.get_label("and_end")
-            binary_expression.left.accept(self)
-            self.emit(f"    beqz a0, {false_label}")
+        if op in (expression_ast.Operator.AND, expression_ast.Operator.OR):
+            # Booleans are 0 or 1, so unless the left operand decides the value it is the right one's
+            decides = op == expression_ast.Operator.OR
+            decided = self.get_label("and_false" if op == expression_ast.Operator.AND else "or_true")
+            end_label = self.get_label("and_end" if op == expression_ast.Operator.AND else "or_end")
+            self.branch(binary_expression.left, decided, decides)
             binary_expression.right.accept(self)
-            self.emit(f"    snez a0, a0")
-            self.emit(f"    j {end_label}")
-            self.emit(f"{false_label}:")
-            self.emit("    li a0, 0")
-            self.emit(f"{end_label}:")
+            self.emit("j", end_label)
+            self.emit_label(decided)
+            self.emit("li", "a0", str(int(decides)))
+            self.emit_label(end_label)
             return "a0"
 
-        if op == expression_ast.Operator.OR:
-            true_label = self.get_label("or_true")
-            end_label = self.get_label("or_end")
+        left, right = self.evaluate_operands(binary_expression)
+        dead = self.operand_temps(left, right)
+        for op, *operands in BINARY_OPERATIONS[op]:
+            self.emit(op, *({"a": left, "b": right}.get(operand, operand) for operand in operands), dead=dead)
+        return "a0"
+
+    def evaluate_operands(self, binary_expression):
+        # Computes both operands and returns the registers holding the left and the right one.
+        # A constant right operand takes no temporary: it is loaded into t0, or is the zero register.
+        if isinstance(binary_expression.right, expression_ast.IntegerExpression):
             binary_expression.left.accept(self)
-            self.emit(f"    bnez a0, {true_label}")
+            if int(binary_expression.right.value) == 0:
+                return "a0", "zero"
+            self.emit("li", "t0", binary_expression.right.value)
+            return "a0", "t0"
+        if self.evaluate_right_first(binary_expression):
             binary_expression.right.accept(self)
-            self.emit(f"    snez a0, a0")
-            self.emit(f"    j {end_label}")
-            self.emit(f"{true_label}:")
-            self.emit("    li a0, 1")
-            self.emit(f"{end_label}:")
-            return "a0"
-
+            self.push_temp()
+            binary_expression.left.accept(self)
+            return "a0", self.pop_temp()
         binary_expression.left.accept(self)
-        temp_reg = self.get_temp_reg()
-        self.emit(f"    mv {temp_reg}, a0")
-
+        self.push_temp()
         binary_expression.right.accept(self)
+        return self.pop_temp(), "a0"
 
-        if op == expression_ast.Operator.PLUS:
-            self.emit(f"    add a0, {temp_reg}, a0")
-        elif op == expression_ast.Operator.MINUS:
-            self.emit(f"    sub a0, {temp_reg}, a0")
-        elif op == expression_ast.Operator.TIMES:
-            self.emit(f"    mul a0, {temp_reg}, a0")
-        elif op == expression_ast.Operator.DIVIDE:
-            self.emit(f"    div a0, {temp_reg}, a0")
-        elif op == expression_ast.Operator.LT:
-            self.emit(f"    slt a0, {temp_reg}, a0")
-        elif op == expression_ast.Operator.LE:
-            self.emit(f"    slt a0, a0, {temp_reg}")
-            self.emit("    xori a0, a0, 1")
-        elif op == expression_ast.Operator.GT:
-            self.emit(f"    slt a0, a0, {temp_reg}")
-        elif op == expression_ast.Operator.GE:
-            self.emit(f"    slt a0, {temp_reg}, a0")
-            self.emit("    xori a0, a0, 1")
-        elif op == expression_ast.Operator.EQ:
-            self.emit(f"    sub a0, {temp_reg}, a0")
-            self.emit("    seqz a0, a0")
-        elif op == expression_ast.Operator.NE:
-            self.emit(f"    sub a0, {temp_reg}, a0")
-            self.emit("    snez a0, a0")
-
-        self.release_temp_reg()
-        return "a0"
+    @staticmethod
+    def operand_temps(left, right):
+        # The temporary holding an operand is free once the operation has read it
+        temp = right if left == "a0" else left
+        return (temp,) if temp != "zero" else ()
 
     def visit_lvalue_dot(self, lvalue_dot: lvalue_ast.LValueDot):
         pass
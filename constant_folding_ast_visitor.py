@@ -0,0 +1,304 @@
+from miniast import mini_ast, program_ast, type_ast, statement_ast, expression_ast, lvalue_ast
+from int32 import divide32, wrap32
+
+Operator = expression_ast.Operator
+LITERALS = (expression_ast.IntegerExpression, expression_ast.TrueExpression, expression_ast.FalseExpression)
+
+
+# Folding of operators whose operands are both constants
+FOLD_BINARY = {
+    Operator.PLUS: lambda a, b: wrap32(a + b),
+    Operator.MINUS: lambda a, b: wrap32(a - b),
+    Operator.TIMES: lambda a, b: wrap32(a * b),
+    Operator.DIVIDE: divide32,
+    Operator.LT: lambda a, b: a < b,
+    Operator.LE: lambda a, b: a <= b,
+    Operator.GT: lambda a, b: a > b,
+    Operator.GE: lambda a, b: a >= b,
+    Operator.EQ: lambda a, b: a == b,
+    Operator.NE: lambda a, b: a != b,
+    Operator.AND: lambda a, b: a and b,
+    Operator.OR: lambda a, b: a or b,
+}
+
+
+class ConstantFoldingASTVisitor(mini_ast.ASTVisitor):
+    """Folds constant subexpressions and simplifies identities in a checked AST.
+
+    Integers follow RISC-V semantics: 32-bit wraparound and the div rules of
+    divide32. Besides literal arithmetic, x+0, x-0, x*1, x/1, --x, !!b and
+    the short-circuit operators with a constant operand are simplified, and
+    x*0 and b&&false become constants when x or b has no effects and loads
+    no field, which could fail on null. An if with a constant guard is
+    replaced by the branch it takes, a while whose guard is false is
+    removed, and statements after one that never completes (a return, an if
+    whose branches both return, a while(true)) are dropped.
+
+    Expression and statement visits return the node to use in place of the
+    visited one (None for a statement that disappears); new nodes get the
+    type of the node they replace, so the AST stays annotated for the code
+    generators.
+    """
+
+    def __init__(self):
+        self.rewrites = 0
+
+    def fold(self, program: program_ast.Program) -> int:
+        # Folds program in place and returns the number of rewritten nodes
+        self.rewrites = 0
+        program.accept(self)
+        return self.rewrites
+
+    # ---- helpers ----
+
+    def constant(self, expression):
+        # The int or bool value of a literal, or None
+        if isinstance(expression, expression_ast.IntegerExpression):
+            return wrap32(int(expression.value))
+        if isinstance(expression, expression_ast.TrueExpression):
+            return True
+        if isinstance(expression, expression_ast.FalseExpression):
+            return False
+        return None
+
+    def literal(self, value, replaced: expression_ast.Expression):
+        self.rewrites += 1
+        if isinstance(value, bool):
+            cls = expression_ast.TrueExpression if value else expression_ast.FalseExpression
+            node = cls(replaced.linenum)
+        else:
+            node = expression_ast.IntegerExpression(replaced.linenum, str(value))
+        node.type = replaced.type
+        return node
+
+    def negation(self, operand, replaced: expression_ast.Expression):
+        self.rewrites += 1
+        node = expression_ast.UnaryExpression(replaced.linenum, Operator.MINUS, operand)
+        node.type = replaced.type
+        return node
+
+    def simplified(self, expression):
+        self.rewrites += 1
+        return expression
+
+    def pure(self, expression) -> bool:
+        # Whether evaluating expression has no effects: no calls, reads or allocation, and no
+        # field loads, which fail on null
+        if isinstance(expression, (expression_ast.InvocationExpression, expression_ast.ReadExpression,
+                                   expression_ast.NewExpression, expression_ast.DotExpression)):
+            return False
+        if isinstance(expression, expression_ast.BinaryExpression):
+            return self.pure(expression.left) and self.pure(expression.right)
+        if isinstance(expression, expression_ast.UnaryExpression):
+            return self.pure(expression.operand)
+        return True
+
+    # ---- program structure ----
+
+    def visit_program(self, program: program_ast.Program):
+        for function in program.functions:
+            function.accept(self)
+        return program
+
+    def visit_declaration(self, declaration: program_ast.Declaration):
+        return declaration
+
+    def visit_type_declaration(self, type_declaration: program_ast.TypeDeclaration):
+        return type_declaration
+
+    def visit_function(self, function: program_ast.Function):
+        function.body = self.fold_statements(function.body)
+        return function
+
+    def fold_statements(self, statements):
+        folded = []
+        for i, statement in enumerate(statements):
+            statement = statement.accept(self)
+            if statement is not None:
+                folded.append(statement)
+                if not self.completes(statement):
+                    self.rewrites += len(statements) - i - 1
+                    break
+        return folded
+
+    def completes(self, statement) -> bool:
+        # Whether control can reach the statement after a folded statement
+        if isinstance(statement, (statement_ast.ReturnStatement, statement_ast.ReturnEmptyStatement)):
+            return False
+        if isinstance(statement, statement_ast.BlockStatement):
+            return all(self.completes(s) for s in statement.statements)
+        if isinstance(statement, statement_ast.ConditionalStatement):
+            return (statement.else_block is None or self.completes(statement.then_block)
+                    or self.completes(statement.else_block))
+        if isinstance(statement, statement_ast.WhileStatement):
+            return self.constant(statement.guard) is not True
+        return True
+
+    def visit_int_type(self, int_type: type_ast.IntType):
+        return int_type
+
+    def visit_bool_type(self, bool_type: type_ast.BoolType):
+        return bool_type
+
+    def visit_struct_type(self, struct_type: type_ast.StructType):
+        return struct_type
+
+    def visit_return_type_real(self, return_type_real: type_ast.ReturnTypeReal):
+        return return_type_real
+
+    def visit_return_type_void(self, return_type_void: type_ast.ReturnTypeVoid):
+        return return_type_void
+
+    # ---- statements ----
+
+    def visit_assignment_statement(self, assignment_statement: statement_ast.AssignmentStatement):
+        assignment_statement.source = assignment_statement.source.accept(self)
+        return assignment_statement
+
+    def visit_block_statement(self, block_statement: statement_ast.BlockStatement):
+        block_statement.statements = self.fold_statements(block_statement.statements)
+        return block_statement
+
+    def visit_conditional_statement(self, conditional_statement: statement_ast.ConditionalStatement):
+        guard = conditional_statement.guard = conditional_statement.guard.accept(self)
+        then_block = conditional_statement.then_block.accept(self)
+        else_block = conditional_statement.else_block
+        if else_block is not None:
+            else_block = else_block.accept(self)
+        value = self.constant(guard)
+        if value is True:
+            return self.simplified(then_block)
+        if value is False:
+            return self.simplified(else_block)
+        conditional_statement.then_block = then_block
+        conditional_statement.else_block = else_block
+        return conditional_statement
+
+    def visit_while_statement(self, while_statement: statement_ast.WhileStatement):
+        guard = while_statement.guard = while_statement.guard.accept(self)
+        if self.constant(guard) is False:
+            return self.simplified(None)
+        body = while_statement.body.accept(self)
+        while_statement.body = body if body is not None else statement_ast.BlockStatement(while_statement.linenum, [])
+        return while_statement
+
+    def visit_delete_statement(self, delete_statement: statement_ast.DeleteStatement):
+        delete_statement.expression = delete_statement.expression.accept(self)
+        return delete_statement
+
+    def visit_invocation_statement(self, invocation_statement: statement_ast.InvocationStatement):
+        invocation_statement.expression = invocation_statement.expression.accept(self)
+        return invocation_statement
+
+    def visit_println_statement(self, println_statement: statement_ast.PrintLnStatement):
+        println_statement.expression = println_statement.expression.accept(self)
+        return println_statement
+
+    def visit_print_statement(self, print_statement: statement_ast.PrintStatement):
+        print_statement.expression = print_statement.expression.accept(self)
+        return print_statement
+
+    def visit_return_empty_statement(self, return_empty_statement: statement_ast.ReturnEmptyStatement):
+        return return_empty_statement
+
+    def visit_return_statement(self, return_statement: statement_ast.ReturnStatement):
+        if return_statement.expression is not None:
+            return_statement.expression = return_statement.expression.accept(self)
+        return return_statement
+
+    # ---- expressions ----
+
+    def visit_dot_expression(self, dot_expression: expression_ast.DotExpression):
+        return dot_expression
+
+    def visit_false_expression(self, false_expression: expression_ast.FalseExpression):
+        return false_expression
+
+    def visit_true_expression(self, true_expression: expression_ast.TrueExpression):
+        return true_expression
+
+    def visit_identifier_expression(self, identifier_expression: expression_ast.IdentifierExpression):
+        return identifier_expression
+
+    def visit_new_expression(self, new_expression: expression_ast.NewExpression):
+        return new_expression
+
+    def visit_null_expression(self, null_expression: expression_ast.NullExpression):
+        return null_expression
+
+    def visit_read_expression(self, read_expression: expression_ast.ReadExpression):
+        return read_expression
+
+    def visit_integer_expression(self, integer_expression: expression_ast.IntegerExpression):
+        return integer_expression
+
+    def visit_invocation_expression(self, invocation_expression: expression_ast.InvocationExpression):
+        invocation_expression.arguments = [arg.accept(self) for arg in invocation_expression.arguments]
+        return invocation_expression
+
+    def visit_unary_expression(self, unary_expression: expression_ast.UnaryExpression):
+        operand = unary_expression.operand = unary_expression.operand.accept(self)
+        value = self.constant(operand)
+        if unary_expression.operator == Operator.MINUS:
+            if value is not None:
+                return self.literal(wrap32(-value), unary_expression)
+        elif value is not None:
+            return self.literal(not value, unary_expression)
+        # --x and !!b
+        if isinstance(operand, expression_ast.UnaryExpression) and operand.operator == unary_expression.operator:
+            return self.simplified(operand.operand)
+        return unary_expression
+
+    def visit_binary_expression(self, binary_expression: expression_ast.BinaryExpression):
+        op = binary_expression.operator
+        left = binary_expression.left = binary_expression.left.accept(self)
+        right = binary_expression.right = binary_expression.right.accept(self)
+        a = self.constant(left)
+        b = self.constant(right)
+        if a is not None and b is not None:
+            return self.literal(FOLD_BINARY[op](a, b), binary_expression)
+
+        if op == Operator.AND:
+            if a is not None:
+                return self.simplified(right) if a else self.literal(False, binary_expression)
+            if b is True:
+                return self.simplified(left)
+            if b is False and self.pure(left):
+                return self.literal(False, binary_expression)
+        elif op == Operator.OR:
+            if a is not None:
+                return self.literal(True, binary_expression) if a else self.simplified(right)
+            if b is False:
+                return self.simplified(left)
+            if b is True and self.pure(left):
+                return self.literal(True, binary_expression)
+        elif op == Operator.PLUS:
+            if a == 0:
+                return self.simplified(right)
+            if b == 0:
+                return self.simplified(left)
+        elif op == Operator.MINUS:
+            if b == 0:
+                return self.simplified(left)
+            if a == 0:
+                return self.negation(right, binary_expression)
+        elif op == Operator.TIMES:
+            for constant, other in ((a, right), (b, left)):
+                if constant == 1:
+                    return self.simplified(other)
+                if constant == -1:
+                    return self.negation(other, binary_expression)
+                if constant == 0 and self.pure(other):
+                    return self.literal(0, binary_expression)
+        elif op == Operator.DIVIDE:
+            if b == 1:
+                return self.simplified(left)
+            if b == -1:
+                return self.negation(left, binary_expression)
+        return binary_expression
+
+    def visit_lvalue_dot(self, lvalue_dot: lvalue_ast.LValueDot):
+        return lvalue_dot
+
+    def visit_lvalue_id(self, lvalue_id: lvalue_ast.LValueID):
+        return lvalue_id
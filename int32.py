@@ -0,0 +1,16 @@
+"""Mini's 32-bit integer arithmetic, shared by the constant folders of the
+AST and the IR so both agree with what the generated RISC-V computes."""
+
+
+def wrap32(value: int) -> int:
+    # The signed 32-bit integer with the same low 32 bits as value
+    value &= 0xFFFFFFFF
+    return value - 0x100000000 if value & 0x80000000 else value
+
+
+def divide32(left: int, right: int) -> int:
+    # RISC-V div: truncates toward zero, x / 0 is -1 and the one overflow wraps
+    if right == 0:
+        return -1
+    quotient = abs(left) // abs(right)
+    return wrap32(-quotient if (left < 0) != (right < 0) else quotient)
@@ -1,4 +1,5 @@
-from miniast import program_ast, type_ast, statement_ast, expression_ast, lvalue_ast
+from miniast import program_ast, statement_ast, expression_ast, lvalue_ast
+from miniast.interning import ASTInterner
 from antlr4 import *
 from MiniParser import MiniParser
 from MiniVisitor import MiniVisitor
@@ -6,8 +7,9 @@ from MiniVisitor import MiniVisitor
 class MiniToASTVisitor(MiniVisitor):
     """Produce the AST of a .mini program from its parse-tree."""
 
-    def __init__(self):
+    def __init__(self, interner: ASTInterner = None):
         self.program_ast = program_ast.Program()
+        self.interner = interner if interner is not None else ASTInterner()
 
     def visitProgram(self, ctx:MiniParser.ProgramContext):
         """Visit a .mini parse tree produced by the MiniParser parser.program()."""
@@ -29,7 +31,7 @@ class MiniToASTVisitor(MiniVisitor):
 
         type = self.visit(ctx.type_()) 
         for idnode in ctx.ID():
-             id_name = expression_ast.IdentifierExpression(ctx.start.line, idnode.getText())
+             id_name = expression_ast.IdentifierExpression(ctx.start.line, self.interner.name(idnode.getText()))
              declaration = program_ast.Declaration(ctx.start.line, type, id_name)
              declarations.append(declaration)
 
@@ -50,7 +52,7 @@ class MiniToASTVisitor(MiniVisitor):
     # Visit a parse tree produced by MiniParser#typeDeclaration.
     def visitTypeDeclaration(self, ctx:MiniParser.TypeDeclarationContext):
         fields = self.visit(ctx.nestedDecl())
-        name = expression_ast.IdentifierExpression(ctx.start.line, ctx.ID().getText())
+        name = expression_ast.IdentifierExpression(ctx.start.line, self.interner.name(ctx.ID().getText()))
         type_declaration = program_ast.TypeDeclaration(ctx.start.line, name, fields)
         return type_declaration
 
@@ -63,7 +65,7 @@ class MiniToASTVisitor(MiniVisitor):
 
     # Visit a parse tree produced by MiniParser#decl.
     def visitDecl(self, ctx:MiniParser.DeclContext):
-        id_name = expression_ast.IdentifierExpression(ctx.start.line, ctx.ID().getText())
+        id_name = expression_ast.IdentifierExpression(ctx.start.line, self.interner.name(ctx.ID().getText()))
         declaration = program_ast.Declaration(ctx.start.line, self.visit(ctx.type_()), id_name)
         return declaration
 
@@ -76,12 +78,12 @@ class MiniToASTVisitor(MiniVisitor):
 
     # Visit a parse tree produced by MiniParser#function.
     def visitFunction(self, ctx:MiniParser.FunctionContext):
-
-        return_type = self.visit(ctx.returnType())
+        # Parameters before the return type, so struct types are interned in source order
         parameters = self.visit(ctx.parameters())
+        return_type = self.visit(ctx.returnType())
         locals = self.visit(ctx.declarations())
         body = self.visit(ctx.statementList())
-        id_name = expression_ast.IdentifierExpression(ctx.start.line, ctx.ID().getText())
+        id_name = expression_ast.IdentifierExpression(ctx.start.line, self.interner.name(ctx.ID().getText()))
         function = program_ast.Function(ctx.start.line, id_name,return_type, parameters, locals, body)
         return function
 
@@ -104,16 +106,15 @@ class MiniToASTVisitor(MiniVisitor):
     
     # Visit a parse tree produced by MiniParser#IntType.
     def visitIntType(self, ctx:MiniParser.IntTypeContext):
-        return type_ast.IntType()
+        return self.interner.int_type()
 
     # Visit a parse tree produced by MiniParser#BoolType.
     def visitBoolType(self, ctx:MiniParser.BoolTypeContext):
-        return type_ast.BoolType()
+        return self.interner.bool_type()
     
     # Visit a parse tree produced by MiniParser#StructType.
     def visitStructType(self, ctx:MiniParser.StructTypeContext):
-        id_name = expression_ast.IdentifierExpression(ctx.start.line, ctx.ID().getText())
-        return type_ast.StructType(ctx.start.line, id_name)
+        return self.interner.struct_type(ctx.start.line, ctx.ID().getText())
 
 
 
@@ -124,7 +125,7 @@ class MiniToASTVisitor(MiniVisitor):
 
     # Visit a parse tree produced by MiniParser#ReturnTypeVoid.
     def visitReturnTypeVoid(self, ctx:MiniParser.ReturnTypeVoidContext):
-        return type_ast.ReturnTypeVoid()
+        return self.interner.void_type()
 
 
     # Visit a parse tree produced by MiniParser#NestedBlock.
@@ -193,7 +194,7 @@ class MiniToASTVisitor(MiniVisitor):
     # Visit a parse tree produced by MiniParser#Invocation.
     def visitInvocation(self, ctx:MiniParser.InvocationContext):
         arguments = self.visit(ctx.arguments())
-        name_id = expression_ast.IdentifierExpression(ctx.start.line, ctx.ID().getText())
+        name_id = expression_ast.IdentifierExpression(ctx.start.line, self.interner.name(ctx.ID().getText()))
         invocation_expr = expression_ast.InvocationExpression(ctx.start.line, name_id, arguments)
         invocation = statement_ast.InvocationStatement(ctx.start.line, invocation_expr)
         return invocation
@@ -207,7 +208,7 @@ class MiniToASTVisitor(MiniVisitor):
     # Visit a parse tree produced by MiniParser#Lvalue.
     def visitLvalueId(self, ctx:MiniParser.LvalueIdContext): # added 'Id' to context type and func name
         #if isinstance(ctx, MiniParser.LvalueIdContext):
-        id_name = expression_ast.IdentifierExpression(ctx.start.line, ctx.ID().getText())
+        id_name = expression_ast.IdentifierExpression(ctx.start.line, self.interner.name(ctx.ID().getText()))
         lvalue = lvalue_ast.LValueID(ctx.start.line, id_name)
         #elif isinstance(ctx, MiniParser.LvalueDotContext):
         #    lvalue = lvalue_ast.LValueDot(ctx.start.line, self._visitLValueNested(ctx.lvalue()), ctx.ID().getText())
@@ -217,7 +218,7 @@ class MiniToASTVisitor(MiniVisitor):
         return lvalue
     
     def visitLvalueDot(self, ctx: MiniParser.LvalueDotContext):
-        name_id = expression_ast.IdentifierExpression(ctx.start.line, ctx.ID().getText())
+        name_id = expression_ast.IdentifierExpression(ctx.start.line, self.interner.name(ctx.ID().getText()))
         left_value = self.visit(ctx.lvalue())
         lvaluedot = lvalue_ast.LValueDot(ctx.start.line, left_value, name_id)
         return lvaluedot
@@ -236,7 +237,7 @@ class MiniToASTVisitor(MiniVisitor):
 
     # Visit a parse tree produced by MiniParser#IdentifierExpr.
     def visitIdentifierExpr(self, ctx:MiniParser.IdentifierExprContext):
-        identifier_expr = expression_ast.IdentifierExpression(ctx.start.line, ctx.ID().getText())
+        identifier_expr = expression_ast.IdentifierExpression(ctx.start.line, self.interner.name(ctx.ID().getText()))
         return identifier_expr
 
 
@@ -249,7 +250,7 @@ class MiniToASTVisitor(MiniVisitor):
 
     # Visit a parse tree produced by MiniParser#NewExpr.
     def visitNewExpr(self, ctx:MiniParser.NewExprContext):
-        name_id = expression_ast.IdentifierExpression(ctx.start.line, ctx.ID().getText())
+        name_id = expression_ast.IdentifierExpression(ctx.start.line, self.interner.name(ctx.ID().getText()))
         new_expr = expression_ast.NewExpression(ctx.start.line, name_id)
         return new_expr
 
@@ -261,7 +262,7 @@ class MiniToASTVisitor(MiniVisitor):
 
     # Visit a parse tree produced by MiniParser#DotExpr.
     def visitDotExpr(self, ctx:MiniParser.DotExprContext):
-        name_id = expression_ast.IdentifierExpression(ctx.start.line, ctx.ID().getText())
+        name_id = expression_ast.IdentifierExpression(ctx.start.line, self.interner.name(ctx.ID().getText()))
         dot_expr = expression_ast.DotExpression(ctx.start.line, self.visit(ctx.expression()), name_id)
         return dot_expr
 
@@ -273,7 +274,7 @@ class MiniToASTVisitor(MiniVisitor):
 
     # Visit a parse tree produced by MiniParser#InvocationExpr.
     def visitInvocationExpr(self, ctx:MiniParser.InvocationExprContext):
-        name_id = expression_ast.IdentifierExpression(ctx.start.line, ctx.ID().getText())
+        name_id = expression_ast.IdentifierExpression(ctx.start.line, self.interner.name(ctx.ID().getText()))
         invocation_expr = expression_ast.InvocationExpression(ctx.start.line, name_id, self.visit(ctx.arguments()))
         return invocation_expr
 
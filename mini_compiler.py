@@ -1,56 +1,202 @@
 import sys
 from antlr4 import *
-from MiniLexer import MiniLexer
-from MiniParser import MiniParser
+from mini_frontend import MiniFrontend, PREDICTION_MODES
+from mini_rd_parser import MiniRDParser, MiniSyntaxError
 from mini_ast_visitor import MiniToASTVisitor
+from miniast.interning import ASTInterner
 from pretty_print_ast_visitor import PPASTVisitor
 from static_semantic_ast_visitor import StaticSemanticASTVisitor
 from codegen_visitor import CodeGenVisitor
+from constant_folding_ast_visitor import ConstantFoldingASTVisitor
+from miniir.dce import eliminate_dead_code
+from miniir.gvn import number_values
+from miniir.induction import reduce_strength
+from miniir.inline import Inliner, SIZE_LIMIT, SINGLE_CALL_LIMIT, GROWTH_LIMIT
+from miniir.ir_builder import IRBuilder
+from miniir.licm import hoist_invariants
+from miniir.regalloc import ALLOCATORS
+from miniir.riscv_backend import RiscVBackend
+from miniir.sccp import propagate_constants
+from miniir.ssa import construct_ssa, destruct_ssa
 import argparse
 
+# The options each -O level turns on, unless they are given explicitly
+OPT_LEVELS = {
+    0: {'regalloc': 'none'},
+    1: {'regalloc': 'linear', 'fold': True},
+    2: {'regalloc': 'graph', 'ssa': True, 'fold': True, 'inline': True, 'sccp': True, 'gvn': True,
+        'licm': True, 'strength': True, 'dce': True},
+}
+
+# Optimizations of the IR in SSA form, in the order they run after inlining: option, name in --stats, pass.
+# Each pass takes the module and returns {function name: {statistic: count}}.
+SSA_PASSES = [
+    ('sccp', 'sccp', propagate_constants),
+    ('gvn', 'gvn', number_values),
+    ('licm', 'licm', hoist_invariants),
+    ('strength', 'strength', reduce_strength),
+    ('dce', 'dce', eliminate_dead_code),
+]
+
 def main(argv):
     parser = argparse.ArgumentParser(description='Mini compiler')
-    parser.add_argument('input_file', help='Input .mini file')
-    parser.add_argument('-p', '--prettyprint', action='store_true', 
+    parser.add_argument('input_files', nargs='+', metavar='input_file',
+                        help='Input .mini file(s)')
+    parser.add_argument('-p', '--prettyprint', action='store_true',
                         help='Pretty print the AST')
     parser.add_argument('-s', '--symbols', action='store_true',
                         help='Print symbol tables (for debugging)')
-    
+    parser.add_argument('--frontend', choices=['antlr', 'rd'], default='antlr',
+                        help='Parse with the ANTLR parser (default) or the hand-written '
+                             'recursive-descent parser')
+    parser.add_argument('--prediction', choices=PREDICTION_MODES, default='two-stage',
+                        help='ANTLR prediction: SLL with LL fallback (default) or full LL')
+    parser.add_argument('--backend', choices=['ast', 'ir'], default='ast',
+                        help='Generate code straight from the AST (default) or through '
+                             'the three-address IR')
+    parser.add_argument('--dump-ir', action='store_true',
+                        help='Print the IR of each program (implies --backend ir)')
+    parser.add_argument('--regalloc', choices=list(ALLOCATORS), default=None,
+                        help='Register allocator of the IR backend: linear scan (default), '
+                             'graph coloring, or none, which keeps every value in its own stack slot')
+    parser.add_argument('--ssa', action='store_true',
+                        help='Take the IR through SSA form before emitting it (implies --backend ir)')
+    parser.add_argument('--fold', action='store_true',
+                        help='Fold constant expressions, simplify algebraic identities and drop '
+                             'branches with constant guards before generating code')
+    parser.add_argument('--inline', action='store_true',
+                        help='Inline calls of small functions and of functions called only once, '
+                             'except recursive ones, before the other SSA optimizations (implies --ssa)')
+    parser.add_argument('--inline-size', type=int, default=SIZE_LIMIT, metavar='N',
+                        help=f'Inline a call when the callee\'s size in IR instructions, less what '
+                             f'the call itself costs, is at most N (default {SIZE_LIMIT})')
+    parser.add_argument('--inline-single', type=int, default=SINGLE_CALL_LIMIT, metavar='N',
+                        help=f'Inline the only call of a function of up to N IR instructions '
+                             f'(default {SINGLE_CALL_LIMIT})')
+    parser.add_argument('--inline-growth', type=int, default=GROWTH_LIMIT, metavar='N',
+                        help=f'Never inline into a function of more than N IR instructions '
+                             f'(default {GROWTH_LIMIT})')
+    parser.add_argument('--sccp', action='store_true',
+                        help='Propagate constants through the IR in SSA form, across calls too, and '
+                             'remove branches that cannot be taken (implies --ssa)')
+    parser.add_argument('--gvn', action='store_true',
+                        help='Remove computations and struct field loads that repeat an earlier one '
+                             'in the IR in SSA form (implies --ssa)')
+    parser.add_argument('--licm', action='store_true',
+                        help='Rotate while loops and hoist loop-invariant computations and field '
+                             'loads out of them (implies --ssa)')
+    parser.add_argument('--strength', action='store_true',
+                        help='Turn multiplications of induction variables into additions, replace '
+                             'loop tests accordingly and multiply and divide by powers of two with '
+                             'shifts (implies --ssa)')
+    parser.add_argument('--dce', action='store_true',
+                        help='Remove instructions whose results are never used, unreachable blocks '
+                             'and empty jumps from the IR in SSA form (implies --ssa)')
+    parser.add_argument('--stats', action='store_true',
+                        help='Print what each IR optimization changed in every function and why '
+                             'each call was inlined or not, or the frame layout of every function '
+                             'the AST backend generates')
+    parser.add_argument('-O', dest='opt_level', type=int, choices=sorted(OPT_LEVELS), default=None,
+                        help='Optimize through the IR: -O0 keeps values in stack slots, -O1 folds '
+                             'constants and allocates registers by linear scan, -O2 also goes through '
+                             'SSA form, inlines, propagates constants, removes redundant and dead code, hoists '
+                             'loop invariants, reduces strength and colors the interference graph '
+                             '(implies --backend ir)')
+
     args = parser.parse_args(argv[1:])
-    
-    input_stream = FileStream(args.input_file)
-    lexer = MiniLexer(input_stream)
-    stream = CommonTokenStream(lexer)
-    parser = MiniParser(stream)
-    program_ctx = parser.program()
-
-    if parser.getNumberOfSyntaxErrors() > 0:
+    if args.opt_level is not None:
+        args.backend = 'ir'
+        for option, value in OPT_LEVELS[args.opt_level].items():
+            setattr(args, option, getattr(args, option) or value)
+    args.regalloc = args.regalloc or 'linear'
+    if args.inline or any(getattr(args, option) for option, name, optimize in SSA_PASSES):
+        args.ssa = True
+
+    # One frontend for all inputs keeps the parser's prediction caches warm
+    if args.frontend == 'rd':
+        frontend = MiniRDParser()
+    else:
+        frontend = MiniFrontend(args.prediction)
+    for input_file in args.input_files:
+        compile_file(input_file, args, frontend)
+
+def parse_file(input_file, frontend, interner):
+    # Returns the AST of input_file, or None if it has syntax errors
+    if isinstance(frontend, MiniRDParser):
+        try:
+            return frontend.parse_file(input_file, interner)
+        except MiniSyntaxError as e:
+            print(e, file=sys.stderr)
+            return None
+
+    program_ctx = frontend.parse_file(input_file)
+    if frontend.syntax_errors() > 0:
+        return None
+    mini_ast_visitor = MiniToASTVisitor(interner)
+    return mini_ast_visitor.visitProgram(program_ctx)
+
+def print_stats(name, stats):
+    # One line per function with the counts an IR optimization reported
+    for function, counts in stats.items():
+        print(f"{name} {function}: " + ", ".join(f"{count} {statistic}" for statistic, count in counts.items()))
+
+def compile_file(input_file, args, frontend):
+    # Names and types are shared by the AST and the checker of this file only
+    interner = ASTInterner()
+    mini_ast = parse_file(input_file, frontend, interner)
+
+    if mini_ast is None:
         print("Syntax errors.")
         return
-    
+
     print("Parse successful.")
-    
-    mini_ast_visitor = MiniToASTVisitor()
-    mini_ast = mini_ast_visitor.visitProgram(program_ctx)
 
     if args.prettyprint:
         pp_visitor = PPASTVisitor()
         pp_str = pp_visitor.pretty_print(mini_ast)
         print(pp_str, end="")
 
-    visitor = StaticSemanticASTVisitor()
+    visitor = StaticSemanticASTVisitor(interner)
     errors = visitor.analyze(mini_ast)
 
     if errors == 0:
-        codegen = CodeGenVisitor()
-        assembly = codegen.visit_program(mini_ast)
+        if args.fold:
+            ConstantFoldingASTVisitor().fold(mini_ast)
+        if args.backend == 'ir' or args.dump_ir or args.ssa:
+            module = IRBuilder(rotate_loops=args.licm).build(mini_ast)
+            if args.ssa:
+                for function in module.functions:
+                    construct_ssa(function)
+                if args.inline:
+                    inliner = Inliner(args.inline_size, args.inline_single, args.inline_growth)
+                    stats = inliner.run(module)
+                    if args.stats:
+                        print_stats('inline', stats)
+                        for decision in inliner.decisions:
+                            print(f"inline {decision}")
+                for option, name, optimize in SSA_PASSES:
+                    if getattr(args, option):
+                        stats = optimize(module)
+                        if args.stats:
+                            print_stats(name, stats)
+            if args.dump_ir:
+                print(module)
+            if args.ssa:
+                for function in module.functions:
+                    destruct_ssa(function)
+            assembly = RiscVBackend(ALLOCATORS[args.regalloc]).emit_module(module)
+        else:
+            codegen = CodeGenVisitor()
+            assembly = codegen.visit_program(mini_ast)
+            if args.stats:
+                print_stats('frame', codegen.frames)
+
+        assembly_output = input_file.replace('.mini', '.s')
 
-        assembly_output = args.input_file.replace('.mini', '.s')
-        
         with open(assembly_output, 'w') as f:
             f.write(assembly)
 
         print(f"Assembly code generated in {assembly_output}")
 
 if __name__ == '__main__':
-    main(sys.argv)
\ No newline at end of file
+    main(sys.argv)
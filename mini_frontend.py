@@ -0,0 +1,79 @@
+from antlr4 import CommonTokenStream, FileStream
+from antlr4.atn.PredictionMode import PredictionMode
+from antlr4.dfa.DFA import DFA
+from antlr4.error.ErrorListener import ConsoleErrorListener
+from antlr4.error.ErrorStrategy import BailErrorStrategy, DefaultErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
+from MiniLexer import MiniLexer
+from MiniParser import MiniParser
+
+PREDICTION_MODES = ("two-stage", "ll")
+
+class MiniFrontend:
+    """Lexes and parses .mini sources with a single, reusable lexer/parser pair.
+
+    In "two-stage" mode every file is first parsed with SLL prediction and a
+    BailErrorStrategy, which is much cheaper than full LL(*) and succeeds for
+    every syntactically valid Mini program. Only when SLL bails out is the same
+    token stream re-parsed with full LL prediction and the default error
+    strategy, so real syntax errors are still reported exactly as before.
+
+    The prediction DFAs are shared class attributes of the generated MiniLexer
+    and MiniParser, so they stay warm for as long as the process lives; reusing
+    one MiniFrontend across files also avoids rebuilding the ATN simulators.
+    """
+
+    def __init__(self, prediction: str = "two-stage"):
+        if prediction not in PREDICTION_MODES:
+            raise ValueError(f"unknown prediction mode '{prediction}'")
+        self.prediction = prediction
+        self.lexer = MiniLexer(None)
+        self.parser = MiniParser(None)
+        self.tokens = None
+        self.used_ll_fallback = False # true when the last SLL attempt bailed out
+
+    def parse_file(self, path: str) -> MiniParser.ProgramContext:
+        return self.parse(FileStream(path))
+
+    def parse(self, input_stream) -> MiniParser.ProgramContext:
+        # Returns the program parse tree; check syntax_errors() before using it
+        self.lexer.inputStream = input_stream
+        self.tokens = CommonTokenStream(self.lexer)
+        self.used_ll_fallback = False
+
+        if self.prediction == "two-stage":
+            self._configure(PredictionMode.SLL, BailErrorStrategy(), report=False)
+            self.parser.setTokenStream(self.tokens)
+            try:
+                return self.parser.program()
+            except ParseCancellationException:
+                self.used_ll_fallback = True
+                # setTokenStream() resets the parser before attaching the stream,
+                # so the already buffered tokens have to be rewound explicitly
+                self.tokens.seek(0)
+
+        self._configure(PredictionMode.LL, DefaultErrorStrategy(), report=True)
+        self.parser.setTokenStream(self.tokens)
+        return self.parser.program()
+
+    def syntax_errors(self) -> int:
+        return self.parser.getNumberOfSyntaxErrors()
+
+    def token_count(self) -> int:
+        # Number of tokens (including EOF) in the last parsed input
+        return len(self.tokens.tokens) if self.tokens else 0
+
+    def _configure(self, mode, error_strategy, report: bool):
+        self.parser._interp.predictionMode = mode
+        self.parser._errHandler = error_strategy
+        self.parser.removeErrorListeners()
+        if report:
+            self.parser.addErrorListener(ConsoleErrorListener.INSTANCE)
+
+    @staticmethod
+    def clear_caches():
+        # Drops the shared prediction DFAs, e.g. to measure cold-start parsing
+        for dfas in (MiniLexer.decisionsToDFA, MiniParser.decisionsToDFA):
+            for i, dfa in enumerate(dfas):
+                dfas[i] = DFA(dfa.atnStartState, i)
+        MiniParser.sharedContextCache.cache.clear()
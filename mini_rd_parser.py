@@ -0,0 +1,379 @@
+import re
+import sys
+from miniast import program_ast, statement_ast, expression_ast, lvalue_ast
+from miniast.interning import ASTInterner
+
+# One alternation for the whole Mini.g4 token set. Multi-character operators come
+# before their one-character prefixes; keywords are recognized from ID matches.
+TOKEN_RE = re.compile(r"""
+    (?P<WS>[ \t\n\r\f]+)
+  | (?P<COMMENT>\#[^\n]*\n)
+  | (?P<ID>[a-zA-Z][a-zA-Z0-9]*)
+  | (?P<INTEGER>0|[1-9][0-9]*)
+  | (?P<OP>==|!=|<=|>=|&&|\|\||[{};,().=<>+\-*/!])
+""", re.VERBOSE)
+
+KEYWORDS = frozenset(["struct", "int", "bool", "fun", "void", "print", "endl", "if",
+                      "else", "while", "delete", "return", "read", "true", "false",
+                      "new", "null"])
+
+EOF = "<EOF>"
+
+# Binding power of each binary operator, matching the precedence ANTLR derives
+# from the order of the BinaryExpr alternatives in Mini.g4 (all left associative)
+BINARY_PRECEDENCE = {"*": 13, "/": 13, "+": 12, "-": 12, "<": 11, ">": 11, "<=": 11,
+                     ">=": 11, "==": 10, "!=": 10, "&&": 9, "||": 8}
+
+# Tokens that can start an expression, and what ANTLR reports expecting where one
+# is missing: in general, and after the '=' of an assignment, where 'read' may come too
+EXPRESSION_START = frozenset(["(", "-", "!", "true", "false", "new", "null", "ID", "INTEGER"])
+EXPECTED_EXPRESSION = "{'(', '-', '!', 'true', 'false', 'new', 'null', ID, INTEGER}"
+EXPECTED_SOURCE = "{'(', 'read', '-', '!', 'true', 'false', 'new', 'null', ID, INTEGER}"
+
+class MiniSyntaxError(Exception):
+    """Raised on the first syntax error in a .mini source."""
+
+    def __init__(self, line: int, column: int, message: str):
+        super().__init__(f"line {line}:{column} {message}")
+        self.line = line
+        self.column = column
+
+
+def tokenize(source: str):
+    # Returns parallel lists of token kinds, texts, lines and columns, ending in EOF.
+    # Keywords and operators use their own text as kind; names are "ID"/"INTEGER".
+    # Like the generated MiniLexer, unrecognized input is reported and skipped: a lone
+    # '&' or '|' takes the following character with it and an unterminated comment
+    # runs to the end of the source.
+    kinds, texts, lines, columns = [], [], [], []
+    line, line_start, pos, end = 1, 0, 0, len(source)
+    match = TOKEN_RE.match
+    while pos < end:
+        m = match(source, pos)
+        if m is None:
+            char = source[pos]
+            skip = end - pos if char == "#" else 2 if char in "&|" else 1
+            text = source[pos:pos + skip]
+            print(f"line {line}:{pos - line_start} token recognition error at: '{text}'",
+                  file=sys.stderr)
+            group = "ERROR"
+            next_pos = pos + skip
+        else:
+            group = m.lastgroup
+            text = m.group()
+            next_pos = m.end()
+        if group == "WS" or group == "COMMENT" or group == "ERROR":
+            newlines = text.count("\n")
+            if newlines:
+                line += newlines
+                line_start = pos + text.rindex("\n") + 1
+        else:
+            if group == "ID":
+                kinds.append(text if text in KEYWORDS else "ID")
+            elif group == "INTEGER":
+                kinds.append("INTEGER")
+            else:
+                kinds.append(text)
+            texts.append(text)
+            lines.append(line)
+            columns.append(pos - line_start)
+        pos = next_pos
+    kinds.append(EOF)
+    texts.append(EOF)
+    lines.append(line)
+    columns.append(pos - line_start)
+    return kinds, texts, lines, columns
+
+
+class MiniRDParser:
+    """Recursive-descent parser that builds the miniast directly from source text.
+
+    It accepts the language of Mini.g4 and produces the same AST (node classes,
+    fields and line numbers) as running MiniParser followed by MiniToASTVisitor,
+    without materializing a parse tree. Expressions are parsed by precedence
+    climbing over BINARY_PRECEDENCE. Names and type nodes are drawn from an
+    ASTInterner, a fresh one per parse unless the caller passes its own.
+    """
+
+    def parse_file(self, path: str, interner: ASTInterner = None) -> program_ast.Program:
+        with open(path, encoding="utf-8") as f:
+            return self.parse(f.read(), interner)
+
+    def parse(self, source: str, interner: ASTInterner = None) -> program_ast.Program:
+        self.kinds, self.texts, self.lines, self.columns = tokenize(source)
+        self.pos = 0
+        self.interner = interner if interner is not None else ASTInterner()
+        program = program_ast.Program()
+        program.types = self.types()
+        program.declarations = self.declarations()
+        program.functions = self.functions()
+        self.expect(EOF)
+        return program
+
+    # ---- token helpers ----
+
+    def error(self, expected: str):
+        pos = self.pos
+        text = self.texts[pos]
+        raise MiniSyntaxError(self.lines[pos], self.columns[pos],
+                              f"mismatched input '{text}' expecting {expected}")
+
+    def expect(self, kind: str) -> str:
+        if self.kinds[self.pos] != kind:
+            self.error(f"'{kind}'" if kind != EOF else EOF)
+        text = self.texts[self.pos]
+        self.pos += 1
+        return text
+
+    def ident(self, line: int) -> expression_ast.IdentifierExpression:
+        return expression_ast.IdentifierExpression(line, self.interner.name(self.expect("ID")))
+
+    # ---- declarations ----
+
+    def types(self):
+        types = []
+        # 'struct' ID '{' starts a type declaration; 'struct' ID ID a variable
+        kinds = self.kinds
+        while kinds[self.pos] == "struct" and kinds[self.pos + 1] != EOF and kinds[self.pos + 2] == "{":
+            line = self.lines[self.pos]
+            self.pos += 1
+            name = self.ident(line)
+            self.expect("{")
+            fields = []
+            while True:
+                fields.append(self.decl())
+                self.expect(";")
+                if self.kinds[self.pos] == "}":
+                    break
+            self.pos += 1
+            self.expect(";")
+            types.append(program_ast.TypeDeclaration(line, name, fields))
+        return types
+
+    def type(self):
+        kind = self.kinds[self.pos]
+        if kind == "int":
+            self.pos += 1
+            return self.interner.int_type()
+        if kind == "bool":
+            self.pos += 1
+            return self.interner.bool_type()
+        if kind == "struct":
+            line = self.lines[self.pos]
+            self.pos += 1
+            return self.interner.struct_type(line, self.expect("ID"))
+        self.error("{'struct', 'int', 'bool'}")
+
+    def decl(self) -> program_ast.Declaration:
+        line = self.lines[self.pos]
+        type = self.type()
+        return program_ast.Declaration(line, type, self.ident(line))
+
+    def declarations(self):
+        declarations = []
+        kinds = self.kinds
+        while kinds[self.pos] in ("int", "bool", "struct"):
+            line = self.lines[self.pos]
+            type = self.type()
+            while True:
+                declarations.append(program_ast.Declaration(line, type, self.ident(line)))
+                if kinds[self.pos] != ",":
+                    break
+                self.pos += 1
+            self.expect(";")
+        return declarations
+
+    def functions(self):
+        functions = []
+        while self.kinds[self.pos] == "fun":
+            line = self.lines[self.pos]
+            self.pos += 1
+            name = self.ident(line)
+            params = self.parameters()
+            if self.kinds[self.pos] == "void":
+                self.pos += 1
+                ret_type = self.interner.void_type()
+            else:
+                ret_type = self.type()
+            self.expect("{")
+            locals = self.declarations()
+            body = self.statement_list()
+            self.expect("}")
+            functions.append(program_ast.Function(line, name, ret_type, params, locals, body))
+        return functions
+
+    def parameters(self):
+        self.expect("(")
+        params = []
+        if self.kinds[self.pos] != ")":
+            params.append(self.decl())
+            while self.kinds[self.pos] == ",":
+                self.pos += 1
+                params.append(self.decl())
+        self.expect(")")
+        return params
+
+    # ---- statements ----
+
+    def statement_list(self):
+        statements = []
+        kinds = self.kinds
+        while kinds[self.pos] != "}" and kinds[self.pos] != EOF:
+            statements.append(self.statement())
+        return statements
+
+    def block(self) -> statement_ast.BlockStatement:
+        line = self.lines[self.pos]
+        self.expect("{")
+        statements = self.statement_list()
+        self.expect("}")
+        return statement_ast.BlockStatement(line, statements)
+
+    def statement(self):
+        kind = self.kinds[self.pos]
+        line = self.lines[self.pos]
+        if kind == "ID":
+            if self.kinds[self.pos + 1] == "(":
+                name = self.ident(line)
+                invocation = expression_ast.InvocationExpression(line, name, self.arguments())
+                self.expect(";")
+                return statement_ast.InvocationStatement(line, invocation)
+            target = self.lvalue()
+            self.expect("=")
+            if self.kinds[self.pos] == "read":
+                self.pos += 1
+                source = expression_ast.ReadExpression(line)
+            elif self.kinds[self.pos] not in EXPRESSION_START:
+                self.error(EXPECTED_SOURCE)
+            else:
+                source = self.expression()
+            self.expect(";")
+            return statement_ast.AssignmentStatement(line, target, source)
+        if kind == "{":
+            return self.block()
+        if kind == "print":
+            self.pos += 1
+            expression = self.expression()
+            if self.kinds[self.pos] == "endl":
+                self.pos += 1
+                self.expect(";")
+                return statement_ast.PrintLnStatement(line, expression)
+            self.expect(";")
+            return statement_ast.PrintStatement(line, expression)
+        if kind == "if":
+            self.pos += 1
+            self.expect("(")
+            guard = self.expression()
+            self.expect(")")
+            then_block = self.block()
+            if self.kinds[self.pos] == "else":
+                self.pos += 1
+                else_block = self.block()
+            else:
+                else_block = statement_ast.BlockStatement(-1, [])
+            return statement_ast.ConditionalStatement(line, guard, then_block, else_block)
+        if kind == "while":
+            self.pos += 1
+            self.expect("(")
+            guard = self.expression()
+            self.expect(")")
+            return statement_ast.WhileStatement(line, guard, self.block())
+        if kind == "delete":
+            self.pos += 1
+            expression = self.expression()
+            self.expect(";")
+            return statement_ast.DeleteStatement(line, expression)
+        if kind == "return":
+            self.pos += 1
+            if self.kinds[self.pos] == ";":
+                self.pos += 1
+                return statement_ast.ReturnEmptyStatement(line)
+            expression = self.expression()
+            self.expect(";")
+            return statement_ast.ReturnStatement(line, expression)
+        self.error("{'{', 'print', 'if', 'while', 'delete', 'return', ID}")
+
+    def lvalue(self):
+        # Every node of a dotted lvalue carries the line of its first token
+        line = self.lines[self.pos]
+        lvalue = lvalue_ast.LValueID(line, self.ident(line))
+        while self.kinds[self.pos] == ".":
+            self.pos += 1
+            lvalue = lvalue_ast.LValueDot(line, lvalue, self.ident(line))
+        return lvalue
+
+    # ---- expressions ----
+
+    def arguments(self):
+        self.expect("(")
+        arguments = []
+        if self.kinds[self.pos] != ")":
+            arguments.append(self.expression())
+            while self.kinds[self.pos] == ",":
+                self.pos += 1
+                arguments.append(self.expression())
+        self.expect(")")
+        return arguments
+
+    def expression(self, min_precedence: int = 0):
+        left = self.unary()
+        kinds = self.kinds
+        precedence_of = BINARY_PRECEDENCE.get
+        while True:
+            op = kinds[self.pos]
+            precedence = precedence_of(op)
+            if precedence is None or precedence < min_precedence:
+                return left
+            line = self.lines[self.pos]
+            self.pos += 1
+            right = self.expression(precedence + 1)
+            left = expression_ast.BinaryExpression(line, op, left, right)
+
+    def unary(self):
+        kind = self.kinds[self.pos]
+        if kind == "-" or kind == "!":
+            line = self.lines[self.pos]
+            self.pos += 1
+            return expression_ast.UnaryExpression(line, kind, self.unary())
+        return self.postfix()
+
+    def postfix(self):
+        # Field accesses bind tighter than any operator. As in the ANTLR tree, a
+        # DotExpression's line is the line of the first token of its left operand.
+        line = self.lines[self.pos]
+        expression = self.primary()
+        while self.kinds[self.pos] == ".":
+            self.pos += 1
+            expression = expression_ast.DotExpression(line, expression, self.ident(line))
+        return expression
+
+    def primary(self):
+        kind = self.kinds[self.pos]
+        line = self.lines[self.pos]
+        if kind == "ID":
+            if self.kinds[self.pos + 1] == "(":
+                name = self.ident(line)
+                return expression_ast.InvocationExpression(line, name, self.arguments())
+            self.pos += 1
+            return expression_ast.IdentifierExpression(line, self.interner.name(self.texts[self.pos - 1]))
+        if kind == "INTEGER":
+            self.pos += 1
+            return expression_ast.IntegerExpression(line, self.texts[self.pos - 1])
+        if kind == "(":
+            self.pos += 1
+            expression = self.expression()
+            self.expect(")")
+            return expression
+        if kind == "true":
+            self.pos += 1
+            return expression_ast.TrueExpression(line)
+        if kind == "false":
+            self.pos += 1
+            return expression_ast.FalseExpression(line)
+        if kind == "null":
+            self.pos += 1
+            return expression_ast.NullExpression(line)
+        if kind == "new":
+            self.pos += 1
+            return expression_ast.NewExpression(line, self.ident(line))
+        self.error(EXPECTED_EXPRESSION)
@@ -19,28 +19,49 @@ class Operator(Enum):
 
 
 class Expression(mini_ast.MiniASTNode):
-    """The abstract Expression in a .mini AST."""
+    """The abstract Expression in a .mini AST.
+
+    type is set by semantic analysis to the canonical type node of the value.
+    """
+
+    __slots__ = ("linenum", "type")
 
     #def accept(self, visitor: mini_ast.ASTVisitor):
     #    return visitor.visit_expression(self)
         
 class IdentifierExpression(Expression):
-    """The Expression for ID values in a .mini AST."""
+    """The Expression for ID values in a .mini AST.
+
+    binding is set by semantic analysis to the symbol the name resolves to
+    (a VariableInfo, a FunctionInfo, or the StructInfo of a `new`), so later
+    passes never look names up.
+    """
+
+    __slots__ = ("id", "binding")
 
     def __init__(self, linenum: int, id: str):
         self.linenum = linenum
+        self.type = None
         self.id = id
+        self.binding = None
 
     def accept(self, visitor: mini_ast.ASTVisitor):
         return visitor.visit_identifier_expression(self)
 
 class DotExpression(Expression):
-    """The Expression for dotted names in a .mini AST."""
+    """The Expression for dotted names in a .mini AST.
+
+    offset is set by semantic analysis to the byte offset of the field.
+    """
+
+    __slots__ = ("left", "id", "offset")
 
     def __init__(self, linenum: int, left: Expression, id: IdentifierExpression):
         self.linenum = linenum
+        self.type = None
         self.left = left # a DotExpression or IdentifierExpression
         self.id = id
+        self.offset = None
 
     def accept(self, visitor: mini_ast.ASTVisitor):
         return visitor.visit_dot_expression(self)
@@ -48,8 +69,11 @@ class DotExpression(Expression):
 class FalseExpression(Expression):
     """The Expression for False in a .mini AST."""
 
+    __slots__ = ()
+
     def __init__(self, linenum: int):
         self.linenum = linenum
+        self.type = None
 
     def accept(self, visitor: mini_ast.ASTVisitor):
         return visitor.visit_false_expression(self)
@@ -57,8 +81,11 @@ class FalseExpression(Expression):
 class TrueExpression(Expression):
     """The Expression for True in a .mini AST."""
 
+    __slots__ = ()
+
     def __init__(self, linenum: int):
         self.linenum = linenum
+        self.type = None
 
     def accept(self, visitor: mini_ast.ASTVisitor):
         return visitor.visit_true_expression(self)
@@ -66,8 +93,11 @@ class TrueExpression(Expression):
 class NewExpression(Expression):
     """The Expression to allocate a new struct in a .mini AST."""
 
+    __slots__ = ("id",)
+
     def __init__(self, linenum: int, id: IdentifierExpression):
         self.linenum = linenum
+        self.type = None
         self.id = id
 
     def accept(self, visitor: mini_ast.ASTVisitor):
@@ -76,8 +106,11 @@ class NewExpression(Expression):
 class NullExpression(Expression):
     """The Expression for a null value in a .mini AST."""
 
+    __slots__ = ()
+
     def __init__(self, linenum: int):
         self.linenum = linenum
+        self.type = None
 
     def accept(self, visitor: mini_ast.ASTVisitor):
         return visitor.visit_null_expression(self)
@@ -85,8 +118,11 @@ class NullExpression(Expression):
 class ReadExpression(Expression):
     """The Expression to read from stdin in a .mini AST."""
 
+    __slots__ = ()
+
     def __init__(self, linenum: int):
         self.linenum = linenum
+        self.type = None
 
     def accept(self, visitor: mini_ast.ASTVisitor):
         return visitor.visit_read_expression(self)
@@ -94,8 +130,11 @@ class ReadExpression(Expression):
 class IntegerExpression(Expression):
     """The Expression for an int in a .mini AST."""
 
+    __slots__ = ("value",)
+
     def __init__(self, linenum: int, value: str):
         self.linenum = linenum
+        self.type = None
         self.value = value
 
     def accept(self, visitor: mini_ast.ASTVisitor):
@@ -104,8 +143,11 @@ class IntegerExpression(Expression):
 class InvocationExpression(Expression):
     """The Expression for a function call in a .mini AST."""
 
+    __slots__ = ("name", "arguments")
+
     def __init__(self, linenum: int, name: IdentifierExpression, arguments: list[Expression]):
         self.linenum = linenum
+        self.type = None
         self.name = name
         self.arguments = arguments
 
@@ -117,8 +159,11 @@ class InvocationExpression(Expression):
 class UnaryExpression(Expression):
     """The Expression for unary operations in a .mini AST."""
 
+    __slots__ = ("operator", "operand")
+
     def __init__(self, linenum: int, operator: Operator | str, operand: Expression):
         self.linenum = linenum
+        self.type = None
         self.operand = operand
 
         if isinstance(operator, Operator):
@@ -144,8 +189,11 @@ class UnaryExpression(Expression):
 class BinaryExpression(Expression):
     """The binary Expression in a .mini AST."""
 
+    __slots__ = ("operator", "left", "right")
+
     def __init__(self, linenum: int, operator: Operator | str, left: Expression, right: Expression):
         self.linenum = linenum
+        self.type = None
         self.left = left
         self.right = right
 
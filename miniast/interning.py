@@ -0,0 +1,50 @@
+from typing import Dict
+from miniast import type_ast, expression_ast
+
+NULL_NAME = "__null__" # struct name of the type given to the null literal
+
+class ASTInterner:
+    """Canonical names and type nodes shared by one .mini AST.
+
+    The frontends and StaticSemanticASTVisitor of a compile all draw from the
+    same interner: every occurrence of a name is the same string object, `int`,
+    `bool` and `void` are one node each and every struct name maps to a single
+    StructType (carrying the line of its first occurrence). Types of the same
+    compile can therefore be compared by identity.
+    """
+
+    __slots__ = ("names", "struct_types", "int", "bool", "void")
+
+    def __init__(self):
+        self.names: Dict[str, str] = {}
+        self.struct_types: Dict[str, type_ast.StructType] = {}
+        self.int = type_ast.IntType()
+        self.bool = type_ast.BoolType()
+        self.void = type_ast.ReturnTypeVoid()
+
+    def name(self, text: str) -> str:
+        # Returns the canonical string equal to text
+        name = self.names.get(text)
+        if name is None:
+            name = self.names[text] = text
+        return name
+
+    def int_type(self) -> type_ast.IntType:
+        return self.int
+
+    def bool_type(self) -> type_ast.BoolType:
+        return self.bool
+
+    def void_type(self) -> type_ast.ReturnTypeVoid:
+        return self.void
+
+    def struct_type(self, linenum: int, name: str) -> type_ast.StructType:
+        struct_type = self.struct_types.get(name)
+        if struct_type is None:
+            name = self.name(name)
+            struct_type = type_ast.StructType(linenum, expression_ast.IdentifierExpression(linenum, name))
+            self.struct_types[name] = struct_type
+        return struct_type
+
+    def null_type(self, linenum: int) -> type_ast.StructType:
+        return self.struct_type(linenum, NULL_NAME)
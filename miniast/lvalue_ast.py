@@ -1,21 +1,33 @@
 from miniast import mini_ast, expression_ast
 
 class LValue(mini_ast.MiniASTNode):
-    """The left-hand side of an assign statement in a .mini AST."""
+    """The left-hand side of an assign statement in a .mini AST.
+
+    type is set by semantic analysis to the canonical type node of the target.
+    """
+
+    __slots__ = ("linenum", "type")
 
     def __init__(self, linenum : int):
         self.linenum = linenum
+        self.type = None
         
     #def accept(self, visitor: mini_ast.ASTVisitor):
     #    return visitor.visit_lvalue(self)
     
 class LValueDot(LValue):
-    """A dotted name for the LValue in a .mini AST."""
+    """A dotted name for the LValue in a .mini AST.
+
+    offset is set by semantic analysis to the byte offset of the field.
+    """
+
+    __slots__ = ("left", "id", "offset")
 
     def __init__(self, linenum: int, left: LValue, id: expression_ast.IdentifierExpression):
         super().__init__(linenum)
         self.left = left 
         self.id = id
+        self.offset = None
 
     def accept(self, visitor: mini_ast.ASTVisitor):
         return visitor.visit_lvalue_dot(self)
@@ -23,6 +35,8 @@ class LValueDot(LValue):
 class LValueID(LValue):
     """An ID for the LValue in a .mini AST."""
 
+    __slots__ = ("id",)
+
     def __init__(self, linenum: int, id: expression_ast.IdentifierExpression):
         super().__init__(linenum)
         self.id = id
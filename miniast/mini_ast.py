@@ -3,9 +3,10 @@ from typing import Any
 from abc import ABC, abstractmethod
 
 class MiniASTNode():
+    # Nodes declare __slots__ (down from here) so large ASTs carry no per-node __dict__
+    __slots__ = ()
     #    def accept(self, visitor):
     #       pass
-    pass
 
 class ASTVisitor(ABC):
     @abstractmethod
@@ -2,6 +2,8 @@ from miniast import mini_ast, type_ast, statement_ast, expression_ast
 
 class Declaration(mini_ast.MiniASTNode):
     """Declares variables in a .mini AST."""
+
+    __slots__ = ("linenum", "type", "name")
     
     def __init__(self, linenum: int, type: type_ast.Type, name: expression_ast.IdentifierExpression):
         self.linenum = linenum
@@ -13,6 +15,8 @@ class Declaration(mini_ast.MiniASTNode):
 
 class TypeDeclaration(mini_ast.MiniASTNode):
     """Declares structs in a .mini AST."""
+
+    __slots__ = ("linenum", "name", "fields")
     
     def __init__(self, linenum: int, name: expression_ast.IdentifierExpression, fields: list[Declaration]):
         self.linenum = linenum
@@ -24,6 +28,8 @@ class TypeDeclaration(mini_ast.MiniASTNode):
 
 class Function(mini_ast.MiniASTNode):
     """Function definitions in a .mini AST."""
+
+    __slots__ = ("linenum", "name", "ret_type", "params", "locals", "body")
     
     def __init__(self, linenum: int, name: expression_ast.IdentifierExpression, ret_type: type_ast.Type, 
                  params: list[Declaration], locals: list[Declaration], body: list[statement_ast.Statement]):
@@ -40,6 +46,8 @@ class Function(mini_ast.MiniASTNode):
 class Program(mini_ast.MiniASTNode):
     """The top-level program object in a .mini AST."""
 
+    __slots__ = ("types", "declarations", "functions")
+
     def __init__(self, types: list[TypeDeclaration] = [], declarations: list[Declaration] = [], 
                  functions: list[Function] = []):
         self.types = types
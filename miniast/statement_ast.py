@@ -3,6 +3,8 @@ from miniast import mini_ast, expression_ast, lvalue_ast
 class Statement(mini_ast.MiniASTNode):
     """The abstract Statement in a .mini AST"""
 
+    __slots__ = ("linenum",)
+
     def __init__(self, linenum : int):
         self.linenum = linenum
 
@@ -12,6 +14,8 @@ class Statement(mini_ast.MiniASTNode):
 class AssignmentStatement(Statement):
     """The Assignment statement in a .mini AST."""
 
+    __slots__ = ("target", "source")
+
     def __init__(self, linenum : int, target : lvalue_ast.LValue, source : expression_ast.Expression):
         super().__init__(linenum)
         self.target = target
@@ -23,6 +27,8 @@ class AssignmentStatement(Statement):
 class BlockStatement(Statement):
     """The Block statement in a .mini AST."""
 
+    __slots__ = ("statements",)
+
     def __init__(self, linenum : int, statements : list[Statement]):
         super().__init__(linenum)
         self.statements = statements
@@ -41,6 +47,9 @@ class BlockStatement(Statement):
 
 class ConditionalStatement(Statement):
     """The If statement in a .mini AST."""
+
+    __slots__ = ("guard", "then_block", "else_block")
+
     def __init__(self, linenum : int, guard : expression_ast.Expression, then_block : BlockStatement, else_block : BlockStatement):
         super().__init__(linenum)
         self.guard = guard
@@ -53,6 +62,8 @@ class ConditionalStatement(Statement):
 class WhileStatement(Statement):
     """The While statement in a .mini AST."""
 
+    __slots__ = ("guard", "body")
+
     def __init__(self, linenum: int, guard : expression_ast.Expression, body: Statement):
         super().__init__(linenum)
         self.guard = guard
@@ -64,6 +75,8 @@ class WhileStatement(Statement):
 class DeleteStatement(Statement):
     """The Delete statement in a .mini AST."""
 
+    __slots__ = ("expression",)
+
     def __init__(self, linenum : int, expression : expression_ast.Expression):
         super().__init__(linenum)
         self.expression = expression
@@ -74,6 +87,8 @@ class DeleteStatement(Statement):
 class InvocationStatement(Statement):
     """The Invocation statement in a .mini AST."""
 
+    __slots__ = ("expression",)
+
     def __init__(self, linenum: int, expression : expression_ast.InvocationExpression):
         super().__init__(linenum)
         self.expression = expression
@@ -84,6 +99,8 @@ class InvocationStatement(Statement):
 class PrintLnStatement(Statement):
     """The PrintLn statement in a .mini AST."""
 
+    __slots__ = ("expression",)
+
     def __init__(self, linenum: int, expression : expression_ast.Expression):
         super().__init__(linenum)
         self.expression = expression
@@ -94,6 +111,8 @@ class PrintLnStatement(Statement):
 class PrintStatement(Statement):
     """The Print statement in a .mini AST."""
 
+    __slots__ = ("expression",)
+
     def __init__(self, linenum: int, expression : expression_ast.Expression):
         super().__init__(linenum)
         self.expression = expression
@@ -104,6 +123,8 @@ class PrintStatement(Statement):
 class ReturnEmptyStatement(Statement):
     """The ReturnEmpty statement in a .mini AST."""
 
+    __slots__ = ()
+
     def __init__(self, linenum: int):
         super().__init__(linenum)
 
@@ -113,6 +134,8 @@ class ReturnEmptyStatement(Statement):
 class ReturnStatement(Statement):
     """The Return statement in a .mini AST."""
 
+    __slots__ = ("expression",)
+
     def __init__(self, linenum: int, expression : expression_ast.Expression):
         super().__init__(linenum)
         self.expression = expression # expression may be None
@@ -1,15 +1,19 @@
 from miniast import mini_ast, expression_ast
 
 class Type(mini_ast.MiniASTNode):
+    __slots__ = ()
     #def accept(self, visitor: mini_ast.ASTVisitor):
     #    return visitor.visit_type(self)
-    pass
 
 class IntType(Type):
+    __slots__ = ()
+
     def accept(self, visitor: mini_ast.ASTVisitor):
         return visitor.visit_int_type(self)
 
 class BoolType(Type):
+    __slots__ = ()
+
     def accept(self, visitor: mini_ast.ASTVisitor):
         return visitor.visit_bool_type(self)
 
@@ -20,6 +24,8 @@ class BoolType(Type):
 class StructType(Type):
     """Struct Types in a .mini AST"""
 
+    __slots__ = ("linenum", "name")
+
     def __init__(self, linenum : int, name : expression_ast.IdentifierExpression):
         self.linenum = linenum
         self.name = name
@@ -28,9 +34,11 @@ class StructType(Type):
         return visitor.visit_struct_type(self)
     
 class ReturnType(mini_ast.MiniASTNode):
-    pass
+    __slots__ = ()
 
 class ReturnTypeReal(ReturnType):
+    __slots__ = ("type_",)
+
     def __init__(self, type_: Type):
         self.type_ = type_
 
@@ -38,5 +46,7 @@ class ReturnTypeReal(ReturnType):
         return visitor.visit_return_type_real(self)
     
 class ReturnTypeVoid(ReturnType):
+    __slots__ = ()
+
     def accept(self, visitor: mini_ast.ASTVisitor):
         return visitor.visit_return_type_void(self)
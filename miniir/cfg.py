@@ -0,0 +1,193 @@
+"""Control-flow graph and dominator analyses of an ir.Function.
+
+Blocks are numbered by their position in function.blocks and every table is
+a list indexed by that number, so the analyses do no hashing in their inner
+loops. Dominators are computed with the iterative algorithm of Cooper, Harvey
+and Kennedy ("A Simple, Fast Dominance Algorithm"), which converges in two or
+three passes over the reverse postorder on the graphs Mini produces.
+"""
+from typing import Dict, List, Set
+from miniir import ir
+
+UNREACHABLE = -1
+
+
+class CFG:
+    """Successors, predecessors, reverse postorder, dominator tree and
+    dominance frontiers of one function.
+
+    idom[b] is the immediate dominator of block b (the entry is its own), or
+    UNREACHABLE for a block that cannot be reached from the entry. The entry
+    must not be a branch target, which IRBuilder guarantees. A CFG is a
+    snapshot: build a new one after changing the blocks or their edges.
+    """
+
+    __slots__ = ("function", "blocks", "index", "succs", "preds", "rpo", "rpo_number",
+                 "idom", "children", "frontiers", "preorder", "postorder")
+
+    def __init__(self, function: ir.Function):
+        self.function = function
+        self.blocks: List[ir.BasicBlock] = list(function.blocks)
+        self.index = {block: i for i, block in enumerate(self.blocks)}
+        self.succs: List[List[int]] = [[self.index[target] for target in block.successors()]
+                                       for block in self.blocks]
+        self.preds: List[List[int]] = [[] for _ in self.blocks]
+        for b, succs in enumerate(self.succs):
+            for s in succs:
+                self.preds[s].append(b)
+        self.compute_rpo()
+        self.compute_dominators()
+        self.compute_dominator_tree()
+        self.compute_frontiers()
+
+    def compute_rpo(self):
+        # Iterative depth-first search; a recursive one overflows on long functions
+        n = len(self.blocks)
+        visited = [False] * n
+        postorder = []
+        if n:
+            visited[0] = True
+            stack = [(0, iter(self.succs[0]))]
+            while stack:
+                b, successors = stack[-1]
+                for s in successors:
+                    if not visited[s]:
+                        visited[s] = True
+                        stack.append((s, iter(self.succs[s])))
+                        break
+                else:
+                    stack.pop()
+                    postorder.append(b)
+        self.rpo = postorder[::-1]
+        self.rpo_number = [UNREACHABLE] * n
+        for number, b in enumerate(self.rpo):
+            self.rpo_number[b] = number
+
+    def compute_dominators(self):
+        rpo_number = self.rpo_number
+        idom = [UNREACHABLE] * len(self.blocks)
+        if not self.rpo:
+            self.idom = idom
+            return
+        idom[0] = 0
+        changed = True
+        while changed:
+            changed = False
+            for b in self.rpo[1:]:
+                new_idom = UNREACHABLE
+                for p in self.preds[b]:
+                    if idom[p] == UNREACHABLE:
+                        continue
+                    if new_idom == UNREACHABLE:
+                        new_idom = p
+                        continue
+                    # intersect: walk both fingers up the tree until they meet
+                    finger1, finger2 = p, new_idom
+                    while finger1 != finger2:
+                        while rpo_number[finger1] > rpo_number[finger2]:
+                            finger1 = idom[finger1]
+                        while rpo_number[finger2] > rpo_number[finger1]:
+                            finger2 = idom[finger2]
+                    new_idom = finger1
+                if idom[b] != new_idom:
+                    idom[b] = new_idom
+                    changed = True
+        self.idom = idom
+
+    def compute_dominator_tree(self):
+        # Children in reverse postorder, plus pre/post numbers for O(1) dominance queries
+        n = len(self.blocks)
+        self.children: List[List[int]] = [[] for _ in range(n)]
+        for b in self.rpo[1:]:
+            self.children[self.idom[b]].append(b)
+        self.preorder = [UNREACHABLE] * n
+        self.postorder = [UNREACHABLE] * n
+        if not self.rpo:
+            return
+        counter = 0
+        stack = [(0, iter(self.children[0]))]
+        self.preorder[0] = counter
+        while stack:
+            b, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                self.postorder[b] = counter
+                counter += 1
+            else:
+                counter += 1
+                self.preorder[child] = counter
+                stack.append((child, iter(self.children[child])))
+
+    def compute_frontiers(self):
+        idom = self.idom
+        frontiers: List[List[int]] = [[] for _ in self.blocks]
+        for b, preds in enumerate(self.preds):
+            if len(preds) < 2 or idom[b] == UNREACHABLE:
+                continue
+            for p in preds:
+                runner = p
+                while runner != idom[b] and idom[runner] != UNREACHABLE:
+                    # b is finished before the next join, so a repeat is always the last entry
+                    frontier = frontiers[runner]
+                    if not frontier or frontier[-1] != b:
+                        frontier.append(b)
+                    runner = idom[runner]
+        self.frontiers = frontiers
+
+    def dominates(self, a: int, b: int) -> bool:
+        """Whether block a dominates block b (every block dominates itself)."""
+        if self.preorder[a] == UNREACHABLE or self.preorder[b] == UNREACHABLE:
+            return False
+        return self.preorder[a] <= self.preorder[b] and self.postorder[b] <= self.postorder[a]
+
+    def reachable(self, b: int) -> bool:
+        return self.rpo_number[b] != UNREACHABLE
+
+    def dominator_tree_preorder(self) -> List[int]:
+        """The reachable blocks, each before every block it dominates."""
+        order = []
+        stack = [0] if self.rpo else []
+        while stack:
+            b = stack.pop()
+            order.append(b)
+            stack.extend(reversed(self.children[b]))
+        return order
+
+    def natural_loops(self) -> Dict[int, Set[int]]:
+        """Maps each loop header to the blocks of its natural loop.
+
+        An edge b -> h is a back edge when h dominates b; the loop is h plus
+        every block that reaches b without passing through h. Back edges to
+        the same header share one loop.
+        """
+        loops: Dict[int, Set[int]] = {}
+        for b in self.rpo:
+            for h in self.succs[b]:
+                if not self.dominates(h, b):
+                    continue
+                body = loops.setdefault(h, {h})
+                stack = [b]
+                while stack:
+                    x = stack.pop()
+                    if x not in body:
+                        body.add(x)
+                        stack.extend(self.preds[x])
+        return loops
+
+    def loop_depths(self) -> List[int]:
+        """The number of natural loops each block belongs to."""
+        depths = [0] * len(self.blocks)
+        for body in self.natural_loops().values():
+            for b in body:
+                depths[b] += 1
+        return depths
+
+    def __repr__(self):
+        lines = [f"cfg {self.function.name}:"]
+        for b in self.rpo:
+            block = self.blocks[b]
+            lines.append(f"  {block.label}: preds [{', '.join(self.blocks[p].label for p in self.preds[b])}]"
+                         f" idom {self.blocks[self.idom[b]].label}"
+                         f" df [{', '.join(self.blocks[f].label for f in self.frontiers[b])}]")
+        return "\n".join(lines)
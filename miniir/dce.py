@@ -0,0 +1,161 @@
+"""Dead code elimination and control-flow cleanup on SSA form.
+
+remove_dead_instructions keeps only the instructions that have an effect
+(stores, calls, input and output, allocation, control flow) and those that
+compute values they use, transitively; in SSA form this removes every dead
+assignment to a local, phi cycles that only feed each other included.
+simplify_cfg then drops unreachable blocks, turns branches whose targets
+agree into jumps, sends jumps through empty blocks straight to where they
+lead, and merges a block into its only predecessor when that ends in a jump
+to it.
+"""
+from typing import Dict, List
+from miniir import ir
+
+# Instructions that must stay even when nothing uses their result
+EFFECTS = frozenset([ir.STORE, ir.STORE_GLOBAL, ir.CALL, ir.NEW, ir.DELETE, ir.READ, ir.PRINT, ir.PRINTLN,
+                     ir.JUMP, ir.BRANCH, ir.RET])
+
+
+def eliminate_dead_code(module: ir.Module) -> Dict[str, Dict[str, int]]:
+    """Removes the dead code of every function of module, which must be in
+    SSA form, and returns what was removed from each function by name."""
+    stats = {}
+    for function in module.functions:
+        instructions = remove_dead_instructions(function)
+        blocks = simplify_cfg(function)
+        stats[function.name] = {"dead instructions": instructions, "blocks removed": blocks}
+    return stats
+
+
+def remove_dead_instructions(function: ir.Function) -> int:
+    """Mark and sweep over SSA values; returns the number of instructions removed.
+    Calls whose result is unused lose their destination."""
+    definition: Dict[ir.VReg, ir.Instr] = {}
+    worklist: List[ir.Instr] = []
+    for block in function.blocks:
+        for instr in block.instrs:
+            if instr.dest is not None:
+                definition[instr.dest] = instr
+            if instr.op in EFFECTS:
+                worklist.append(instr)
+    marked = set(worklist)
+    used = set()
+    while worklist:
+        for arg in worklist.pop().args:
+            used.add(arg)
+            instr = definition.get(arg)
+            if instr is not None and instr not in marked:
+                marked.add(instr)
+                worklist.append(instr)
+
+    removed = 0
+    for block in function.blocks:
+        kept = [instr for instr in block.instrs if instr in marked]
+        removed += len(block.instrs) - len(kept)
+        block.instrs = kept
+        for instr in kept:
+            if instr.dest is not None and instr.op == ir.CALL and instr.dest not in used:
+                instr.dest = None
+    return removed
+
+
+def phis(block: ir.BasicBlock) -> List[ir.Instr]:
+    result = []
+    for instr in block.instrs:
+        if instr.op != ir.PHI:
+            break
+        result.append(instr)
+    return result
+
+
+def remove_unreachable_blocks(function: ir.Function) -> bool:
+    # Drops the blocks the entry cannot reach and their phi inputs; returns whether any were removed
+    reachable = {function.blocks[0]}
+    stack = [function.blocks[0]]
+    while stack:
+        for successor in stack.pop().successors():
+            if successor not in reachable:
+                reachable.add(successor)
+                stack.append(successor)
+    if len(reachable) == len(function.blocks):
+        return False
+    function.blocks = [block for block in function.blocks if block in reachable]
+    for block in function.blocks:
+        for phi in phis(block):
+            incoming = [(arg, pred) for arg, pred in zip(phi.args, phi.targets) if pred in reachable]
+            phi.args = [arg for arg, pred in incoming]
+            phi.targets = [pred for arg, pred in incoming]
+    return True
+
+
+def simplify_cfg(function: ir.Function) -> int:
+    """Cleans up the CFG of function until nothing changes; returns the
+    number of blocks removed."""
+    before = len(function.blocks)
+    entry = function.blocks[0]
+
+    def forwarding(block):
+        # The block a block holding nothing but a jump forwards to, or None
+        if block is entry or len(block.instrs) != 1 or block.instrs[0].op != ir.JUMP:
+            return None
+        target = block.instrs[0].targets[0]
+        return target if target is not block else None
+
+    changed = True
+    while changed:
+        changed = remove_unreachable_blocks(function)
+        preds: Dict[ir.BasicBlock, List[ir.BasicBlock]] = {block: [] for block in function.blocks}
+        for block in function.blocks:
+            for successor in block.successors():
+                preds[successor].append(block)
+        merged = set()
+        for block in function.blocks:
+            if block in merged:
+                continue
+            while True:
+                terminator = block.terminator()
+                targets = terminator.targets
+                if terminator.op == ir.BRANCH and targets[0] is targets[1] and not phis(targets[0]):
+                    preds[targets[0]].remove(block)
+                    terminator.op, terminator.args, terminator.targets = ir.JUMP, [], [targets[0]]
+                    changed = True
+                    continue
+
+                # Jump over empty blocks. Into a block with phis only when this is the empty
+                # block's sole predecessor and not already a predecessor itself
+                threaded = False
+                for i, target in enumerate(targets):
+                    final = forwarding(target)
+                    if final is None or forwarding(final) is not None:
+                        continue
+                    if phis(final):
+                        if preds[target] != [block] or block in preds[final]:
+                            continue
+                        for phi in phis(final):
+                            phi.targets = [block if pred is target else pred for pred in phi.targets]
+                        preds[final].remove(target)
+                    preds[target].remove(block)
+                    preds[final].append(block)
+                    targets[i] = final
+                    threaded = changed = True
+                if threaded:
+                    continue
+
+                # Merge the target of a jump that has no other predecessor
+                if terminator.op == ir.JUMP:
+                    target = targets[0]
+                    if target is not entry and target is not block and preds[target] == [block]:
+                        for phi in phis(target):
+                            phi.op, phi.targets = ir.MOV, []
+                        block.instrs[-1:] = target.instrs
+                        for successor in target.successors():
+                            preds[successor] = [block if pred is target else pred for pred in preds[successor]]
+                            for phi in phis(successor):
+                                phi.targets = [block if pred is target else pred for pred in phi.targets]
+                        merged.add(target)
+                        changed = True
+                        continue
+                break
+        function.blocks = [block for block in function.blocks if block not in merged]
+    return before - len(function.blocks)
@@ -0,0 +1,175 @@
+"""Global value numbering and redundant load elimination on SSA form.
+
+Blocks are visited in dominator tree preorder with a scoped table of the
+expressions computed so far (the dominator-based value numbering of Briggs,
+Cooper and Simpson): an instruction computing the same operation on the same
+values as one in a dominating block is removed and its uses take the
+earlier result. Copies are propagated, commutative operands are put in a
+canonical order, a > b is numbered as b < a, and phis whose inputs all
+agree, or that repeat another phi of their block, are removed as well.
+
+Loads are numbered the same way, by field and base, while the memory they
+read is known not to have changed. Alias analysis is by type: Mini has no
+casts or address-of, so a store can only change the struct.field it names
+(a store to Node.next never changes a Node.value, nor a List.next), and a
+store makes the value it wrote available to loads of the same field and
+base. Calls and delete end the availability of every load; so does a store
+to the same global for loads of globals. A block inherits the loads of its
+immediate dominator only for fields no block on a path between the two
+writes to.
+"""
+from typing import Dict, List, Set
+from miniir import ir
+from miniir.cfg import CFG
+
+COMMUTATIVE = frozenset([ir.ADD, ir.MUL, ir.EQ, ir.NE])
+SWAPPED = {ir.GT: ir.LT, ir.GE: ir.LE}
+EVERYTHING = None  # the kill set of a block with a call or delete
+
+
+def number_values(module: ir.Module) -> Dict[str, Dict[str, int]]:
+    """Removes the redundant computations of every function of module, which
+    must be in SSA form, and returns what was removed from each by name."""
+    return {function.name: ValueNumbering(function).stats for function in module.functions}
+
+
+def kills(block: ir.BasicBlock):
+    # The fields and globals a block may write, or EVERYTHING
+    written = set()
+    for instr in block.instrs:
+        if instr.op in (ir.CALL, ir.DELETE):
+            return EVERYTHING
+        if instr.op in (ir.STORE, ir.STORE_GLOBAL):
+            written.add(instr.symbol)
+    return written
+
+
+class ValueNumbering:
+    """Numbers the values of one function in SSA form and rewrites it.
+
+    leader maps each removed VReg to the VReg that replaces it. available
+    holds, at the end of every visited block, {field or global: {base: VReg}}
+    for the memory values known there (the base of a global is None).
+    """
+
+    def __init__(self, function: ir.Function):
+        self.function = function
+        self.cfg = cfg = CFG(function)
+        self.leader: Dict[ir.VReg, ir.VReg] = {}
+        self.stats = {"redundant expressions": 0, "redundant loads": 0, "copies propagated": 0}
+        self.kills = [kills(block) for block in cfg.blocks]
+        self.available: Dict[int, Dict[str, Dict]] = {}
+
+        table = {}
+        undo: List[List] = []
+        stack = [(0, True)] if cfg.rpo else []
+        while stack:
+            b, entering = stack.pop()
+            if not entering:
+                for key in undo.pop():
+                    del table[key]
+                continue
+            added = []
+            self.visit(b, table, added)
+            undo.append(added)
+            stack.append((b, False))
+            stack.extend((child, True) for child in reversed(cfg.children[b]))
+
+        for block in cfg.blocks:
+            for instr in block.instrs:
+                instr.args = [self.find(arg) for arg in instr.args]
+
+    def find(self, vreg: ir.VReg) -> ir.VReg:
+        while vreg in self.leader:
+            vreg = self.leader[vreg]
+        return vreg
+
+    def inherited(self, b: int) -> Dict[str, Dict]:
+        # The memory values of the immediate dominator still valid on entry to b
+        if b == 0:
+            return {}
+        d = self.cfg.idom[b]
+        written: Set = set()
+        seen = {d}
+        stack = [p for p in self.cfg.preds[b] if p != d]
+        while stack:
+            p = stack.pop()
+            if p in seen:
+                continue
+            seen.add(p)
+            if self.kills[p] is EVERYTHING:
+                return {}
+            written |= self.kills[p]
+            stack.extend(self.cfg.preds[p])
+        return {symbol: dict(values) for symbol, values in self.available[d].items() if symbol not in written}
+
+    def key(self, instr: ir.Instr):
+        op, args = instr.op, instr.args
+        if op in COMMUTATIVE:
+            args = sorted(args, key=lambda vreg: vreg.id)
+        elif op in SWAPPED:
+            op, args = SWAPPED[op], args[::-1]
+        return (op, tuple(args), instr.imm)
+
+    def visit(self, b: int, table, added):
+        block = self.cfg.blocks[b]
+        memory = self.inherited(b)
+        constants = {}
+        kept = []
+        for instr in block.instrs:
+            op = instr.op
+            if op != ir.PHI:
+                instr.args = [self.find(arg) for arg in instr.args]
+            if op == ir.MOV:
+                self.leader[instr.dest] = instr.args[0]
+                self.stats["copies propagated"] += 1
+                continue
+
+            if op == ir.PHI:
+                # Inputs along back edges have not been numbered yet, which only makes this conservative
+                inputs = {self.find(arg) for arg in instr.args} - {instr.dest}
+                if len(inputs) == 1:
+                    self.leader[instr.dest] = inputs.pop()
+                    self.stats["redundant expressions"] += 1
+                    continue
+                key = (ir.PHI, b, tuple((self.find(arg), pred) for arg, pred in zip(instr.args, instr.targets)))
+            elif op == ir.CONST:
+                # Shared within the block only: li is as cheap as a copy and keeps live ranges short
+                if instr.imm in constants:
+                    self.leader[instr.dest] = constants[instr.imm]
+                    self.stats["redundant expressions"] += 1
+                    continue
+                constants[instr.imm] = instr.dest
+                kept.append(instr)
+                continue
+            elif op in ir.BINARY_OPS or op in ir.UNARY_OPS or op in ir.SHIFT_OPS:
+                key = self.key(instr)
+            elif op == ir.LOAD or op == ir.LOAD_GLOBAL:
+                base = instr.args[0] if op == ir.LOAD else None
+                values = memory.setdefault(instr.symbol, {})
+                if base in values:
+                    self.leader[instr.dest] = values[base]
+                    self.stats["redundant loads"] += 1
+                    continue
+                values[base] = instr.dest
+                kept.append(instr)
+                continue
+            else:
+                if op == ir.STORE:
+                    memory[instr.symbol] = {instr.args[0]: instr.args[1]}
+                elif op == ir.STORE_GLOBAL:
+                    memory[instr.symbol] = {None: instr.args[0]}
+                elif op in (ir.CALL, ir.DELETE):
+                    memory = {}
+                kept.append(instr)
+                continue
+
+            if key in table:
+                self.leader[instr.dest] = table[key]
+                self.stats["redundant expressions"] += 1
+                continue
+            table[key] = instr.dest
+            added.append(key)
+            kept.append(instr)
+        block.instrs = kept
+        self.available[b] = memory
@@ -0,0 +1,258 @@
+"""Induction variables and strength reduction on SSA form.
+
+A basic induction variable is a phi of a loop header whose value from the
+latch is the phi plus or minus a constant step. A multiplication in the loop
+of such a variable (at the phi or after its step) by a loop invariant is
+replaced by a new induction variable that starts at init * factor in the
+preheader and grows by step * factor next to the original step, so the loop
+adds where it multiplied.
+
+Linear-function test replacement then rewrites the loop's exit test i < n
+as t < n * factor on a reduced variable t, leaving i to dead code
+elimination when nothing else reads it. Mini integers wrap, so this is only
+done when the start, the bound and the step are constants that keep every
+value the test compares, times the factor, inside 32 bits.
+
+Finally multiplications by a power of two become shifts, and so do
+divisions by a power of two, with a correction that rounds negative
+dividends toward zero like div: x / 2^k is (x + (x >> 31 >>> 32-k)) >> k.
+"""
+from typing import Dict, List
+from miniir import ir
+from miniir.cfg import CFG
+from miniir.licm import insert_preheaders
+from int32 import wrap32
+
+INT_MIN, INT_MAX = -2 ** 31, 2 ** 31 - 1
+MIRRORED = {ir.LT: ir.GT, ir.LE: ir.GE, ir.GT: ir.LT, ir.GE: ir.LE}
+
+
+def reduce_strength(module: ir.Module) -> Dict[str, Dict[str, int]]:
+    """Reduces the strength of every function of module, which must be in
+    SSA form, and returns what was changed in each function by name."""
+    return {function.name: StrengthReduction(function).stats for function in module.functions}
+
+
+def fits(*values) -> bool:
+    return all(INT_MIN <= value <= INT_MAX for value in values)
+
+
+class InductionVariable:
+    """A basic induction variable: phi = phi(init from the preheader, next from the latch),
+    with next computed by increment as phi + step."""
+
+    __slots__ = ("phi", "init", "next", "step", "increment")
+
+    def __init__(self, phi: ir.VReg, init: ir.VReg, next: ir.VReg, step: int, increment: ir.Instr):
+        self.phi = phi
+        self.init = init
+        self.next = next
+        self.step = step
+        self.increment = increment
+
+
+class StrengthReduction:
+    """Strength reduction of one function in SSA form; stats holds what it changed."""
+
+    def __init__(self, function: ir.Function):
+        self.function = function
+        self.stats = {"induction variables": 0, "multiplications reduced": 0, "tests replaced": 0, "shifts": 0}
+        insert_preheaders(function)
+        self.cfg = cfg = CFG(function)
+        self.definition: Dict[ir.VReg, ir.Instr] = {instr.dest: instr for block in function.blocks
+                                                    for instr in block.instrs if instr.dest is not None}
+        # Innermost loops first: what a reduction puts in an inner preheader may reduce in the outer loop
+        for header, body in sorted(cfg.natural_loops().items(), key=lambda loop: len(loop[1])):
+            self.reduce_loop(header, body)
+        for block in function.blocks:
+            self.shift_powers_of_two(block)
+
+    def constant(self, vreg: ir.VReg):
+        instr = self.definition.get(vreg)
+        return instr.imm if instr is not None and instr.op == ir.CONST else None
+
+    def emit(self, block: ir.BasicBlock, op, args=(), imm=None) -> ir.VReg:
+        # Adds an instruction before the terminator of block and returns its VReg
+        dest = self.function.new_vreg()
+        instr = ir.Instr(op, dest, args, imm)
+        block.instrs.insert(len(block.instrs) - 1, instr)
+        self.definition[dest] = instr
+        return dest
+
+    def induction_variables(self, header, preheader, latch, defined) -> List[InductionVariable]:
+        ivs = []
+        for phi in self.cfg.blocks[header].instrs:
+            if phi.op != ir.PHI:
+                break
+            init = phi.args[phi.targets.index(preheader)]
+            next = phi.args[phi.targets.index(latch)]
+            increment = self.definition.get(next)
+            if next not in defined or increment.op not in (ir.ADD, ir.SUB) or phi.dest not in increment.args:
+                continue
+            if increment.op == ir.SUB and increment.args[0] is not phi.dest:
+                continue
+            other = increment.args[1] if increment.args[0] is phi.dest else increment.args[0]
+            step = self.constant(other)
+            if step is None:
+                continue
+            ivs.append(InductionVariable(phi.dest, init, next, wrap32(-step) if increment.op == ir.SUB else step,
+                                         increment))
+        return ivs
+
+    def reduce_loop(self, header: int, body):
+        cfg = self.cfg
+        inside = [p for p in cfg.preds[header] if p in body]
+        if len(inside) != 1:
+            return
+        preheader = cfg.blocks[[p for p in cfg.preds[header] if p not in body][0]]
+        latch = cfg.blocks[inside[0]]
+        defined = {instr.dest for b in body for instr in cfg.blocks[b].instrs if instr.dest is not None}
+        ivs = self.induction_variables(header, preheader, latch, defined)
+        if not ivs:
+            return
+        self.stats["induction variables"] += len(ivs)
+        family = {}
+        for iv in ivs:
+            family[iv.phi] = (iv, False)
+            family[iv.next] = (iv, True)
+
+        derived = {}  # (phi, factor) -> (t, t_next), with the factor's value when it is a constant
+        substitute = {}
+
+        def reduce(instr: ir.Instr) -> bool:
+            for value, factor in (instr.args, instr.args[::-1]):
+                if value in family and (factor not in defined or self.constant(factor) is not None):
+                    iv, after_step = family[value]
+                    constant = self.constant(factor)
+                    key = (iv.phi, factor if constant is None else constant)
+                    if key not in derived:
+                        derived[key] = self.derive(iv, factor, constant, cfg.blocks[header], preheader, latch)
+                    substitute[instr.dest] = derived[key][after_step]
+                    del self.definition[instr.dest]
+                    self.stats["multiplications reduced"] += 1
+                    return True
+            return False
+
+        # Reductions add to the loop's blocks, so the multiplications are collected first
+        multiplications = [instr for b in body for instr in cfg.blocks[b].instrs if instr.op == ir.MUL]
+        reduced = {instr for instr in multiplications if reduce(instr)}
+        for b in body:
+            block = cfg.blocks[b]
+            block.instrs = [instr for instr in block.instrs if instr not in reduced]
+        if substitute:
+            for block in self.function.blocks:
+                for instr in block.instrs:
+                    instr.args = [substitute.get(arg, arg) for arg in instr.args]
+        for iv in ivs:
+            reductions = [(factor, values) for (phi, factor), values in derived.items()
+                          if phi is iv.phi and isinstance(factor, int) and factor != 0]
+            if reductions:
+                self.replace_test(iv, reductions[0], body, preheader, latch)
+
+    def derive(self, iv: InductionVariable, factor: ir.VReg, constant, header, preheader, latch):
+        # The induction variable iv * factor: a phi in the header and its step after iv's
+        init = self.constant(iv.init)
+        if constant is not None:
+            step = self.emit(preheader, ir.CONST, imm=wrap32(iv.step * constant))
+            if init is not None:
+                start = self.emit(preheader, ir.CONST, imm=wrap32(init * constant))
+            else:
+                start = self.emit(preheader, ir.MUL, [iv.init, self.emit(preheader, ir.CONST, imm=constant)])
+        else:
+            step = factor if iv.step == 1 else \
+                self.emit(preheader, ir.MUL, [self.emit(preheader, ir.CONST, imm=iv.step), factor])
+            start = (self.emit(preheader, ir.CONST, imm=0) if init == 0 else factor if init == 1 else
+                     self.emit(preheader, ir.MUL, [iv.init, factor]))
+        t = self.function.new_vreg()
+        t_next = self.function.new_vreg()
+        phi = ir.Instr(ir.PHI, t, [start if pred is preheader else t_next for pred in header.instrs[0].targets],
+                       targets=header.instrs[0].targets)
+        header.instrs.insert(0, phi)
+        increment = ir.Instr(ir.ADD, t_next, [t, step])
+        for block in self.function.blocks:
+            if iv.increment in block.instrs:
+                block.instrs.insert(block.instrs.index(iv.increment) + 1, increment)
+                break
+        self.definition[t] = phi
+        self.definition[t_next] = increment
+        return t, t_next
+
+    def replace_test(self, iv: InductionVariable, reduction, body, preheader, latch):
+        # Rewrites the loop test on iv as a test on the reduced variable, when nothing
+        # but that test, the step and the phi reads iv
+        factor, (t, t_next) = reduction
+        cfg = self.cfg
+        users = []
+        for b, block in enumerate(cfg.blocks):
+            for instr in block.instrs:
+                if iv.phi in instr.args or iv.next in instr.args:
+                    users.append((b, instr))
+        tests = [(b, instr) for b, instr in users if instr is not iv.increment
+                 and not (instr.op == ir.PHI and iv.phi is instr.dest)]
+        if len(tests) != 1:
+            return
+        b, test = tests[0]
+        if test.op not in MIRRORED or b not in body or not cfg.dominates(b, cfg.index[latch]):
+            return
+        op, (value, bound) = test.op, test.args
+        if value is not iv.phi and value is not iv.next:
+            op, (bound, value) = MIRRORED[op], test.args
+        n = self.constant(bound)
+        init = self.constant(iv.init)
+        if n is None or init is None or value not in (iv.phi, iv.next) or bound in (iv.phi, iv.next):
+            return
+        # The loop must stay while the test holds and leave as soon as it fails
+        branch = cfg.blocks[b].terminator()
+        if branch.op != ir.BRANCH or branch.args[0] is not test.dest or \
+                cfg.index[branch.targets[0]] not in body or cfg.index[branch.targets[1]] in body:
+            return
+        if any(test.dest in instr.args for block in cfg.blocks for instr in block.instrs if instr is not branch):
+            return
+
+        first = init + iv.step if value is iv.next else init
+        step = iv.step
+        if step > 0 and op in (ir.LT, ir.LE):
+            low, high = first, max(first, n + step - (op == ir.LT))
+        elif step < 0 and op in (ir.GT, ir.GE):
+            low, high = min(first, n + step + (op == ir.GT)), first
+        else:
+            return
+        if not fits(init, low, high, low * factor, high * factor, n * factor):
+            return
+        test.op = op if factor > 0 else MIRRORED[op]
+        test.args = [t_next if value is iv.next else t, self.emit(preheader, ir.CONST, imm=n * factor)]
+        self.stats["tests replaced"] += 1
+
+    def shift_powers_of_two(self, block: ir.BasicBlock):
+        instrs = []
+        for instr in block.instrs:
+            if instr.op == ir.MUL:
+                for value, factor in (instr.args, instr.args[::-1]):
+                    k = self.log2(self.constant(factor))
+                    if k:
+                        instr.op, instr.args, instr.imm = ir.SHL, [value], k
+                        self.stats["shifts"] += 1
+                        break
+            elif instr.op == ir.DIV and self.log2(self.constant(instr.args[1])):
+                k = self.log2(self.constant(instr.args[1]))
+                x = instr.args[0]
+                # Adds 2^k - 1 to a negative x so the arithmetic shift rounds toward zero
+                sign = x
+                if k > 1:
+                    sign = self.function.new_vreg()
+                    instrs.append(ir.Instr(ir.SRA, sign, [x], 31))
+                bias = self.function.new_vreg()
+                instrs.append(ir.Instr(ir.SRL, bias, [sign], 32 - k))
+                biased = self.function.new_vreg()
+                instrs.append(ir.Instr(ir.ADD, biased, [x, bias]))
+                instr.op, instr.args, instr.imm = ir.SRA, [biased], k
+                self.stats["shifts"] += 1
+            instrs.append(instr)
+        block.instrs = instrs
+
+    @staticmethod
+    def log2(value):
+        # k for value == 2^k with k >= 1, else None
+        if value is None or value < 2 or value & (value - 1):
+            return None
+        return value.bit_length() - 1
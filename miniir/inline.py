@@ -0,0 +1,191 @@
+"""Function inlining on SSA form.
+
+Calls are inlined bottom-up over the call graph, so a function's own calls
+have been inlined by the time its size is weighed. Functions that are part
+of a cycle of calls (recursion, direct or mutual) and main are never
+inlined. A call site is inlined when the callee's size in instructions,
+less what the call costs the caller (argument moves, the jal, and the
+callee's prologue and epilogue) and a bonus per constant argument, is at
+most size_limit; a callee called from a single place is inlined up to
+single_call_limit instructions, since its own copy then disappears. No
+caller grows past growth_limit instructions. Functions left without callers
+are removed.
+
+The callee's blocks are copied into the caller with fresh VRegs, its
+parameters replaced by the arguments; returns jump to the rest of the
+calling block, where a phi merges the returned values.
+"""
+from typing import Dict, List, Set
+from miniir import ir
+
+SIZE_LIMIT = 12
+SINGLE_CALL_LIMIT = 400
+GROWTH_LIMIT = 3000
+CALL_COST = 6              # jal, ret and the prologue and epilogue of a small function
+CONSTANT_ARGUMENT_BONUS = 3
+
+
+def size(function: ir.Function) -> int:
+    return sum(len(block.instrs) for block in function.blocks)
+
+
+def calls(function: ir.Function):
+    return [instr for block in function.blocks for instr in block.instrs if instr.op == ir.CALL]
+
+
+def recursive_functions(functions: Dict[str, ir.Function]) -> Set[str]:
+    # The functions on a cycle of the call graph: those that can reach themselves
+    callees = {name: {instr.symbol for instr in calls(function)} for name, function in functions.items()}
+    recursive = set()
+    for name in functions:
+        seen = set()
+        stack = list(callees[name])
+        while stack:
+            callee = stack.pop()
+            if callee == name:
+                recursive.add(name)
+                break
+            if callee not in seen:
+                seen.add(callee)
+                stack.extend(callees[callee])
+    return recursive
+
+
+def bottom_up(functions: Dict[str, ir.Function]) -> List[str]:
+    # Callees before their callers, cycles in any order
+    order = []
+    done = set()
+    for root in functions:
+        stack = [(root, False)]
+        while stack:
+            name, finished = stack.pop()
+            if finished:
+                order.append(name)
+                continue
+            if name in done:
+                continue
+            done.add(name)
+            stack.append((name, True))
+            stack.extend((instr.symbol, False) for instr in calls(functions[name]))
+    return order
+
+
+class Inliner:
+    """Inlines calls in a module in SSA form under the limits above.
+
+    decisions lists, for every call site considered, whether it was inlined
+    and why, as printed by mini_compiler.py --stats.
+    """
+
+    def __init__(self, size_limit: int = SIZE_LIMIT, single_call_limit: int = SINGLE_CALL_LIMIT,
+                 growth_limit: int = GROWTH_LIMIT):
+        self.size_limit = size_limit
+        self.single_call_limit = single_call_limit
+        self.growth_limit = growth_limit
+        self.decisions: List[str] = []
+        self.sites: Dict[str, int] = {}  # the number of calls of each function
+
+    def run(self, module: ir.Module) -> Dict[str, Dict[str, int]]:
+        functions = {function.name: function for function in module.functions}
+        recursive = recursive_functions(functions)
+        self.sites = sites = {}
+        for function in module.functions:
+            for instr in calls(function):
+                sites[instr.symbol] = sites.get(instr.symbol, 0) + 1
+        called = set(sites)
+        stats = {name: {"inlined": 0, "not inlined": 0} for name in functions}
+
+        for name in bottom_up(functions):
+            caller = functions[name]
+            b = 0
+            while b < len(caller.blocks):
+                block = caller.blocks[b]
+                for i, instr in enumerate(block.instrs):
+                    if instr.op == ir.CALL and self.decide(caller, instr, functions[instr.symbol], recursive):
+                        self.inline(caller, b, i, functions[instr.symbol])
+                        stats[name]["inlined"] += 1
+                        sites[instr.symbol] -= 1
+                        if sites[instr.symbol] == 0:
+                            # The callee is removed below, and the calls in its body with it
+                            for call in calls(functions[instr.symbol]):
+                                sites[call.symbol] -= 1
+                        break
+                    if instr.op == ir.CALL:
+                        stats[name]["not inlined"] += 1
+                b += 1
+
+        for name in called:
+            if sites[name] == 0 and name != "main":
+                self.decisions.append(f"{name} removed: every call was inlined")
+        module.functions = [function for function in module.functions
+                            if function.name not in called or sites[function.name]]
+        return {function.name: stats[function.name] for function in module.functions}
+
+    def decide(self, caller: ir.Function, call: ir.Instr, callee: ir.Function, recursive) -> bool:
+        where = f"{caller.name}: call of {callee.name}"
+        if callee.name == "main":
+            self.decisions.append(f"{where} not inlined: main")
+            return False
+        if callee.name in recursive:
+            self.decisions.append(f"{where} not inlined: recursive")
+            return False
+        if not any(block.terminator().op == ir.RET for block in callee.blocks):
+            self.decisions.append(f"{where} not inlined: never returns")
+            return False
+        callee_size = size(callee)
+        constants = sum(1 for arg in call.args if self.is_constant(caller, arg))
+        cost = callee_size - CALL_COST - len(call.args) - CONSTANT_ARGUMENT_BONUS * constants
+        if size(caller) + callee_size > self.growth_limit:
+            self.decisions.append(f"{where} not inlined: {caller.name} would grow past {self.growth_limit}")
+            return False
+        if cost <= self.size_limit:
+            self.decisions.append(f"{where} inlined: size {callee_size}, cost {cost}")
+            return True
+        if self.sites[callee.name] == 1 and callee_size <= self.single_call_limit:
+            self.decisions.append(f"{where} inlined: only call, size {callee_size}")
+            return True
+        self.decisions.append(f"{where} not inlined: size {callee_size}, cost {cost}")
+        return False
+
+    @staticmethod
+    def is_constant(function: ir.Function, vreg: ir.VReg) -> bool:
+        return any(instr.dest is vreg and instr.op == ir.CONST for block in function.blocks for instr in block.instrs)
+
+    def inline(self, caller: ir.Function, b: int, i: int, callee: ir.Function):
+        # Replaces the call at caller.blocks[b].instrs[i] by a copy of callee
+        block = caller.blocks[b]
+        call = block.instrs[i]
+        rest = caller.new_block()
+        rest.instrs = block.instrs[i + 1:]
+        for successor in rest.successors():
+            for phi in successor.instrs:
+                if phi.op != ir.PHI:
+                    break
+                phi.targets = [rest if pred is block else pred for pred in phi.targets]
+
+        vregs = dict(zip(callee.params, call.args))
+        copies = {original: caller.new_block() for original in callee.blocks}
+        for original in callee.blocks:
+            for instr in original.instrs:
+                if instr.dest is not None:
+                    vregs[instr.dest] = caller.new_vreg(instr.dest.name)
+        returns = []
+        for original in callee.blocks:
+            copy = copies[original]
+            for instr in original.instrs:
+                args = [vregs[arg] for arg in instr.args]
+                if instr.op == ir.RET:
+                    if args:
+                        returns.append((args[0], copy))
+                    copy.instrs.append(ir.Instr(ir.JUMP, targets=[rest]))
+                    continue
+                if instr.op == ir.CALL:
+                    self.sites[instr.symbol] += 1
+                copy.instrs.append(ir.Instr(instr.op, vregs.get(instr.dest), args, instr.imm, instr.symbol,
+                                            [copies[target] for target in instr.targets]))
+
+        block.instrs[i:] = [ir.Instr(ir.JUMP, targets=[copies[callee.blocks[0]]])]
+        if call.dest is not None:
+            rest.instrs.insert(0, ir.Instr(ir.PHI, call.dest, [value for value, pred in returns],
+                                           targets=[pred for value, pred in returns]))
+        caller.blocks[b + 1:b + 1] = [copies[original] for original in callee.blocks] + [rest]
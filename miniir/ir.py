@@ -0,0 +1,156 @@
+"""Three-address intermediate representation of .mini programs.
+
+A Module holds the global variables and the Functions of a program. A Function
+is a list of BasicBlocks, the first of which is its entry, and every block is a
+straight line of Instrs that ends in exactly one terminator (jump, branch or
+ret). Values live in an unbounded supply of virtual registers (VReg). Mini
+cannot take the address of a variable, so parameters and locals are VRegs as
+well; memory is only touched through explicit loads and stores of struct
+fields and globals. In SSA form (see ssa.py) blocks may begin with phis.
+"""
+from typing import List, Optional
+
+# ---- opcodes ----
+CONST = "const"         # dest = imm
+MOV = "mov"             # dest = args[0]
+ADD = "add"             # dest = args[0] <op> args[1], 32-bit arithmetic
+SUB = "sub"
+MUL = "mul"
+DIV = "div"
+LT = "lt"               # comparisons produce 0 or 1
+LE = "le"
+GT = "gt"
+GE = "ge"
+EQ = "eq"
+NE = "ne"
+NEG = "neg"             # dest = -args[0]
+NOT = "not"             # dest = args[0] == 0
+SHL = "shl"             # dest = args[0] << imm
+SRA = "sra"             # dest = args[0] >> imm, shifting in copies of the sign bit
+SRL = "srl"             # dest = args[0] >> imm, shifting in zeros
+LOAD = "load"           # dest = mem[args[0] + imm]; symbol names the field as struct.field
+STORE = "store"         # mem[args[0] + imm] = args[1]; symbol as for load
+LOAD_GLOBAL = "loadg"   # dest = global symbol
+STORE_GLOBAL = "storeg" # global symbol = args[0]
+CALL = "call"           # dest = symbol(*args); dest is None when the result is unused
+NEW = "new"             # dest = malloc(imm)
+DELETE = "delete"       # free(args[0])
+READ = "read"           # dest = read_int()
+PRINT = "print"         # print_int(args[0])
+PRINTLN = "println"     # print_int(args[0]) and a newline
+JUMP = "jump"           # goto targets[0]
+BRANCH = "branch"       # goto targets[0] if args[0] != 0 else targets[1]
+RET = "ret"             # return args[0], or nothing if args is empty
+PHI = "phi"             # dest = args[i] when control arrived from targets[i] (SSA form only)
+
+BINARY_OPS = frozenset([ADD, SUB, MUL, DIV, LT, LE, GT, GE, EQ, NE])
+UNARY_OPS = frozenset([NEG, NOT])
+SHIFT_OPS = frozenset([SHL, SRA, SRL])
+TERMINATORS = frozenset([JUMP, BRANCH, RET])
+
+
+class VReg:
+    """A virtual register. name is the source variable it holds, if any."""
+
+    __slots__ = ("id", "name")
+
+    def __init__(self, id: int, name: Optional[str] = None):
+        self.id = id
+        self.name = name
+
+    def __repr__(self):
+        return f"%{self.name}.{self.id}" if self.name else f"%{self.id}"
+
+
+class Instr:
+    """One three-address instruction; see the opcode table for the operand fields."""
+
+    __slots__ = ("op", "dest", "args", "imm", "symbol", "targets")
+
+    def __init__(self, op: str, dest: Optional[VReg] = None, args=(), imm: Optional[int] = None,
+                 symbol: Optional[str] = None, targets=()):
+        self.op = op
+        self.dest = dest
+        self.args: List[VReg] = list(args)
+        self.imm = imm
+        self.symbol = symbol
+        self.targets: List["BasicBlock"] = list(targets)
+
+    def __repr__(self):
+        if self.op == PHI:
+            incoming = ", ".join(f"[{arg!r}, {pred.label}]" for arg, pred in zip(self.args, self.targets))
+            return f"{self.dest!r} = phi {incoming}"
+        operands = [repr(arg) for arg in self.args]
+        if self.symbol is not None:
+            operands.insert(0, self.symbol)
+        if self.imm is not None:
+            operands.append(str(self.imm))
+        operands += [target.label for target in self.targets]
+        text = f"{self.op} {', '.join(operands)}".rstrip()
+        return f"{self.dest!r} = {text}" if self.dest is not None else text
+
+
+class BasicBlock:
+    """A label and a straight line of instructions ending in a terminator."""
+
+    __slots__ = ("label", "instrs")
+
+    def __init__(self, label: str):
+        self.label = label
+        self.instrs: List[Instr] = []
+
+    def terminator(self) -> Optional[Instr]:
+        if self.instrs and self.instrs[-1].op in TERMINATORS:
+            return self.instrs[-1]
+        return None
+
+    def successors(self) -> List["BasicBlock"]:
+        terminator = self.terminator()
+        return terminator.targets if terminator else []
+
+    def __repr__(self):
+        return self.label
+
+
+class Function:
+    """The IR of one .mini function; blocks[0] is the entry block."""
+
+    __slots__ = ("name", "params", "blocks", "returns_value", "vreg_count", "block_count")
+
+    def __init__(self, name: str, returns_value: bool):
+        self.name = name
+        self.params: List[VReg] = []
+        self.blocks: List[BasicBlock] = []
+        self.returns_value = returns_value
+        self.vreg_count = 0
+        self.block_count = 0
+
+    def new_vreg(self, name: Optional[str] = None) -> VReg:
+        self.vreg_count += 1
+        return VReg(self.vreg_count, name)
+
+    def new_block(self) -> BasicBlock:
+        # Labels are prefixed with the function name, so they are unique in the emitted assembly
+        self.block_count += 1
+        return BasicBlock(f"{self.name}_bb{self.block_count}")
+
+    def __repr__(self):
+        lines = [f"fun {self.name}({', '.join(repr(p) for p in self.params)}):"]
+        for block in self.blocks:
+            lines.append(f"{block.label}:")
+            lines.extend(f"    {instr!r}" for instr in block.instrs)
+        return "\n".join(lines)
+
+
+class Module:
+    """The IR of a whole .mini program."""
+
+    __slots__ = ("globals", "functions")
+
+    def __init__(self):
+        self.globals: List[str] = []
+        self.functions: List[Function] = []
+
+    def __repr__(self):
+        lines = [f"global {name}" for name in self.globals]
+        return "\n\n".join(["\n".join(lines)] + [repr(function) for function in self.functions])
@@ -0,0 +1,306 @@
+from typing import Dict, Optional
+from miniast import mini_ast, program_ast, type_ast, statement_ast, expression_ast, lvalue_ast
+from miniir import ir
+
+BINARY_OPCODES = {
+    expression_ast.Operator.PLUS: ir.ADD, expression_ast.Operator.MINUS: ir.SUB,
+    expression_ast.Operator.TIMES: ir.MUL, expression_ast.Operator.DIVIDE: ir.DIV,
+    expression_ast.Operator.LT: ir.LT, expression_ast.Operator.LE: ir.LE,
+    expression_ast.Operator.GT: ir.GT, expression_ast.Operator.GE: ir.GE,
+    expression_ast.Operator.EQ: ir.EQ, expression_ast.Operator.NE: ir.NE,
+}
+
+
+def field(dot) -> str:
+    # struct.field of a DotExpression or LValueDot, from the type semantic analysis recorded on its left side
+    return f"{dot.left.type.name.id}.{dot.id.id}"
+
+
+class IRBuilder(mini_ast.ASTVisitor):
+    """Translates a checked .mini AST into an ir.Module.
+
+    Like CodeGenVisitor it relies on the annotations left by
+    StaticSemanticASTVisitor (bindings, field offsets, struct sizes) and
+    evaluates everything in the same order: operands and arguments left to
+    right, and for a field assignment the target's base before the source.
+    Expression visits return the VReg holding the value. Locals start out as 0.
+
+    With rotate_loops, while (g) s is built as if (g) do s while (g): the
+    guard is copied below the body, so a loop takes one branch per iteration
+    instead of a branch and a jump, and its body runs whenever the loop is
+    entered, which lets LICM hoist loads from it.
+    """
+
+    def __init__(self, rotate_loops: bool = False):
+        self.rotate_loops = rotate_loops
+        self.module = ir.Module()
+        self.function: Optional[ir.Function] = None
+        self.block: Optional[ir.BasicBlock] = None # None after a terminator: following code is unreachable
+        self.variables: Dict[object, ir.VReg] = {} # VariableInfo of a parameter or local -> its VReg
+
+    def build(self, program: program_ast.Program) -> ir.Module:
+        program.accept(self)
+        return self.module
+
+    # ---- emission helpers ----
+
+    def emit(self, op, dest=None, args=(), imm=None, symbol=None, targets=()) -> ir.Instr:
+        if self.block is None:
+            self.start_block(self.function.new_block())
+        instr = ir.Instr(op, dest, args, imm, symbol, targets)
+        self.block.instrs.append(instr)
+        if op in ir.TERMINATORS:
+            self.block = None
+        return instr
+
+    def value(self, op, args=(), imm=None, symbol=None) -> ir.VReg:
+        # Emits an instruction computing a fresh VReg and returns it
+        dest = self.function.new_vreg()
+        self.emit(op, dest, args, imm, symbol)
+        return dest
+
+    def start_block(self, block: ir.BasicBlock):
+        self.function.blocks.append(block)
+        self.block = block
+
+    def jump(self, target: ir.BasicBlock):
+        if self.block is not None:
+            self.emit(ir.JUMP, targets=[target])
+
+    def remove_unreachable_blocks(self):
+        reachable = set()
+        stack = [self.function.blocks[0]]
+        while stack:
+            block = stack.pop()
+            if block not in reachable:
+                reachable.add(block)
+                stack.extend(block.successors())
+        self.function.blocks = [block for block in self.function.blocks if block in reachable]
+
+    # ---- declarations ----
+
+    def visit_program(self, program: program_ast.Program):
+        self.module.globals = [decl.name.id for decl in program.declarations]
+        for function in program.functions:
+            function.accept(self)
+
+    def visit_declaration(self, declaration: program_ast.Declaration):
+        pass
+
+    def visit_type_declaration(self, type_declaration: program_ast.TypeDeclaration):
+        pass
+
+    def visit_function(self, function: program_ast.Function):
+        returns_value = not isinstance(function.ret_type, type_ast.ReturnTypeVoid)
+        self.function = ir.Function(function.name.id, returns_value)
+        self.module.functions.append(self.function)
+        self.variables = {}
+        self.start_block(self.function.new_block())
+
+        for param in function.params:
+            vreg = self.function.new_vreg(param.name.id)
+            self.function.params.append(vreg)
+            self.variables[param.name.binding] = vreg
+        for local in function.locals:
+            vreg = self.function.new_vreg(local.name.id)
+            self.variables[local.name.binding] = vreg
+            self.emit(ir.CONST, vreg, imm=0)
+
+        for statement in function.body:
+            statement.accept(self)
+
+        # Falling off the end returns 0 from a function with a result
+        if self.block is not None:
+            if returns_value:
+                self.emit(ir.RET, args=[self.value(ir.CONST, imm=0)])
+            else:
+                self.emit(ir.RET)
+        self.remove_unreachable_blocks()
+
+    def visit_int_type(self, int_type: type_ast.IntType):
+        pass
+
+    def visit_bool_type(self, bool_type: type_ast.BoolType):
+        pass
+
+    def visit_struct_type(self, struct_type: type_ast.StructType):
+        pass
+
+    def visit_return_type_real(self, return_type_real: type_ast.ReturnTypeReal):
+        pass
+
+    def visit_return_type_void(self, return_type_void: type_ast.ReturnTypeVoid):
+        pass
+
+    # ---- statements ----
+
+    def visit_assignment_statement(self, assignment_statement: statement_ast.AssignmentStatement):
+        target = assignment_statement.target
+        if isinstance(target, lvalue_ast.LValueID):
+            source = assignment_statement.source.accept(self)
+            binding = target.id.binding
+            if binding.is_global:
+                self.emit(ir.STORE_GLOBAL, args=[source], symbol=binding.name)
+            else:
+                self.emit(ir.MOV, self.variables[binding], [source])
+        else:
+            base = target.left.accept(self)
+            source = assignment_statement.source.accept(self)
+            self.emit(ir.STORE, args=[base, source], imm=target.offset, symbol=field(target))
+
+    def visit_block_statement(self, block_statement: statement_ast.BlockStatement):
+        for statement in block_statement.statements:
+            statement.accept(self)
+
+    def visit_conditional_statement(self, conditional_statement: statement_ast.ConditionalStatement):
+        guard = conditional_statement.guard.accept(self)
+        then_block = self.function.new_block()
+        else_block = self.function.new_block()
+        end_block = self.function.new_block()
+        self.emit(ir.BRANCH, args=[guard], targets=[then_block, else_block])
+
+        self.start_block(then_block)
+        conditional_statement.then_block.accept(self)
+        self.jump(end_block)
+
+        self.start_block(else_block)
+        if conditional_statement.else_block:
+            conditional_statement.else_block.accept(self)
+        self.jump(end_block)
+
+        self.start_block(end_block)
+
+    def visit_while_statement(self, while_statement: statement_ast.WhileStatement):
+        if self.rotate_loops:
+            body = self.function.new_block()
+            exit = self.function.new_block()
+            guard = while_statement.guard.accept(self)
+            self.emit(ir.BRANCH, args=[guard], targets=[body, exit])
+
+            self.start_block(body)
+            while_statement.body.accept(self)
+            if self.block is not None:
+                guard = while_statement.guard.accept(self)
+                self.emit(ir.BRANCH, args=[guard], targets=[body, exit])
+
+            self.start_block(exit)
+            return
+
+        header = self.function.new_block()
+        body = self.function.new_block()
+        exit = self.function.new_block()
+        self.jump(header)
+
+        self.start_block(header)
+        guard = while_statement.guard.accept(self)
+        self.emit(ir.BRANCH, args=[guard], targets=[body, exit])
+
+        self.start_block(body)
+        while_statement.body.accept(self)
+        self.jump(header)
+
+        self.start_block(exit)
+
+    def visit_delete_statement(self, delete_statement: statement_ast.DeleteStatement):
+        self.emit(ir.DELETE, args=[delete_statement.expression.accept(self)])
+
+    def visit_invocation_statement(self, invocation_statement: statement_ast.InvocationStatement):
+        invocation = invocation_statement.expression
+        args = [argument.accept(self) for argument in invocation.arguments]
+        self.emit(ir.CALL, args=args, symbol=invocation.name.id)
+
+    def visit_println_statement(self, println_statement: statement_ast.PrintLnStatement):
+        self.emit(ir.PRINTLN, args=[println_statement.expression.accept(self)])
+
+    def visit_print_statement(self, print_statement: statement_ast.PrintStatement):
+        self.emit(ir.PRINT, args=[print_statement.expression.accept(self)])
+
+    def visit_return_empty_statement(self, return_empty_statement: statement_ast.ReturnEmptyStatement):
+        self.emit(ir.RET)
+
+    def visit_return_statement(self, return_statement: statement_ast.ReturnStatement):
+        self.emit(ir.RET, args=[return_statement.expression.accept(self)])
+
+    # ---- expressions ----
+
+    def visit_dot_expression(self, dot_expression: expression_ast.DotExpression):
+        base = dot_expression.left.accept(self)
+        return self.value(ir.LOAD, [base], imm=dot_expression.offset, symbol=field(dot_expression))
+
+    def visit_false_expression(self, false_expression: expression_ast.FalseExpression):
+        return self.value(ir.CONST, imm=0)
+
+    def visit_true_expression(self, true_expression: expression_ast.TrueExpression):
+        return self.value(ir.CONST, imm=1)
+
+    def visit_identifier_expression(self, identifier_expression: expression_ast.IdentifierExpression):
+        binding = identifier_expression.binding
+        if binding.is_global:
+            return self.value(ir.LOAD_GLOBAL, symbol=binding.name)
+        # Statements are the only way to assign a local, so its VReg can be used in place
+        return self.variables[binding]
+
+    def visit_new_expression(self, new_expression: expression_ast.NewExpression):
+        return self.value(ir.NEW, imm=new_expression.id.binding.size)
+
+    def visit_null_expression(self, null_expression: expression_ast.NullExpression):
+        return self.value(ir.CONST, imm=0)
+
+    def visit_read_expression(self, read_expression: expression_ast.ReadExpression):
+        return self.value(ir.READ)
+
+    def visit_integer_expression(self, integer_expression: expression_ast.IntegerExpression):
+        return self.value(ir.CONST, imm=int(integer_expression.value))
+
+    def visit_invocation_expression(self, invocation_expression: expression_ast.InvocationExpression):
+        args = [argument.accept(self) for argument in invocation_expression.arguments]
+        return self.value(ir.CALL, args, symbol=invocation_expression.name.id)
+
+    def visit_unary_expression(self, unary_expression: expression_ast.UnaryExpression):
+        operand = unary_expression.operand.accept(self)
+        if unary_expression.operator is expression_ast.Operator.MINUS:
+            return self.value(ir.NEG, [operand])
+        return self.value(ir.NOT, [operand])
+
+    def visit_binary_expression(self, binary_expression: expression_ast.BinaryExpression):
+        op = binary_expression.operator
+        if op is expression_ast.Operator.AND or op is expression_ast.Operator.OR:
+            return self.short_circuit(binary_expression, op is expression_ast.Operator.AND)
+        left = binary_expression.left.accept(self)
+        right = binary_expression.right.accept(self)
+        return self.value(BINARY_OPCODES[op], [left, right])
+
+    def short_circuit(self, binary_expression, is_and: bool) -> ir.VReg:
+        # result = left && right / left || right, evaluating right only when needed
+        result = self.function.new_vreg()
+        left = binary_expression.left.accept(self)
+        right_block = self.function.new_block()
+        short_block = self.function.new_block()
+        end_block = self.function.new_block()
+        if is_and:
+            self.emit(ir.BRANCH, args=[left], targets=[right_block, short_block])
+        else:
+            self.emit(ir.BRANCH, args=[left], targets=[short_block, right_block])
+
+        self.start_block(right_block)
+        right = binary_expression.right.accept(self)
+        self.emit(ir.MOV, result, [right])
+        self.jump(end_block)
+
+        self.start_block(short_block)
+        self.emit(ir.CONST, result, imm=0 if is_and else 1)
+        self.jump(end_block)
+
+        self.start_block(end_block)
+        return result
+
+    def visit_lvalue_dot(self, lvalue_dot: lvalue_ast.LValueDot):
+        # The value stored in the field, i.e. the base pointer of a longer target
+        base = lvalue_dot.left.accept(self)
+        return self.value(ir.LOAD, [base], imm=lvalue_dot.offset, symbol=field(lvalue_dot))
+
+    def visit_lvalue_id(self, lvalue_id: lvalue_ast.LValueID):
+        binding = lvalue_id.id.binding
+        if binding.is_global:
+            return self.value(ir.LOAD_GLOBAL, symbol=binding.name)
+        return self.variables[binding]
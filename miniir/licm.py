@@ -0,0 +1,122 @@
+"""Loop-invariant code motion on SSA form.
+
+Loops are the natural loops of the CFG's back edges. Each loop gets a
+preheader, a block that every entry into the loop passes through and that
+jumps straight to the header. Loops are then visited innermost first, and
+every computation in a loop whose operands are all defined outside it (or
+were hoisted already) moves to the end of the preheader. Constants stay
+where they are, since keeping one in a register across the loop costs more
+than an li; a hoisted instruction gets its own copy of a constant operand
+in the preheader. Arithmetic cannot
+trap, so it is hoisted from anywhere in the loop. A load of a struct field
+or a global is hoisted when nothing in the loop can change it, by the same
+type-based rule as gvn.py: no call or delete in the loop and no store to
+that field or global. It must also be certain to run once the loop is
+entered, because its block dominates every exit of the loop. Otherwise
+hoisting it could dereference a null pointer the loop never touches.
+while loops qualify when they are rotated by IRBuilder.
+"""
+from typing import Dict, List, Set
+from miniir import ir
+from miniir.cfg import CFG
+from miniir.gvn import EVERYTHING, kills
+
+PURE_OPS = ir.BINARY_OPS | ir.UNARY_OPS | ir.SHIFT_OPS
+
+
+def hoist_invariants(module: ir.Module) -> Dict[str, Dict[str, int]]:
+    """Hoists the loop invariants of every function of module, which must be
+    in SSA form, and returns what was hoisted in each function by name."""
+    stats = {}
+    for function in module.functions:
+        preheaders = insert_preheaders(function)
+        cfg = CFG(function)
+        stats[function.name] = {"loops": len(preheaders), "hoisted": 0, "loads hoisted": 0}
+        # Innermost loops first, so what leaves an inner loop can leave the enclosing ones too
+        loops = sorted(cfg.natural_loops().items(), key=lambda loop: len(loop[1]))
+        for header, body in loops:
+            preheader = [p for p in cfg.preds[header] if p not in body]
+            hoist(function, cfg, body, cfg.blocks[preheader[0]], stats[function.name])
+    return stats
+
+
+def insert_preheaders(function: ir.Function) -> List[ir.BasicBlock]:
+    # Gives every loop header a single predecessor outside its loop that jumps only to it
+    cfg = CFG(function)
+    preheaders = []
+    for header, body in cfg.natural_loops().items():
+        block = cfg.blocks[header]
+        outside = [cfg.blocks[p] for p in cfg.preds[header] if p not in body]
+        if len(outside) == 1 and outside[0].terminator().op == ir.JUMP:
+            preheaders.append(outside[0])
+            continue
+        preheader = function.new_block()
+        function.blocks.insert(function.blocks.index(block), preheader)
+        for pred in outside:
+            terminator = pred.terminator()
+            terminator.targets = [preheader if target is block else target for target in terminator.targets]
+        for phi in block.instrs:
+            if phi.op != ir.PHI:
+                break
+            incoming = [(arg, pred) for arg, pred in zip(phi.args, phi.targets) if pred in outside]
+            inside = [(arg, pred) for arg, pred in zip(phi.args, phi.targets) if pred not in outside]
+            if len(incoming) == 1:
+                value = incoming[0][0]
+            else:
+                value = function.new_vreg(phi.dest.name)
+                preheader.instrs.append(ir.Instr(ir.PHI, value, [arg for arg, pred in incoming],
+                                                 targets=[pred for arg, pred in incoming]))
+            phi.args = [value] + [arg for arg, pred in inside]
+            phi.targets = [preheader] + [pred for arg, pred in inside]
+        preheader.instrs.append(ir.Instr(ir.JUMP, targets=[block]))
+        preheaders.append(preheader)
+    return preheaders
+
+
+def hoist(function: ir.Function, cfg: CFG, body: Set[int], preheader: ir.BasicBlock, stats: Dict[str, int]):
+    defined = set()
+    constants = {}
+    for b in body:
+        for instr in cfg.blocks[b].instrs:
+            if instr.op == ir.CONST:
+                constants[instr.dest] = instr.imm
+            elif instr.dest is not None:
+                defined.add(instr.dest)
+    written = set()
+    for b in body:
+        killed = kills(cfg.blocks[b])
+        if killed is EVERYTHING:
+            written = EVERYTHING
+            break
+        written |= killed
+    exits = [b for b in body if cfg.blocks[b].terminator().op == ir.RET
+             or any(s not in body for s in cfg.succs[b])]
+
+    hoisted = []
+    for b in cfg.dominator_tree_preorder():
+        if b not in body:
+            continue
+        block = cfg.blocks[b]
+        kept = []
+        for instr in block.instrs:
+            if instr.op in PURE_OPS:
+                invariant = True
+            elif instr.op in (ir.LOAD, ir.LOAD_GLOBAL):
+                invariant = (written is not EVERYTHING and instr.symbol not in written
+                             and all(cfg.dominates(b, e) for e in exits))
+            else:
+                invariant = False
+            if invariant and not any(arg in defined for arg in instr.args):
+                defined.discard(instr.dest)
+                for i, arg in enumerate(instr.args):
+                    if arg in constants:
+                        instr.args[i] = function.new_vreg()
+                        hoisted.append(ir.Instr(ir.CONST, instr.args[i], imm=constants[arg]))
+                hoisted.append(instr)
+                stats["hoisted"] += 1
+                if instr.op not in PURE_OPS:
+                    stats["loads hoisted"] += 1
+            else:
+                kept.append(instr)
+        block.instrs = kept
+    preheader.instrs[-1:-1] = hoisted
@@ -0,0 +1,69 @@
+"""Live-variable analysis of an ir.Function.
+
+Sets of VRegs are Python ints used as bit sets (bit i is the VReg with id
+i), so the iterative data-flow equations run on whole sets at a time. A phi
+reads its argument at the end of the corresponding predecessor and defines
+its result at the start of its own block.
+"""
+from typing import Dict, Iterator, List
+from miniir import ir
+from miniir.cfg import CFG
+
+
+def members(bits: int) -> Iterator[int]:
+    """The VReg ids in a bit set, lowest first."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class Liveness:
+    """live_in[b] and live_out[b] for every block b of a CFG, plus vregs,
+    which maps the id of every VReg in the function back to the VReg."""
+
+    __slots__ = ("cfg", "vregs", "live_in", "live_out")
+
+    def __init__(self, function: ir.Function, cfg: CFG = None):
+        self.cfg = cfg = cfg or CFG(function)
+        self.vregs: Dict[int, ir.VReg] = {param.id: param for param in function.params}
+        n = len(cfg.blocks)
+        uses = [0] * n      # read before any write in the block
+        defs = [0] * n      # written in the block, including by its phis
+        phi_uses = [0] * n  # read by phis of a successor along the edge from the block
+        for b, block in enumerate(cfg.blocks):
+            used = defined = 0
+            for instr in block.instrs:
+                if instr.op == ir.PHI:
+                    for arg, pred in zip(instr.args, instr.targets):
+                        self.vregs[arg.id] = arg
+                        phi_uses[cfg.index[pred]] |= 1 << arg.id
+                else:
+                    for arg in instr.args:
+                        self.vregs[arg.id] = arg
+                        bit = 1 << arg.id
+                        if not defined & bit:
+                            used |= bit
+                if instr.dest is not None:
+                    self.vregs[instr.dest.id] = instr.dest
+                    defined |= 1 << instr.dest.id
+            uses[b] = used
+            defs[b] = defined
+
+        live_in: List[int] = [0] * n
+        live_out: List[int] = [0] * n
+        order = cfg.rpo[::-1]
+        changed = True
+        while changed:
+            changed = False
+            for b in order:
+                out = phi_uses[b]
+                for s in cfg.succs[b]:
+                    out |= live_in[s]
+                live_out[b] = out
+                new_in = uses[b] | (out & ~defs[b])
+                if new_in != live_in[b]:
+                    live_in[b] = new_in
+                    changed = True
+        self.live_in = live_in
+        self.live_out = live_out
@@ -0,0 +1,402 @@
+"""Register allocation for ir.Functions lowered by RiscVBackend.
+
+An Allocation places every VReg either in a register or in a frame slot.
+spill_everything gives each VReg its own slot, which is how the backend
+started out; linear_scan keeps VRegs in registers using the live-interval
+algorithm of Poletto and Sarkar. s0 is the frame pointer, and t0 and t1 are
+kept free as scratch registers for reloading spilled operands, so values
+live in s1-s11 and t2-t6. A value that is live across a call (including the
+print, read, new and delete library calls) may only use s registers, which
+the callee preserves; the function saves the ones it uses.
+
+graph_coloring is the Chaitin-Briggs allocator of -O2. It also hands out
+a0-a7, and coalesces copies, including the moves of arguments, parameters
+and results into and out of a0-a7, whenever that cannot make the graph
+harder to color.
+"""
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set
+from miniir import ir
+from miniir.liveness import Liveness, members
+
+CALLER_SAVED = ["t2", "t3", "t4", "t5", "t6"]
+CALLEE_SAVED = ["s1", "s2", "s3", "s4", "s5", "s6", "s7", "s8", "s9", "s10", "s11"]
+ARGUMENT_REGISTERS = ["a0", "a1", "a2", "a3", "a4", "a5", "a6", "a7"]
+CALL_OPS = frozenset([ir.CALL, ir.NEW, ir.DELETE, ir.READ, ir.PRINT, ir.PRINTLN])
+
+
+class Allocation:
+    """Where the VRegs of one function live.
+
+    registers maps VRegs to register names and slots maps the rest to frame
+    slot numbers. saved lists the callee-saved registers the function must
+    preserve; they occupy the first frame slots, below the saved ra and fp.
+    """
+
+    __slots__ = ("registers", "slots", "saved", "slot_count")
+
+    def __init__(self):
+        self.registers: Dict[ir.VReg, str] = {}
+        self.slots: Dict[ir.VReg, int] = {}
+        self.saved: List[str] = []
+        self.slot_count = 0
+
+    def spill(self, vreg: ir.VReg):
+        self.slots[vreg] = self.slot_count
+        self.slot_count += 1
+
+    def frame_words(self) -> int:
+        return len(self.saved) + self.slot_count
+
+
+def spill_everything(function: ir.Function) -> Allocation:
+    """Gives every VReg of function a frame slot of its own."""
+    allocation = Allocation()
+    allocation.slot_count = function.vreg_count
+    for block in function.blocks:
+        for instr in block.instrs:
+            for vreg in instr.args:
+                allocation.slots[vreg] = vreg.id - 1
+            if instr.dest is not None:
+                allocation.slots[instr.dest] = instr.dest.id - 1
+    for param in function.params:
+        allocation.slots[param] = param.id - 1
+    return allocation
+
+
+class Interval:
+    """The positions from the first to the last point where vreg is live."""
+
+    __slots__ = ("vreg", "start", "end", "crosses_call", "register")
+
+    def __init__(self, vreg: ir.VReg, start: int, end: int):
+        self.vreg = vreg
+        self.start = start
+        self.end = end
+        self.crosses_call = False
+        self.register: Optional[str] = None
+
+
+def live_intervals(function: ir.Function, liveness: Liveness = None) -> List[Interval]:
+    """One interval per VReg over the instructions numbered in layout order,
+    sorted by start. Parameters start at -1, before the first instruction;
+    those the function never mentions get no interval."""
+    liveness = liveness or Liveness(function)
+    cfg = liveness.cfg
+    start: Dict[int, int] = {}
+    end: Dict[int, int] = {}
+
+    def extend(vreg_id, position):
+        if vreg_id in start:
+            if position < start[vreg_id]:
+                start[vreg_id] = position
+            elif position > end[vreg_id]:
+                end[vreg_id] = position
+        else:
+            start[vreg_id] = end[vreg_id] = position
+
+    calls = []
+    position = 0
+    for block in function.blocks:
+        b = cfg.index[block]
+        block_start = position
+        for vreg_id in members(liveness.live_in[b]):
+            extend(vreg_id, block_start)
+        for instr in block.instrs:
+            for arg in instr.args:
+                extend(arg.id, position)
+            if instr.dest is not None:
+                extend(instr.dest.id, position)
+            if instr.op in CALL_OPS:
+                calls.append(position)
+            position += 1
+        for vreg_id in members(liveness.live_out[b]):
+            extend(vreg_id, position - 1)
+    for param in function.params:
+        if param.id in start:
+            start[param.id] = -1
+
+    intervals = []
+    for vreg_id, first in start.items():
+        interval = Interval(liveness.vregs[vreg_id], first, end[vreg_id])
+        # Arguments are moved out and results in around the call itself, so only strict containment counts
+        i = bisect_left(calls, first + 1)
+        interval.crosses_call = i < len(calls) and calls[i] < interval.end
+        intervals.append(interval)
+    intervals.sort(key=lambda interval: interval.start)
+    return intervals
+
+
+def linear_scan(function: ir.Function) -> Allocation:
+    """Allocates registers with linear scan over live intervals.
+
+    When no suitable register is free, the interval that ends last among
+    the current one and those holding a usable register is spilled.
+    """
+    allocation = Allocation()
+    free_caller = list(reversed(CALLER_SAVED))
+    free_callee = list(reversed(CALLEE_SAVED))
+    used_callee = set()
+    active: List[Interval] = [] # sorted by end
+
+    def release(register):
+        (free_caller if register in CALLER_SAVED else free_callee).append(register)
+
+    for interval in live_intervals(function):
+        # Expire intervals that end before this one starts; an operand's register can hold the result
+        expired = 0
+        while expired < len(active) and active[expired].end <= interval.start:
+            release(active[expired].register)
+            expired += 1
+        del active[:expired]
+
+        if free_caller and not interval.crosses_call:
+            interval.register = free_caller.pop()
+        elif free_callee:
+            interval.register = free_callee.pop()
+        else:
+            candidates = [other for other in active
+                          if not interval.crosses_call or other.register in CALLEE_SAVED]
+            victim = max(candidates, key=lambda other: other.end, default=None)
+            if victim is None or victim.end <= interval.end:
+                allocation.spill(interval.vreg)
+                continue
+            interval.register = victim.register
+            victim.register = None
+            active.remove(victim)
+            del allocation.registers[victim.vreg]
+            allocation.spill(victim.vreg)
+
+        allocation.registers[interval.vreg] = interval.register
+        if interval.register in CALLEE_SAVED:
+            used_callee.add(interval.register)
+        i = len(active)
+        while i > 0 and active[i - 1].end > interval.end:
+            i -= 1
+        active.insert(i, interval)
+
+    # main never returns to a caller, so it has nothing to preserve
+    if function.name != "main":
+        allocation.saved = [register for register in CALLEE_SAVED if register in used_callee]
+    return allocation
+
+
+class InterferenceGraph:
+    """The interference graph of a function, for graph_coloring.
+
+    Nodes are VRegs and the names of the registers a call clobbers (t2-t6
+    and a0-a7), which are precolored and never removed. adjacent maps every
+    node to its neighbours; moves lists the (a, b, weight) copies that would
+    vanish if a and b shared a register, where either may be a register name;
+    cost is the loop-weighted number of times each VReg is read or written.
+    Coalesced VRegs are merged into the node alias leads to.
+    """
+
+    CLOBBERED = CALLER_SAVED + ARGUMENT_REGISTERS
+    COLORS = CALLER_SAVED + ARGUMENT_REGISTERS[::-1] + CALLEE_SAVED
+    K = len(COLORS)
+
+    def __init__(self, function: ir.Function, liveness: Liveness = None):
+        liveness = liveness or Liveness(function)
+        cfg = liveness.cfg
+        self.adjacent: Dict[object, Set] = {register: set() for register in self.CLOBBERED}
+        self.moves: List[tuple] = []
+        self.cost: Dict[ir.VReg, float] = {}
+        self.alias: Dict[ir.VReg, object] = {}
+
+        depths = cfg.loop_depths()
+        for b, block in enumerate(cfg.blocks):
+            weight = 10 ** min(depths[b], 8)
+            live = {liveness.vregs[vreg_id] for vreg_id in members(liveness.live_out[b])}
+            for vreg in live:
+                self.add_node(vreg, 0)
+            for instr in reversed(block.instrs):
+                dest = instr.dest
+                for vreg in instr.args:
+                    self.add_node(vreg, weight)
+                if instr.op == ir.MOV:
+                    # A copy does not make its source and destination interfere
+                    live.discard(instr.args[0])
+                    self.moves.append((dest, instr.args[0], weight))
+                elif instr.op in (ir.PRINT, ir.PRINTLN, ir.DELETE, ir.RET) and instr.args:
+                    self.moves.append((instr.args[0], "a0", weight))
+                elif instr.op == ir.CALL:
+                    self.moves.extend((arg, register, weight)
+                                      for arg, register in zip(instr.args, ARGUMENT_REGISTERS))
+                if instr.op in CALL_OPS:
+                    for vreg in live:
+                        if vreg is not dest:
+                            for register in self.CLOBBERED:
+                                self.add_edge(vreg, register)
+                    if dest is not None:
+                        self.moves.append((dest, "a0", weight))
+                if dest is not None:
+                    self.add_node(dest, weight)
+                    live.discard(dest)
+                    for vreg in live:
+                        self.add_edge(dest, vreg)
+                live.update(instr.args)
+
+        # The parameters are all defined on entry, each arriving in its own a register
+        entry = [param for param in function.params if param in self.adjacent]
+        live = entry + [liveness.vregs[vreg_id] for vreg_id in members(liveness.live_in[0])]
+        for param, register in zip(function.params, ARGUMENT_REGISTERS):
+            if param in self.adjacent:
+                self.moves.append((param, register, 1))
+        for param in entry:
+            for vreg in live:
+                if vreg is not param:
+                    self.add_edge(param, vreg)
+
+    def add_node(self, vreg: ir.VReg, weight):
+        if vreg not in self.adjacent:
+            self.adjacent[vreg] = set()
+            self.cost[vreg] = 0
+        self.cost[vreg] += weight
+
+    def add_edge(self, a, b):
+        self.adjacent[a].add(b)
+        self.adjacent[b].add(a)
+
+    def find(self, node):
+        while node in self.alias:
+            node = self.alias[node]
+        return node
+
+    def significant(self, node, degree=None) -> bool:
+        # Whether node has K or more neighbours; precolored nodes always count
+        if isinstance(node, str):
+            return True
+        return (len(self.adjacent[node]) if degree is None else degree) >= self.K
+
+    def coalesce(self):
+        """Merges the ends of copies while Briggs' test (for two VRegs) or
+        George's test (for a VReg and a register) shows that the merged node
+        colors whenever the graph did, heaviest copies first."""
+        pending = sorted(self.moves, key=lambda move: -move[2])
+        merged = True
+        while merged:
+            merged = False
+            remaining = []
+            for a, b, weight in pending:
+                a, b = self.find(a), self.find(b)
+                if a == b:
+                    continue
+                if isinstance(a, str):
+                    a, b = b, a
+                if isinstance(a, str) or b in self.adjacent[a]:
+                    continue # two registers, or the ends interfere
+                if isinstance(b, str):
+                    # Every neighbour of a already avoids b or will find a color anyway
+                    safe = all(isinstance(t, str) or not self.significant(t) or b in self.adjacent[t]
+                               for t in self.adjacent[a])
+                else:
+                    safe = self.briggs(a, b)
+                if safe:
+                    self.merge(a, b)
+                    merged = True
+                else:
+                    remaining.append((a, b, weight))
+            pending = remaining
+
+    def briggs(self, a: ir.VReg, b: ir.VReg) -> bool:
+        # Fewer than K neighbours of the merged node would have K or more neighbours
+        count = 0
+        for t in self.adjacent[a] | self.adjacent[b]:
+            shared = t in self.adjacent[a] and t in self.adjacent[b]
+            if self.significant(t, None if isinstance(t, str) else len(self.adjacent[t]) - shared):
+                count += 1
+                if count >= self.K:
+                    return False
+        return True
+
+    def merge(self, a: ir.VReg, b):
+        # Folds VReg a into b, which may be a register
+        self.alias[a] = b
+        for t in self.adjacent.pop(a):
+            self.adjacent[t].discard(a)
+            self.add_edge(t, b)
+        if not isinstance(b, str):
+            self.cost[b] += self.cost[a]
+
+    def color(self) -> Dict[object, Optional[str]]:
+        """Simplifies the graph and selects colors optimistically (Briggs).
+
+        A VReg with fewer than K neighbours is removed; when none is left the
+        one with the lowest cost per neighbour is removed as a spill candidate.
+        Popping them back, each takes a color none of its neighbours has,
+        preferring the color of a node it is copied to or from. Returns the
+        color of every remaining node, None for the ones that must spill.
+        """
+        nodes = [node for node in self.adjacent if not isinstance(node, str)]
+        degree = {node: len(self.adjacent[node]) for node in nodes}
+        low = [node for node in nodes if degree[node] < self.K]
+        high = {node for node in nodes if degree[node] >= self.K}
+        removed = set()
+        stack = []
+        while low or high:
+            if low:
+                node = low.pop()
+            else:
+                node = min(high, key=lambda node: (self.cost[node] / degree[node], node.id))
+                high.remove(node)
+            stack.append(node)
+            removed.add(node)
+            for t in self.adjacent[node]:
+                if t in degree and t not in removed:
+                    degree[t] -= 1
+                    if degree[t] == self.K - 1 and t in high:
+                        high.remove(t)
+                        low.append(t)
+
+        partners: Dict[object, List] = {}
+        for a, b, weight in self.moves:
+            a, b = self.find(a), self.find(b)
+            if a is not b:
+                partners.setdefault(a, []).append(b)
+                partners.setdefault(b, []).append(a)
+
+        colors: Dict[object, Optional[str]] = {register: register for register in self.CLOBBERED}
+        for node in reversed(stack):
+            taken = {colors.get(t) for t in self.adjacent[node]}
+            preferred = [colors.get(partner) for partner in partners.get(node, ())]
+            colors[node] = next((color for color in preferred + self.COLORS
+                                 if color is not None and color not in taken), None)
+        return colors
+
+
+def graph_coloring(function: ir.Function) -> Allocation:
+    """Allocates registers by coloring the interference graph (Chaitin-Briggs).
+
+    Copies are coalesced conservatively before coloring. A node that cannot
+    be colored keeps all its VRegs in one frame slot; the backend reloads
+    them through the scratch registers, so there is no rebuild after spills.
+    """
+    graph = InterferenceGraph(function)
+    graph.coalesce()
+    colors = graph.color()
+    allocation = Allocation()
+    spilled: Dict[object, int] = {}
+    for vreg in graph.cost:
+        node = graph.find(vreg)
+        color = colors[node]
+        if color is not None:
+            allocation.registers[vreg] = color
+        elif node in spilled:
+            allocation.slots[vreg] = spilled[node]
+        else:
+            allocation.spill(vreg)
+            spilled[node] = allocation.slots[vreg]
+
+    used = set(allocation.registers.values())
+    # main never returns to a caller, so it has nothing to preserve
+    if function.name != "main":
+        allocation.saved = [register for register in CALLEE_SAVED if register in used]
+    return allocation
+
+
+ALLOCATORS = {
+    "none": spill_everything,
+    "linear": linear_scan,
+    "graph": graph_coloring,
+}
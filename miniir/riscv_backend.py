@@ -0,0 +1,261 @@
+from typing import List
+from miniir import ir
+from miniir.regalloc import Allocation, spill_everything
+from miniir.ssa import sequentialize
+from peephole import Instr, Label, peephole_optimize
+
+class RiscVBackend:
+    """Lowers an ir.Module to RISC-V assembly in the same dialect as CodeGenVisitor.
+
+    allocate maps each ir.Function to an Allocation (see regalloc.py). VRegs
+    in registers are used in place; spilled ones live in a frame slot below
+    the saved ra, fp and callee-saved registers, and are reloaded into the
+    scratch registers t0 and t1 around each instruction. Arguments are passed
+    in a0-a7 and the rest on the stack, at (i-8)*4(sp) of the caller; the
+    callee finds them at (i-8)*4(fp). VRegs may live in a0-a7 themselves, so
+    arguments and parameters are moved as one parallel copy.
+    """
+
+    COMPARISONS = {
+        ir.LT: [("slt", "d", "a", "b")],
+        ir.LE: [("slt", "d", "b", "a"), ("xori", "d", "d", "1")],
+        ir.GT: [("slt", "d", "b", "a")],
+        ir.GE: [("slt", "d", "a", "b"), ("xori", "d", "d", "1")],
+        ir.EQ: [("sub", "d", "a", "b"), ("seqz", "d", "d")],
+        ir.NE: [("sub", "d", "a", "b"), ("snez", "d", "d")],
+    }
+    SHIFTS = {ir.SHL: "slli", ir.SRA: "srai", ir.SRL: "srli"}
+
+    def __init__(self, allocate=spill_everything):
+        self.output: List = []  # Instr, Label and directive lines
+        self.allocate = allocate
+        self.function = None
+        self.allocation: Allocation = None
+        self.next_label = None  # label of the block after the one being emitted
+
+    def emit(self, op, *operands, dead=()):
+        self.output.append(Instr(op, *map(str, operands), dead=dead))
+
+    def emit_label(self, name, spaced=False):
+        self.output.append(Label(name, spaced))
+
+    def emit_line(self, text):
+        self.output.append(text)
+
+    def emit_module(self, module: ir.Module) -> str:
+        self.emit_line(".globl main")
+        self.emit_line(".import berkeley_utils.s")
+        self.emit_line(".import read_int.s")
+
+        self.emit_line("\n.data")
+        self.emit_line("input_file_ptr: .word")
+        for name in module.globals:
+            self.emit_line(f"{name}: .word 0")
+
+        self.emit_line("\n.text")
+        for function in module.functions:
+            self.emit_function(function)
+
+        self.output = peephole_optimize(self.output)
+        return "\n".join(map(str, self.output))
+
+    # ---- operand access ----
+
+    def frame_offset(self, index) -> int:
+        # fp-relative home of frame word index, below the saved ra and fp
+        return -12 - 4 * index
+
+    def slot(self, vreg: ir.VReg) -> str:
+        return f"{self.frame_offset(len(self.allocation.saved) + self.allocation.slots[vreg])}(fp)"
+
+    def use(self, vreg: ir.VReg, scratch: str) -> str:
+        # The register holding vreg, reloading it into scratch if it is spilled
+        register = self.allocation.registers.get(vreg)
+        if register is not None:
+            return register
+        self.emit("lw", scratch, self.slot(vreg))
+        return scratch
+
+    def target(self, vreg: ir.VReg, scratch: str) -> str:
+        # The register to compute vreg in; call define() once it holds the value
+        return self.allocation.registers.get(vreg, scratch)
+
+    def define(self, vreg: ir.VReg, register: str):
+        # Moves the value computed in register to the home of vreg
+        home = self.allocation.registers.get(vreg)
+        if home is None:
+            self.emit("sw", register, self.slot(vreg))
+        elif home != register:
+            self.emit("mv", home, register)
+
+    def home(self, vreg: ir.VReg) -> str:
+        register = self.allocation.registers.get(vreg)
+        return register if register is not None else self.slot(vreg)
+
+    def emit_moves(self, moves):
+        # Performs the parallel copy [(dest, src), ...] between registers and
+        # frame words: stores first, while every source register is intact, then
+        # the register moves in an order that reads each register before it is
+        # overwritten (t0 breaks cycles), then the loads
+        copies = []
+        loads = []
+        for dest, src in moves:
+            if dest.endswith(")"):
+                if src.endswith(")"):
+                    self.emit("lw", "t0", src)
+                    src = "t0"
+                self.emit("sw", src, dest)
+            elif src.endswith(")"):
+                loads.append((dest, src))
+            else:
+                copies.append((dest, src))
+        for dest, src in sequentialize(copies, lambda dest: "t0"):
+            self.emit("mv", dest, src)
+        for dest, src in loads:
+            self.emit("lw", dest, src)
+
+    def load_into(self, register: str, vreg: ir.VReg):
+        home = self.allocation.registers.get(vreg)
+        if home is None:
+            self.emit("lw", register, self.slot(vreg))
+        else:
+            self.emit("mv", register, home)
+
+    # ---- functions ----
+
+    def emit_function(self, function: ir.Function):
+        self.function = function
+        self.allocation = self.allocate(function)
+        self.emit_label(function.name, spaced=True)
+
+        if function.name == "main":
+            self.emit("lw", "t0", "4(a1)")
+            self.emit("la", "t1", "input_file_ptr")
+            self.emit("sw", "t0", "0(t1)")
+
+        total_stack_size = self.allocation.frame_words() * 4 + 8
+        self.emit("addi", "sp", "sp", f"-{total_stack_size}")
+        self.emit("sw", "ra", f"{total_stack_size - 4}(sp)")
+        self.emit("sw", "fp", f"{total_stack_size - 8}(sp)")
+        self.emit("addi", "fp", "sp", total_stack_size)
+        for i, register in enumerate(self.allocation.saved):
+            self.emit("sw", register, f"{self.frame_offset(i)}(fp)")
+
+        # Parameters the allocator placed nowhere are never read
+        self.emit_moves([(self.home(param), f"a{i}" if i < 8 else f"{(i - 8) * 4}(fp)")
+                         for i, param in enumerate(function.params)
+                         if param in self.allocation.registers or param in self.allocation.slots])
+
+        for i, block in enumerate(function.blocks):
+            self.emit_label(block.label)
+            self.next_label = function.blocks[i + 1].label if i + 1 < len(function.blocks) else None
+            for instr in block.instrs:
+                self.emit_instr(instr)
+
+        self.emit_label(f"{function.name}_epilog", spaced=True)
+        for i, register in enumerate(self.allocation.saved):
+            self.emit("lw", register, f"{self.frame_offset(i)}(fp)")
+        self.emit("lw", "ra", f"{total_stack_size - 4}(sp)")
+        self.emit("lw", "fp", f"{total_stack_size - 8}(sp)")
+        self.emit("addi", "sp", "sp", total_stack_size)
+        if function.name == "main":
+            self.emit("li", "a0", "0")
+            self.emit("jal", "zero", "exit")
+        else:
+            self.emit("ret")
+
+    def emit_instr(self, instr: ir.Instr):
+        op = instr.op
+        if op == ir.CONST:
+            register = self.target(instr.dest, "t0")
+            self.emit("li", register, instr.imm)
+            self.define(instr.dest, register)
+        elif op == ir.MOV:
+            # Coalesced copies share a home
+            if self.home(instr.dest) != self.home(instr.args[0]):
+                self.define(instr.dest, self.use(instr.args[0], "t0"))
+        elif op in ir.BINARY_OPS:
+            a = self.use(instr.args[0], "t0")
+            b = self.use(instr.args[1], "t1")
+            d = self.target(instr.dest, "t0")
+            for name, *operands in self.COMPARISONS.get(op, [(op, "d", "a", "b")]):
+                self.emit(name, *({"d": d, "a": a, "b": b}.get(operand, operand) for operand in operands))
+            self.define(instr.dest, d)
+        elif op in ir.SHIFT_OPS:
+            a = self.use(instr.args[0], "t0")
+            d = self.target(instr.dest, "t0")
+            self.emit(self.SHIFTS[op], d, a, instr.imm)
+            self.define(instr.dest, d)
+        elif op == ir.NEG or op == ir.NOT:
+            a = self.use(instr.args[0], "t0")
+            d = self.target(instr.dest, "t0")
+            self.emit("neg" if op == ir.NEG else "seqz", d, a)
+            self.define(instr.dest, d)
+        elif op == ir.LOAD:
+            base = self.use(instr.args[0], "t0")
+            d = self.target(instr.dest, "t0")
+            self.emit("lw", d, f"{instr.imm}({base})")
+            self.define(instr.dest, d)
+        elif op == ir.STORE:
+            base = self.use(instr.args[0], "t0")
+            value = self.use(instr.args[1], "t1")
+            self.emit("sw", value, f"{instr.imm}({base})")
+        elif op == ir.LOAD_GLOBAL:
+            d = self.target(instr.dest, "t0")
+            self.emit("la", d, instr.symbol)
+            self.emit("lw", d, f"0({d})")
+            self.define(instr.dest, d)
+        elif op == ir.STORE_GLOBAL:
+            value = self.use(instr.args[0], "t1")
+            self.emit("la", "t0", instr.symbol)
+            self.emit("sw", value, "0(t0)")
+        elif op == ir.CALL:
+            self.emit_call(instr)
+        elif op == ir.NEW:
+            self.emit("li", "a0", instr.imm)
+            self.emit("jal", "ra", "malloc")
+            self.define(instr.dest, "a0")
+        elif op == ir.DELETE:
+            self.load_into("a0", instr.args[0])
+            self.emit("jal", "ra", "free")
+        elif op == ir.READ:
+            self.emit("la", "a0", "input_file_ptr")
+            self.emit("lw", "a0", "0(a0)")
+            self.emit("jal", "ra", "read_int")
+            self.define(instr.dest, "a0")
+        elif op == ir.PRINT or op == ir.PRINTLN:
+            self.load_into("a0", instr.args[0])
+            self.emit("jal", "ra", "print_int")
+            if op == ir.PRINTLN:
+                self.emit("li", "a0", "10")
+                self.emit("jal", "ra", "print_char")
+        elif op == ir.JUMP:
+            self.emit("j", instr.targets[0].label)
+        elif op == ir.BRANCH:
+            condition = self.use(instr.args[0], "t0")
+            # Branch on whichever way does not fall through; the peephole pass drops the jump to the next block
+            if instr.targets[1].label == self.next_label:
+                self.emit("bnez", condition, instr.targets[0].label)
+                self.emit("j", instr.targets[1].label)
+            else:
+                self.emit("beqz", condition, instr.targets[1].label)
+                self.emit("j", instr.targets[0].label)
+        elif op == ir.RET:
+            if instr.args:
+                self.load_into("a0", instr.args[0])
+            self.emit("j", f"{self.function.name}_epilog")
+        else:
+            raise ValueError(f"cannot lower IR instruction {instr!r}")
+
+    def emit_call(self, instr: ir.Instr):
+        num_stack_args = max(0, len(instr.args) - 8)
+        if num_stack_args > 0:
+            self.emit("addi", "sp", "sp", f"-{num_stack_args * 4}")
+            for i, arg in enumerate(instr.args[8:]):
+                self.emit("sw", self.use(arg, "t0"), f"{i * 4}(sp)")
+        self.emit_moves([(f"a{i}", self.home(arg)) for i, arg in enumerate(instr.args[:8])])
+        self.emit("jal", "ra", instr.symbol)
+        if num_stack_args > 0:
+            self.emit("addi", "sp", "sp", num_stack_args * 4)
+        if instr.dest is not None:
+            self.define(instr.dest, "a0")
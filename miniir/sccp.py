@@ -0,0 +1,242 @@
+"""Sparse conditional constant propagation (Wegman and Zadeck) on SSA form.
+
+Every VReg gets a lattice value: unknown (no definition has been reached
+yet), a constant, or BOTTOM (varies at run time). Only the blocks reachable
+through edges whose branch conditions are not known to go the other way are
+evaluated, so a constant that decides a branch also keeps the untaken side
+from weakening the values it would define.
+
+propagate_constants runs this over a whole module: a function that is only
+ever called with the same constant for a parameter gets that constant for
+the parameter, which can in turn make the arguments it passes on constant.
+Afterwards instructions with constant results become const, branches on
+constants become jumps and blocks that can never run are removed.
+"""
+from typing import Dict, List, Optional
+from miniir import ir
+from miniir.cfg import CFG
+from int32 import divide32, wrap32
+
+BOTTOM = "bottom"  # the lattice value of a VReg that is not constant; unknown VRegs are absent
+
+FOLD = {
+    ir.ADD: lambda a, b: wrap32(a + b),
+    ir.SUB: lambda a, b: wrap32(a - b),
+    ir.MUL: lambda a, b: wrap32(a * b),
+    ir.DIV: divide32,
+    ir.LT: lambda a, b: int(a < b),
+    ir.LE: lambda a, b: int(a <= b),
+    ir.GT: lambda a, b: int(a > b),
+    ir.GE: lambda a, b: int(a >= b),
+    ir.EQ: lambda a, b: int(a == b),
+    ir.NE: lambda a, b: int(a != b),
+    ir.NEG: lambda a: wrap32(-a),
+    ir.NOT: lambda a: int(a == 0),
+}
+SHIFT = {
+    ir.SHL: lambda a, k: wrap32(a << k),
+    ir.SRA: lambda a, k: a >> k,
+    ir.SRL: lambda a, k: wrap32((a & 0xFFFFFFFF) >> k),
+}
+
+
+def meet(a, b):
+    # None is unknown, the top of the lattice
+    if a is None:
+        return b
+    if b is None or a == b:
+        return a
+    return BOTTOM
+
+
+class ConstantPropagation:
+    """The SCCP solution for one function in SSA form.
+
+    params gives the lattice value of each parameter (None for unknown).
+    values maps VRegs to their constant or BOTTOM, and executable holds the
+    (pred, succ) CFG edges that can be taken, with (-1, 0) for the entry.
+    """
+
+    def __init__(self, function: ir.Function, cfg: CFG = None, params=None):
+        self.function = function
+        self.cfg = cfg = cfg or CFG(function)
+        self.values: Dict[ir.VReg, object] = {}
+        for i, param in enumerate(function.params):
+            value = params[i] if params is not None else BOTTOM
+            if value is not None:
+                self.values[param] = value
+        self.executable = set()
+        self.reached = set()
+
+        uses: Dict[ir.VReg, List[tuple]] = {}
+        for b, block in enumerate(cfg.blocks):
+            for instr in block.instrs:
+                for arg in instr.args:
+                    uses.setdefault(arg, []).append((b, instr))
+
+        flow = [(-1, 0)]
+        ssa: List[ir.VReg] = []
+        while flow or ssa:
+            while flow:
+                edge = flow.pop()
+                if edge in self.executable:
+                    continue
+                self.executable.add(edge)
+                b = edge[1]
+                if b in self.reached:
+                    # Only the phis see the new edge
+                    for instr in cfg.blocks[b].instrs:
+                        if instr.op != ir.PHI:
+                            break
+                        self.visit(b, instr, flow, ssa)
+                    continue
+                self.reached.add(b)
+                for instr in cfg.blocks[b].instrs:
+                    self.visit(b, instr, flow, ssa)
+            while ssa:
+                for b, instr in uses.get(ssa.pop(), ()):
+                    if b in self.reached:
+                        self.visit(b, instr, flow, ssa)
+
+    def value(self, vreg: ir.VReg):
+        return self.values.get(vreg)
+
+    def visit(self, b: int, instr: ir.Instr, flow, ssa):
+        op = instr.op
+        if op == ir.BRANCH:
+            condition = self.value(instr.args[0])
+            taken = (instr.targets if condition == BOTTOM else
+                     [] if condition is None else
+                     [instr.targets[0] if condition else instr.targets[1]])
+            flow.extend((b, self.cfg.index[target]) for target in taken)
+            return
+        if op == ir.JUMP:
+            flow.append((b, self.cfg.index[instr.targets[0]]))
+            return
+        if instr.dest is None:
+            return
+        new = self.evaluate(b, instr)
+        if new != self.values.get(instr.dest):
+            self.values[instr.dest] = new
+            ssa.append(instr.dest)
+
+    def evaluate(self, b: int, instr: ir.Instr):
+        op = instr.op
+        if op == ir.CONST:
+            return instr.imm
+        if op == ir.MOV:
+            return self.value(instr.args[0])
+        if op == ir.PHI:
+            value = None
+            for arg, pred in zip(instr.args, instr.targets):
+                if (self.cfg.index[pred], b) in self.executable:
+                    value = meet(value, self.value(arg))
+            return value
+        if op in FOLD or op in SHIFT:
+            operands = [self.value(arg) for arg in instr.args]
+            if BOTTOM in operands:
+                return BOTTOM
+            if None in operands:
+                return None
+            if op in SHIFT:
+                return SHIFT[op](operands[0], instr.imm)
+            return FOLD[op](*operands)
+        return BOTTOM # memory, calls and input
+
+    def constant(self, vreg: ir.VReg) -> Optional[int]:
+        value = self.values.get(vreg)
+        return None if value is None or value == BOTTOM else value
+
+    def rewrite(self) -> Dict[str, int]:
+        """Applies the solution to the function and returns what it changed."""
+        function, cfg = self.function, self.cfg
+        stats = {"folded": 0, "branches resolved": 0, "unreachable blocks": 0, "constant params": 0}
+
+        substitutes = {}
+        entry_constants = []
+        for param in function.params:
+            value = self.constant(param)
+            if value is not None:
+                substitutes[param] = function.new_vreg(param.name)
+                entry_constants.append(ir.Instr(ir.CONST, substitutes[param], imm=value))
+                stats["constant params"] += 1
+
+        folded = set()
+        blocks = []
+        for b, block in enumerate(cfg.blocks):
+            if b not in self.reached:
+                stats["unreachable blocks"] += 1
+                continue
+            blocks.append(block)
+            phis = []
+            body = []
+            for instr in block.instrs:
+                if substitutes:
+                    instr.args = [substitutes.get(arg, arg) for arg in instr.args]
+                if instr.op == ir.PHI:
+                    # Drop the incoming values of edges that are never taken
+                    incoming = [(arg, pred) for arg, pred in zip(instr.args, instr.targets)
+                                if (cfg.index[pred], b) in self.executable]
+                    instr.args = [arg for arg, pred in incoming]
+                    instr.targets = [pred for arg, pred in incoming]
+                value = None if instr.dest is None else self.constant(instr.dest)
+                if value is not None and instr.op != ir.CONST:
+                    instr.op, instr.args, instr.imm, instr.symbol, instr.targets = ir.CONST, [], value, None, []
+                    folded.add(instr)
+                    stats["folded"] += 1
+                elif instr.op == ir.PHI and len(instr.args) == 1:
+                    instr.op, instr.targets = ir.MOV, []
+                elif instr.op == ir.BRANCH:
+                    live = [target for target in instr.targets if (b, cfg.index[target]) in self.executable]
+                    if len(live) == 1:
+                        instr.op, instr.args, instr.targets = ir.JUMP, [], live
+                        stats["branches resolved"] += 1
+                (phis if instr.op == ir.PHI else body).append(instr)
+            block.instrs = phis + body
+        function.blocks = blocks
+        function.blocks[0].instrs[0:0] = entry_constants
+
+        # Constants whose every use was folded as well are dropped here rather than left to dead code elimination
+        used = {arg for block in blocks for instr in block.instrs for arg in instr.args}
+        for block in blocks:
+            block.instrs = [instr for instr in block.instrs if instr not in folded or instr.dest in used]
+        return stats
+
+
+def propagate_constants(module: ir.Module) -> Dict[str, Dict[str, int]]:
+    """Runs SCCP over every function of module, which must be in SSA form,
+    and returns the statistics of each function's rewrite by name.
+
+    Parameters start out unknown in functions that are called and take the
+    meet of the arguments at every call site in reachable code, until nothing
+    changes. main's parameters are never constant.
+    """
+    functions = {function.name: function for function in module.functions}
+    called = {instr.symbol for function in module.functions for block in function.blocks
+              for instr in block.instrs if instr.op == ir.CALL}
+    params = {name: [None if name in called and name != "main" else BOTTOM] * len(function.params)
+              for name, function in functions.items()}
+    cfgs = {name: CFG(function) for name, function in functions.items()}
+
+    while True:
+        solutions = {name: ConstantPropagation(function, cfgs[name], params[name])
+                     for name, function in functions.items()}
+        incoming = {name: [None if value is not BOTTOM else BOTTOM for value in values]
+                    for name, values in params.items()}
+        for name, solution in solutions.items():
+            for b in solution.reached:
+                for instr in cfgs[name].blocks[b].instrs:
+                    if instr.op == ir.CALL:
+                        arguments = incoming[instr.symbol]
+                        for i, arg in enumerate(instr.args):
+                            arguments[i] = meet(arguments[i], solution.value(arg))
+        if incoming == params:
+            break
+        params = incoming
+
+    # Parameters no reachable call passes a value to are left alone
+    for name, values in params.items():
+        if None in values:
+            params[name] = [BOTTOM if value is None else value for value in values]
+            solutions[name] = ConstantPropagation(functions[name], cfgs[name], params[name])
+    return {name: solutions[name].rewrite() for name in functions}
@@ -0,0 +1,240 @@
+"""Conversion of ir.Functions into and out of static single assignment form.
+
+construct_ssa renames every VReg that is assigned more than once (parameters
+and locals that are reassigned, and the results of && and ||) so that each
+VReg has exactly one definition, placing phi instructions only where a
+variable is live (pruned SSA, Cytron et al. with per-variable liveness).
+Struct fields and globals are memory and stay explicit loads and stores.
+
+destruct_ssa replaces the phis with copies at the end of the predecessors.
+Critical edges are split first, and the copies into each block are treated
+as one parallel copy and sequentialized, introducing a temporary only to
+break a cycle, so neither the lost-copy nor the swap problem can occur.
+"""
+from typing import Dict, List
+from miniir import ir
+from miniir.cfg import CFG
+
+
+def construct_ssa(function: ir.Function) -> CFG:
+    """Puts function into pruned SSA form and returns its CFG.
+
+    Every block must be reachable and every variable defined before use on
+    all paths, which IRBuilder guarantees by zeroing locals in the entry.
+    """
+    cfg = CFG(function)
+    blocks = cfg.blocks
+
+    # Definition sites and upward-exposed uses of every VReg
+    def_blocks: Dict[ir.VReg, List[int]] = {param: [0] for param in function.params}
+    use_blocks: Dict[ir.VReg, List[int]] = {}
+    for b, block in enumerate(blocks):
+        defined = set()
+        for instr in block.instrs:
+            for arg in instr.args:
+                if arg not in defined:
+                    uses = use_blocks.setdefault(arg, [])
+                    if not uses or uses[-1] != b:
+                        uses.append(b)
+            if instr.dest is not None:
+                defined.add(instr.dest)
+                sites = def_blocks.setdefault(instr.dest, [])
+                sites.append(b)
+    variables = {vreg for vreg, sites in def_blocks.items() if len(sites) > 1}
+
+    # Phi placement at the iterated dominance frontier, restricted to blocks where the variable is live
+    phi_variable: Dict[ir.Instr, ir.VReg] = {}
+    for vreg in variables:
+        live_in = live_in_blocks(cfg, def_blocks[vreg], use_blocks.get(vreg, ()))
+        has_phi = set()
+        worklist = list(set(def_blocks[vreg]))
+        queued = set(worklist)
+        while worklist:
+            b = worklist.pop()
+            for f in cfg.frontiers[b]:
+                if f in has_phi or f not in live_in:
+                    continue
+                has_phi.add(f)
+                preds = cfg.preds[f]
+                phi = ir.Instr(ir.PHI, vreg, [vreg] * len(preds), targets=[blocks[p] for p in preds])
+                blocks[f].instrs.insert(0, phi)
+                phi_variable[phi] = vreg
+                if f not in queued:
+                    queued.add(f)
+                    worklist.append(f)
+
+    rename(function, cfg, variables, phi_variable)
+    return cfg
+
+
+def live_in_blocks(cfg: CFG, def_blocks, use_blocks) -> set:
+    # Blocks where the variable is live on entry: walk back from its upward-exposed
+    # uses, stopping at blocks that define it
+    defining = set(def_blocks)
+    live_in = set()
+    worklist = list(use_blocks)
+    while worklist:
+        b = worklist.pop()
+        if b in live_in:
+            continue
+        live_in.add(b)
+        for p in cfg.preds[b]:
+            if p not in defining and p not in live_in:
+                worklist.append(p)
+    return live_in
+
+
+def rename(function: ir.Function, cfg: CFG, variables, phi_variable):
+    # Walks the dominator tree, keeping the current version of every variable on a stack
+    stacks: Dict[ir.VReg, List[ir.VReg]] = {vreg: [] for vreg in variables}
+    for param in function.params:
+        if param in stacks:
+            stacks[param].append(param)
+
+    def current(vreg):
+        versions = stacks.get(vreg)
+        if versions is None:
+            return vreg
+        if not versions:
+            raise ValueError(f"{function.name}: {vreg!r} may be used before it is defined")
+        return versions[-1]
+
+    walk = [(0, None)]
+    while walk:
+        b, pushed = walk.pop()
+        if pushed is not None:
+            for vreg in pushed:
+                stacks[vreg].pop()
+            continue
+        pushed = []
+        for instr in cfg.blocks[b].instrs:
+            if instr.op != ir.PHI:
+                instr.args = [current(arg) for arg in instr.args]
+            variable = phi_variable.get(instr, instr.dest)
+            if variable in stacks:
+                instr.dest = function.new_vreg(variable.name)
+                stacks[variable].append(instr.dest)
+                pushed.append(variable)
+        for s in cfg.succs[b]:
+            for instr in cfg.blocks[s].instrs:
+                if instr.op != ir.PHI:
+                    break
+                for j, p in enumerate(cfg.preds[s]):
+                    if p == b:
+                        instr.args[j] = current(phi_variable[instr])
+        walk.append((b, pushed))
+        walk.extend((child, None) for child in reversed(cfg.children[b]))
+
+
+def destruct_ssa(function: ir.Function):
+    """Replaces the phis of function with copies, leaving ordinary IR."""
+    split_critical_edges(function)
+    for block in function.blocks:
+        phis = [instr for instr in block.instrs if instr.op == ir.PHI]
+        if not phis:
+            continue
+        del block.instrs[:len(phis)]
+        for pred in dict.fromkeys(phis[0].targets):
+            copies = [(phi.dest, phi.args[phi.targets.index(pred)]) for phi in phis]
+            moves = [ir.Instr(ir.MOV, dest, [src])
+                     for dest, src in sequentialize(copies, lambda dest: function.new_vreg(dest.name))]
+            pred.instrs[-1:-1] = moves
+
+
+def split_critical_edges(function: ir.Function):
+    # Puts a new block on every edge from a branch to a block with phis, so the
+    # copies for that edge have a block of their own
+    pred_count: Dict[ir.BasicBlock, int] = {}
+    for block in function.blocks:
+        for target in dict.fromkeys(block.successors()):
+            pred_count[target] = pred_count.get(target, 0) + 1
+    inserted: Dict[ir.BasicBlock, List[ir.BasicBlock]] = {}
+    for block in function.blocks:
+        if len(block.successors()) < 2:
+            continue
+        for target in dict.fromkeys(block.successors()):
+            if pred_count[target] < 2 or target.instrs[0].op != ir.PHI:
+                continue
+            edge = function.new_block()
+            edge.instrs.append(ir.Instr(ir.JUMP, targets=[target]))
+            terminator = block.terminator()
+            terminator.targets = [edge if t is target else t for t in terminator.targets]
+            for instr in target.instrs:
+                if instr.op != ir.PHI:
+                    break
+                instr.targets = [edge if t is block else t for t in instr.targets]
+            inserted.setdefault(target, []).append(edge)
+    if inserted:
+        # Edge blocks go just before their target, so one of them can fall through
+        function.blocks = [b for block in function.blocks for b in inserted.get(block, []) + [block]]
+
+
+def sequentialize(copies, new_temp):
+    """Orders the parallel copy [(dest, src), ...] as a list of sequential moves.
+
+    Destinations are distinct. A move is emitted once no pending copy still
+    reads its destination; a cycle is broken by saving one destination in the
+    temporary new_temp(dest) returns. Each cycle is finished before the next
+    is broken, so the temporary may be the same location every time.
+    """
+    pending = {dest: src for dest, src in copies if dest != src}
+    readers: Dict[ir.VReg, int] = {}
+    for src in pending.values():
+        readers[src] = readers.get(src, 0) + 1
+    moves = []
+    ready = [dest for dest in pending if not readers.get(dest)]
+    while pending:
+        while ready:
+            dest = ready.pop()
+            src = pending.pop(dest)
+            moves.append((dest, src))
+            readers[src] -= 1
+            if readers[src] == 0 and src in pending:
+                ready.append(src)
+        if pending:
+            # Only cycles are left
+            dest = next(iter(pending))
+            temp = new_temp(dest)
+            moves.append((temp, dest))
+            for other, src in pending.items():
+                if src == dest:
+                    pending[other] = temp
+            readers[temp] = readers[dest]
+            readers[dest] = 0
+            ready.append(dest)
+    return moves
+
+
+def verify_ssa(function: ir.Function) -> List[str]:
+    """Returns the SSA violations in function: VRegs defined more than once
+    and uses that their definition does not dominate."""
+    cfg = CFG(function)
+    problems = []
+    definition: Dict[ir.VReg, tuple] = {param: (0, -1) for param in function.params}
+    for b, block in enumerate(cfg.blocks):
+        for i, instr in enumerate(block.instrs):
+            if instr.dest is None:
+                continue
+            if instr.dest in definition:
+                problems.append(f"{function.name}: {instr.dest!r} is defined more than once")
+            definition[instr.dest] = (b, i)
+
+    def check(vreg, b, i):
+        if vreg not in definition:
+            problems.append(f"{function.name}: {vreg!r} is used in {cfg.blocks[b].label} but never defined")
+            return
+        def_block, def_index = definition[vreg]
+        if def_block == b and def_index >= i or not cfg.dominates(def_block, b):
+            problems.append(f"{function.name}: the definition of {vreg!r} does not dominate its use"
+                            f" in {cfg.blocks[b].label}")
+
+    for b, block in enumerate(cfg.blocks):
+        for i, instr in enumerate(block.instrs):
+            if instr.op == ir.PHI:
+                for arg, pred in zip(instr.args, instr.targets):
+                    p = cfg.index[pred]
+                    check(arg, p, len(cfg.blocks[p].instrs))
+            else:
+                for arg in instr.args:
+                    check(arg, b, i)
+    return problems
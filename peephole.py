@@ -0,0 +1,293 @@
+"""Peephole optimization of emitted RISC-V code.
+
+The backends emit Instr and Label objects, and plain strings for directives
+and blank lines. An Instr may list the registers whose values are dead once
+it has run, which lets the rules below drop or fuse writes that a backend
+knows nobody reads; without that the rules only rely on what the window
+itself shows.
+
+RULES is a table of rewrites of windows of a few items, each with the
+opcodes its first and last item may have (a label's opcode is ":").
+peephole_optimize appends the items to its output one at a time and tries
+the rules whose window can end with the new item; a rewrite puts its result
+back in front of the remaining input, so windows it creates are matched in
+turn. Every rewrite removes an instruction or makes one cheaper, so this
+takes linear time. Jumps to jumps are threaded through a label table, and
+rewriting and threading alternate until neither changes anything.
+"""
+
+# Instructions whose first operand is the only register they write
+DESTINATION_OPS = frozenset(["add", "addi", "sub", "mul", "div", "rem", "slt", "sltu", "xori", "seqz", "snez",
+                             "neg", "mv", "li", "la", "lw", "slli", "srai", "srli", "and", "or", "xor", "andi",
+                             "ori"])
+# Instructions that write their first operand and nothing else, without touching memory or trapping
+PURE_OPS = DESTINATION_OPS - {"lw", "div", "rem"}
+# Instructions after which control never reaches the next one
+UNCONDITIONAL_OPS = frozenset(["j", "ret", "jr"])
+# Conditional branch -> the branch taken exactly when it is not
+INVERTED = {"beqz": "bnez", "bnez": "beqz", "beq": "bne", "bne": "beq", "blt": "bge", "bge": "blt",
+            "bltu": "bgeu", "bgeu": "bltu"}
+BRANCH_OPS = frozenset(INVERTED) | {"j"}
+
+SMALL_IMMEDIATE = range(-2048, 2048)
+
+
+class Instr:
+    """One instruction: an opcode and its operands as they are written, with
+    memory operands such as -12(fp) kept whole, and the registers dead after it."""
+
+    __slots__ = ("op", "operands", "dead")
+
+    def __init__(self, op, *operands, dead=()):
+        self.op = op
+        self.operands = operands
+        self.dead = dead
+
+    def __str__(self):
+        if not self.operands:
+            return f"    {self.op}"
+        return f"    {self.op} {', '.join(self.operands)}"
+
+    def __repr__(self):
+        return f"Instr({str(self).strip()!r})"
+
+    def writes(self):
+        # The register the instruction writes, or None; calls write more and are never looked into
+        if self.op in DESTINATION_OPS:
+            return self.operands[0]
+        return None
+
+    def reads(self):
+        # The registers the instruction reads explicitly
+        operands = self.operands[1:] if self.op in DESTINATION_OPS else self.operands
+        if self.op in BRANCH_OPS:
+            operands = operands[:-1]
+        elif self.op in ("li", "la", "jal"):
+            operands = ()
+        return [base(operand) for operand in operands]
+
+
+class Label:
+    """A label, printed after a blank line if spaced (a blank line of its own
+    would come between a jump and the label it jumps to)."""
+
+    __slots__ = ("name", "spaced")
+    op = ":"
+
+    def __init__(self, name, spaced=False):
+        self.name = name
+        self.spaced = spaced
+
+    def __str__(self):
+        return f"\n{self.name}:" if self.spaced else f"{self.name}:"
+
+    def __repr__(self):
+        return f"Label({self.name!r})"
+
+
+def base(operand):
+    # The register of an operand: itself, or the base of a memory operand offset(base)
+    if operand.endswith(")"):
+        return operand[operand.index("(") + 1:-1]
+    return operand
+
+
+# ---- rules: each takes the window and returns its replacement, or None to leave it ----
+
+def drop_self_move(mv):
+    if mv.operands[0] == mv.operands[1]:
+        return []
+    return None
+
+
+def drop_jump_to_next(jump, label):
+    if jump.operands[0] == label.name:
+        return [label]
+    return None
+
+
+def drop_unreachable(transfer, instr):
+    if transfer.op != "jal" or transfer.operands[0] == "zero":
+        return [transfer]
+    return None
+
+
+def forward_store(store, *window):
+    # sw r, A; ...; lw r2, A reloads r: unless r or the base of A changed or memory was written in between
+    *between, load = window
+    if store.operands[1] != load.operands[1]:
+        return None
+    value, address = store.operands[0], store.operands[1]
+    for instr in between:
+        if not isinstance(instr, Instr) or instr.op in ("sw", "jal") or instr.op in BRANCH_OPS \
+                or instr.writes() in (value, base(address)):
+            return None
+    if load.operands[0] == value:
+        return [store, *between]
+    return [store, *between, Instr("mv", load.operands[0], value, dead=load.dead)]
+
+
+def drop_store_of_load(load, store):
+    if load.operands == store.operands and base(load.operands[1]) != load.operands[0]:
+        return [load]
+    return None
+
+
+def add_immediate(li, instr):
+    # li r, K; add d, x, r -> addi d, x, K when r is dead after the add or is its destination
+    if int(li.operands[1]) not in SMALL_IMMEDIATE:
+        return None
+    register, constant = li.operands[0], int(li.operands[1])
+    d, x, y = instr.operands
+    if register not in instr.dead and register != d:
+        return None
+    if instr.op == "add" and (x == register) != (y == register):
+        return [Instr("addi", d, y if x == register else x, str(constant), dead=instr.dead)]
+    if instr.op == "sub" and y == register and x != register and -constant in SMALL_IMMEDIATE:
+        return [Instr("addi", d, x, str(-constant), dead=instr.dead)]
+    return None
+
+
+def propagate_copy(mv, instr):
+    # mv r, s; X reading r, with r dead after X -> X reading s
+    register, source = mv.operands
+    if register == source or register not in instr.reads() or register not in instr.dead:
+        return None
+    operands = list(instr.operands)
+    first = 1 if instr.op in DESTINATION_OPS else 0
+    for i in range(first, len(operands) - (instr.op in BRANCH_OPS)):
+        if operands[i] == register:
+            operands[i] = source
+        elif operands[i].endswith(f"({register})"):
+            operands[i] = operands[i][:operands[i].index("(")] + f"({source})"
+    dead = tuple(r for r in instr.dead if r != register)
+    return [Instr(instr.op, *operands, dead=dead)]
+
+
+def drop_overwritten(instr, overwrite):
+    # A pure write of r immediately overwritten by an instruction that does not read r
+    register = instr.operands[0]
+    if overwrite.operands[0] == register and register not in overwrite.reads():
+        return [overwrite]
+    if overwrite.op == "mv" and instr.op == "mv" and overwrite.operands == instr.operands[::-1]:
+        return [instr]  # mv a, b; mv b, a
+    return None
+
+
+def fuse_test(test, branch):
+    # Branches on a boolean that is dead afterwards test what it was computed from
+    if test.operands[0] != branch.operands[0] or branch.operands[0] not in branch.dead:
+        return None
+    register, label = branch.operands
+    taken_if_zero = branch.op == "beqz"
+    if test.op in ("seqz", "snez"):
+        source = test.operands[1]
+        op = "bnez" if (test.op == "seqz") == taken_if_zero else "beqz"
+        return [Instr(op, source, label, dead=(source,) if source == register else ())]
+    if test.op == "xori" and test.operands[2] == "1" and test.operands[1] == register:
+        return [Instr(INVERTED[branch.op], register, label, dead=branch.dead)]
+    if test.op == "sub":
+        return [Instr("beq" if taken_if_zero else "bne", test.operands[1], test.operands[2], label)]
+    if test.op == "slt":
+        return [Instr("bge" if taken_if_zero else "blt", test.operands[1], test.operands[2], label)]
+    return None
+
+
+def invert_branch(branch, jump, label):
+    # bcond L1; j L2; L1: -> binv L2; L1:
+    if not isinstance(jump, Instr) or jump.op != "j" or branch.operands[-1] != label.name:
+        return None
+    return [Instr(INVERTED[branch.op], *branch.operands[:-1], jump.operands[0], dead=branch.dead), label]
+
+
+INSTRUCTION_OPS = DESTINATION_OPS | BRANCH_OPS | {"sw", "jal", "ret", "jr"}
+# (opcodes of the first item of the window, of the last, window size, rewrite)
+RULES = [
+    ({"mv"}, {"mv"}, 1, drop_self_move),
+    ({"j"}, {":"}, 2, drop_jump_to_next),
+    (UNCONDITIONAL_OPS | {"jal"}, INSTRUCTION_OPS, 2, drop_unreachable),
+    ({"sw"}, {"lw"}, 2, forward_store),
+    ({"sw"}, {"lw"}, 3, forward_store),
+    ({"sw"}, {"lw"}, 4, forward_store),
+    ({"lw"}, {"sw"}, 2, drop_store_of_load),
+    ({"li"}, {"add", "sub"}, 2, add_immediate),
+    ({"mv"}, INSTRUCTION_OPS - {"jal"}, 2, propagate_copy),
+    (PURE_OPS, DESTINATION_OPS, 2, drop_overwritten),
+    ({"seqz", "snez", "xori", "sub", "slt"}, {"beqz", "bnez"}, 2, fuse_test),
+    (set(INVERTED), {":"}, 3, invert_branch),
+]
+# Last opcode -> [(window size, first opcodes, rewrite)], in the order of RULES
+RULES_BY_LAST_OP = {}
+for first_ops, last_ops, size, rewrite_window in RULES:
+    for op in last_ops:
+        RULES_BY_LAST_OP.setdefault(op, []).append((size, frozenset(first_ops), rewrite_window))
+
+
+def rewrite(items):
+    # One pass of the rule table; returns the rewritten items and how many rewrites were made
+    output = []
+    pending = items[::-1]
+    rewrites = 0
+    while pending:
+        item = pending.pop()
+        output.append(item)
+        if item.__class__ is str:
+            continue
+        rules = RULES_BY_LAST_OP.get(item.op)
+        if rules is None:
+            continue
+        n = len(output)
+        for size, first_ops, rule in rules:
+            if n < size:
+                continue
+            first = output[-size]
+            if first.__class__ is str or first.op not in first_ops:
+                continue
+            replacement = rule(*output[-size:])
+            if replacement is not None:
+                del output[-size:]
+                pending.extend(reversed(replacement))
+                rewrites += 1
+                break
+    return output, rewrites
+
+
+def thread_branches(items):
+    # Sends jumps and branches to a label that starts with j L straight to L
+    forward = {}
+    labels = []
+    for item in items:
+        if isinstance(item, Label):
+            labels.append(item.name)
+        elif labels:
+            if isinstance(item, Instr) and item.op == "j":
+                for name in labels:
+                    forward[name] = item.operands[0]
+            labels = []
+
+    def destination(name):
+        seen = set()
+        while name in forward and name not in seen:
+            seen.add(name)
+            name = forward[name]
+        return name
+
+    threaded = 0
+    for i, item in enumerate(items):
+        if isinstance(item, Instr) and item.op in BRANCH_OPS and item.operands[-1] in forward:
+            target = destination(item.operands[-1])
+            if target != item.operands[-1]:
+                items[i] = Instr(item.op, *item.operands[:-1], target, dead=item.dead)
+                threaded += 1
+    return threaded
+
+
+def peephole_optimize(items):
+    """Rewrites a list of Instr, Label and directive lines until no rule applies
+    and returns the result."""
+    items = list(items)
+    thread_branches(items)
+    while True:
+        items, rewrites = rewrite(items)
+        if not rewrites or not thread_branches(items):
+            return items
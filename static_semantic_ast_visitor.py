@@ -1,57 +1,61 @@
 from miniast import mini_ast, program_ast, type_ast, statement_ast, expression_ast, lvalue_ast
+from miniast.interning import ASTInterner
 from typing import Dict, List, Optional, Any
 
 class SymbolTable:
-    # Simple scoped symbol table that supports nested scopes
-    def __init__(self, parent=None):
-        # creates symbols and stores parent nodes
+    """Scoped symbol table with O(1) lookups.
+
+    symbols maps every visible name straight to its innermost binding. Each open
+    scope records the names it declared together with the binding each one
+    shadows, which is restored when the scope is closed.
+    """
+
+    def __init__(self):
         self.symbols: Dict[str, Any] = {}
-        self.parent = parent
+        self.scopes: List[Dict[str, tuple]] = [{}] # name -> (info, shadowed info); scopes[0] is global
+
+    def enter_scope(self):
+        self.scopes.append({})
+
+    def exit_scope(self):
+        for name, (_, shadowed) in self.scopes.pop().items():
+            if shadowed is None:
+                del self.symbols[name]
+            else:
+                self.symbols[name] = shadowed
     
     def insert(self, name: str, info: Any) -> bool:
         #inserts info for name into the current scope, return false if name exists locally
-        if name in self.symbols:
+        scope = self.scopes[-1]
+        if name in scope:
             return False
+        scope[name] = (info, self.symbols.get(name))
         self.symbols[name] = info
         return True
     
     def lookup(self, name: str) -> Optional[Any]:
-        #Recursive lookup, returns symbol from current scope, or asks parent
-        if name in self.symbols:
-            return self.symbols[name]
-        if self.parent:
-            return self.parent.lookup(name)
-        return None
+        #returns the innermost binding of name
+        return self.symbols.get(name)
     
     def lookup_local(self, name: str) -> Optional[Any]:
         #only returns symbol from current scope
-        return self.symbols.get(name)
+        entry = self.scopes[-1].get(name)
+        return entry[0] if entry else None
 
+    def lookup_global(self, name: str) -> Optional[Any]:
+        entry = self.scopes[0].get(name)
+        return entry[0] if entry else None
+
+
+# Operator classes of binary expressions. Tuples rather than sets: membership
+# then tests identity in C instead of calling Enum.__hash__
+ARITHMETIC_OPERATORS = (expression_ast.Operator.TIMES, expression_ast.Operator.DIVIDE,
+                        expression_ast.Operator.PLUS, expression_ast.Operator.MINUS)
+RELATIONAL_OPERATORS = (expression_ast.Operator.LT, expression_ast.Operator.LE,
+                        expression_ast.Operator.GT, expression_ast.Operator.GE)
+EQUALITY_OPERATORS = (expression_ast.Operator.EQ, expression_ast.Operator.NE)
+BOOLEAN_OPERATORS = (expression_ast.Operator.AND, expression_ast.Operator.OR)
 
-class TypeInfo:
-    #Thin wrapper around AST type objects used for runtime equality and comparison
-    def __init__(self, type_obj):
-        #store type object
-        self.type_obj = type_obj
-    
-    def __eq__(self, other):
-        #compares two TypeInfo instances
-        if not isinstance(other, TypeInfo):
-            return False
-        return self.compare_types(self.type_obj, other.type_obj)
-    
-    @staticmethod
-    # static compare method
-    def compare_types(t1, t2) -> bool:
-        if isinstance(t1, type_ast.IntType) and isinstance(t2, type_ast.IntType):
-            return True
-        if isinstance(t1, type_ast.BoolType) and isinstance(t2, type_ast.BoolType):
-            return True
-        if isinstance(t1, type_ast.StructType) and isinstance(t2, type_ast.StructType):
-            return t1.name.id == t2.name.id
-        if isinstance(t1, type_ast.ReturnTypeVoid) and isinstance(t2, type_ast.ReturnTypeVoid):
-            return True
-        return False
 #Data containers used as entires stored in the symbol table
 
 class FunctionInfo:
@@ -63,24 +67,50 @@ class FunctionInfo:
 
 
 class VariableInfo:
-    def __init__(self, name: str, type_obj, linenum: int):
+    # A global (index = position among the global declarations) or a frame slot
+    # of the current function (index = position among its parameters, then locals)
+    def __init__(self, name: str, type_obj, linenum: int, is_global: bool, index: int):
         self.name = name
         self.type_obj = type_obj
         self.linenum = linenum
+        self.is_global = is_global
+        self.index = index
 
 
 class StructInfo:
+    # offsets and size give the layout of the struct: every field is a 4-byte word
     def __init__(self, name: str, fields: Dict[str, program_ast.Declaration], linenum: int):
         self.name = name
         self.fields = fields
         self.linenum = linenum
+        self.offsets: Dict[str, int] = {}
+        self.size = 0
 
 
 class StaticSemanticASTVisitor(mini_ast.ASTVisitor):
-    def __init__(self):
+    """Type checks a .mini AST.
+
+    Expressions are typed with the canonical type nodes of an ASTInterner: one
+    each for int, bool, void and null, and one per struct name. Two types are
+    equal exactly when they are the same object. Declared types are mapped to
+    their canonical node once and cached, and struct types are looked up by
+    name, so the AST may also come from a frontend that used a different
+    interner or one that does not share struct nodes.
+    """
+
+    def __init__(self, interner: ASTInterner = None):
+        # interner should be the one the AST was built with, so that most declared types are already canonical
+        self.interner = interner if interner is not None else ASTInterner()
+        self.int_type = self.interner.int_type()
+        self.bool_type = self.interner.bool_type()
+        self.void_type = self.interner.void_type()
+        self.null_type = self.interner.null_type(-1)
+        self.canonical_types: Dict[Any, Any] = {} # declared type node -> canonical type node
+        self.struct_types: Dict[str, type_ast.StructType] = {} # struct name -> canonical type node
         self.errors: List[str] = [] # collects error messages
-        self.global_scope = SymbolTable() # symbol table, swithces to current scope when entering functions
-        self.current_scope = self.global_scope
+        self.symbol_table = SymbolTable() # a function scope is opened on top of the global one while visiting it
+        self.global_count = 0 # globals declared so far
+        self.frame_count = 0 # frame slots of the current function assigned so far
         self.struct_table: Dict[str, StructInfo] = {} # registry of struct delcarations
         self.current_function: Optional[FunctionInfo] = None # used for checks inside functions
         self.has_main = False # flag to check if main function is present
@@ -96,6 +126,35 @@ class StaticSemanticASTVisitor(mini_ast.ASTVisitor):
     def add_error(self, message: str, linenum: int):
         self.errors.append(f"ERROR. {message} #{linenum}")
     
+    def canonical(self, type_obj):
+        # Returns the canonical node for a declared type
+        canonical = self.canonical_types.get(type_obj)
+        if canonical is None:
+            if isinstance(type_obj, type_ast.StructType):
+                canonical = self.struct_type(type_obj.linenum, type_obj.name.id)
+            elif isinstance(type_obj, type_ast.IntType):
+                canonical = self.int_type
+            elif isinstance(type_obj, type_ast.BoolType):
+                canonical = self.bool_type
+            elif isinstance(type_obj, type_ast.ReturnTypeReal):
+                canonical = self.canonical(type_obj.type_)
+            else:
+                canonical = self.void_type
+            self.canonical_types[type_obj] = canonical
+        return canonical
+
+    def struct_type(self, linenum, name):
+        # The canonical node of struct name, drawn from the interner once per analysis
+        struct_type = self.struct_types.get(name)
+        if struct_type is None:
+            struct_type = self.struct_types[name] = self.interner.struct_type(linenum, name)
+        return struct_type
+
+    def typed(self, node):
+        # Visits an expression or lvalue and records its type on the node for later passes
+        node.type = node.accept(self)
+        return node.type
+
     def get_type_string(self, type_obj) -> str:
         if isinstance(type_obj, type_ast.IntType):
             return "int"
@@ -131,17 +190,17 @@ class StaticSemanticASTVisitor(mini_ast.ASTVisitor):
         
         for func in program.functions:
             func_name = func.name.id
-            if self.global_scope.lookup_local(func_name):
+            if self.symbol_table.lookup_local(func_name):
                 self.add_error(f"Function '{func_name}' already declared", func.linenum)
             else:
-                func_info = FunctionInfo(func_name, func.ret_type, func.params, func.linenum)
-                self.global_scope.insert(func_name, func_info)
+                func_info = FunctionInfo(func_name, self.canonical(func.ret_type), func.params, func.linenum)
+                self.symbol_table.insert(func_name, func_info)
                 
                 if func_name == "main":
                     self.has_main = True
                     if len(func.params) != 0:
                         self.add_error("main() must take no arguments", func.linenum)
-                    if not isinstance(func.ret_type, type_ast.IntType):
+                    if func_info.return_type is not self.int_type:
                         self.add_error("main() must return int", func.linenum)
         
         for func in program.functions:
@@ -158,14 +217,16 @@ class StaticSemanticASTVisitor(mini_ast.ASTVisitor):
         struct_info = self.struct_table[struct_name]
         
         field_dict = {}
-        for field in type_decl.fields:
+        for i, field in enumerate(type_decl.fields):
             field_name = field.name.id
             if field_name in field_dict:
                 self.add_error(f"Field '{field_name}' already declared in struct '{struct_name}'", field.linenum)
             else:
                 field_dict[field_name] = field
+                struct_info.offsets[field_name] = i * 4
         
         struct_info.fields = field_dict
+        struct_info.size = len(type_decl.fields) * 4
     
     def visit_declaration(self, decl: program_ast.Declaration):
         # Handles top-level and local variable declarations
@@ -173,12 +234,18 @@ class StaticSemanticASTVisitor(mini_ast.ASTVisitor):
         # Inserts variable into current scope
         var_name = decl.name.id
         
-        if self.current_scope.lookup_local(var_name):
+        if self.symbol_table.lookup_local(var_name):
             self.add_error(f"Variable '{var_name}' already declared in this scope", decl.linenum)
             return
         
-        var_info = VariableInfo(var_name, decl.type, decl.linenum)
-        self.current_scope.insert(var_name, var_info)
+        if self.current_function is None:
+            var_info = VariableInfo(var_name, self.canonical(decl.type), decl.linenum, True, self.global_count)
+            self.global_count += 1
+        else:
+            var_info = VariableInfo(var_name, self.canonical(decl.type), decl.linenum, False, self.frame_count)
+            self.frame_count += 1
+        self.symbol_table.insert(var_name, var_info)
+        decl.name.binding = var_info
     
     def visit_function(self, func: program_ast.Function):
         # Sets up a fresh scope for the function
@@ -190,18 +257,21 @@ class StaticSemanticASTVisitor(mini_ast.ASTVisitor):
         # Resets current function to None
         func_name = func.name.id
         
-        self.current_scope = SymbolTable(self.global_scope)
-        self.current_function = self.global_scope.lookup(func_name)
+        self.symbol_table.enter_scope()
+        self.current_function = self.symbol_table.lookup_global(func_name)
+        func.name.binding = self.current_function
+        self.frame_count = len(func.params)
         
         param_names = set()
-        for param in func.params:
+        for i, param in enumerate(func.params):
             param_name = param.name.id
             if param_name in param_names:
                 self.add_error(f"Parameter '{param_name}' already declared", param.linenum)
             else:
                 param_names.add(param_name)
-                var_info = VariableInfo(param_name, param.type, param.linenum)
-                self.current_scope.insert(param_name, var_info)
+                var_info = VariableInfo(param_name, self.canonical(param.type), param.linenum, False, i)
+                self.symbol_table.insert(param_name, var_info)
+                param.name.binding = var_info
         
         for local in func.locals:
             local_name = local.name.id
@@ -213,37 +283,37 @@ class StaticSemanticASTVisitor(mini_ast.ASTVisitor):
         for stmt in func.body:
             stmt.accept(self)
         
-        self.current_scope = self.global_scope
+        self.symbol_table.exit_scope()
         self.current_function = None
     
     def visit_int_type(self, int_type: type_ast.IntType):
-        return TypeInfo(int_type)
+        return self.int_type
     
     def visit_bool_type(self, bool_type: type_ast.BoolType):
-        return TypeInfo(bool_type)
+        return self.bool_type
     
     def visit_struct_type(self, struct_type: type_ast.StructType):
-        return TypeInfo(struct_type)
+        return self.canonical(struct_type)
     
     def visit_return_type_real(self, return_type_real: type_ast.ReturnTypeReal):
         return return_type_real.type_.accept(self)
     
     def visit_return_type_void(self, return_type_void: type_ast.ReturnTypeVoid):
-        return TypeInfo(return_type_void)
+        return self.void_type
     
     def visit_assignment_statement(self, stmt: statement_ast.AssignmentStatement):
         #Gets target and source types
         # If either is None, skip further checks
-        target_type = stmt.target.accept(self)
-        source_type = stmt.source.accept(self)
+        target_type = self.typed(stmt.target)
+        source_type = self.typed(stmt.source)
         
         if target_type and source_type:
             if isinstance(stmt.source, expression_ast.NullExpression):
-                if not isinstance(target_type.type_obj, type_ast.StructType):
+                if not isinstance(target_type, type_ast.StructType):
                     self.add_error("null can only be assigned to struct types", stmt.linenum)
-            elif not target_type == source_type:
+            elif target_type is not source_type:
                 self.add_error(
-                    f"Type mismatch in assignment: cannot assign {self.get_type_string(source_type.type_obj)} to {self.get_type_string(target_type.type_obj)}",
+                    f"Type mismatch in assignment: cannot assign {self.get_type_string(source_type)} to {self.get_type_string(target_type)}",
                     stmt.linenum
                 )
     
@@ -254,8 +324,8 @@ class StaticSemanticASTVisitor(mini_ast.ASTVisitor):
     
     def visit_conditional_statement(self, stmt: statement_ast.ConditionalStatement):
         # Both requrie the guard to be boolean
-        guard_type = stmt.guard.accept(self)
-        if guard_type and not isinstance(guard_type.type_obj, type_ast.BoolType):
+        guard_type = self.typed(stmt.guard)
+        if guard_type and guard_type is not self.bool_type:
             self.add_error("if statement guard must be boolean", stmt.linenum)
         
         stmt.then_block.accept(self)
@@ -263,38 +333,38 @@ class StaticSemanticASTVisitor(mini_ast.ASTVisitor):
             stmt.else_block.accept(self)
     
     def visit_while_statement(self, stmt: statement_ast.WhileStatement):
-        guard_type = stmt.guard.accept(self)
-        if not guard_type or not isinstance(guard_type.type_obj, type_ast.BoolType):
+        guard_type = self.typed(stmt.guard)
+        if guard_type is not self.bool_type:
             self.add_error("while statement guard must be boolean", stmt.linenum)
         
         stmt.body.accept(self)
     
     def visit_delete_statement(self, stmt: statement_ast.DeleteStatement):
-        expr_type = stmt.expression.accept(self)
-        if expr_type and not isinstance(expr_type.type_obj, type_ast.StructType):
+        expr_type = self.typed(stmt.expression)
+        if expr_type and not isinstance(expr_type, type_ast.StructType):
             self.add_error("delete requires a struct type", stmt.linenum)
     
     def visit_invocation_statement(self, stmt: statement_ast.InvocationStatement):
         # Looks up function in global scope, checks arity, verifies function existence
-        stmt.expression.accept(self)
+        self.typed(stmt.expression)
     
     def visit_println_statement(self, stmt: statement_ast.PrintLnStatement):
-        expr_type = stmt.expression.accept(self)
-        if not expr_type or not isinstance(expr_type.type_obj, type_ast.IntType):
+        expr_type = self.typed(stmt.expression)
+        if expr_type is not self.int_type:
             self.add_error("print statement requires int argument", stmt.linenum)
     
     def visit_print_statement(self, stmt: statement_ast.PrintStatement):
-        expr_type = stmt.expression.accept(self)
-        if not expr_type or not isinstance(expr_type.type_obj, type_ast.IntType):
+        expr_type = self.typed(stmt.expression)
+        if expr_type is not self.int_type:
             self.add_error("print statement requires int argument", stmt.linenum)
     
     def visit_return_statement(self, stmt: statement_ast.ReturnStatement):
         if not self.current_function:
             return
         
-        expr_type = stmt.expression.accept(self) if stmt.expression else None
+        expr_type = self.typed(stmt.expression) if stmt.expression else None
         
-        if isinstance(self.current_function.return_type, type_ast.ReturnTypeVoid):
+        if self.current_function.return_type is self.void_type:
             if expr_type:
                 self.add_error(f"Function '{self.current_function.name}' with void return type cannot return a value", stmt.linenum)
         else:
@@ -304,7 +374,7 @@ class StaticSemanticASTVisitor(mini_ast.ASTVisitor):
                     stmt.linenum
                 )
             else:
-                expected_type = TypeInfo(self.current_function.return_type)
+                expected_type = self.current_function.return_type
                 # Allow null to be returned for struct types
                 if isinstance(stmt.expression, expression_ast.NullExpression):
                     if not isinstance(self.current_function.return_type, type_ast.StructType):
@@ -312,30 +382,30 @@ class StaticSemanticASTVisitor(mini_ast.ASTVisitor):
                             f"Cannot return null for non-struct type {self.get_type_string(self.current_function.return_type)}",
                             stmt.linenum
                         )
-                elif not expr_type == expected_type:
+                elif expr_type is not expected_type:
                     self.add_error(
-                        f"Return type mismatch: expected {self.get_type_string(self.current_function.return_type)}, got {self.get_type_string(expr_type.type_obj)}",
+                        f"Return type mismatch: expected {self.get_type_string(self.current_function.return_type)}, got {self.get_type_string(expr_type)}",
                         stmt.linenum
                     )
 
     def visit_return_empty_statement(self, stmt: statement_ast.ReturnEmptyStatement):
-        if self.current_function and not isinstance(self.current_function.return_type, type_ast.ReturnTypeVoid):
+        if self.current_function and self.current_function.return_type is not self.void_type:
             self.add_error(
                 f"Function '{self.current_function.name}' must return a value of type {self.get_type_string(self.current_function.return_type)}",
                 stmt.linenum
             )
         
     def visit_dot_expression(self, expr: expression_ast.DotExpression):
-        left_type = expr.left.accept(self)
+        left_type = self.typed(expr.left)
         
         if not left_type:
             return None
         
-        if not isinstance(left_type.type_obj, type_ast.StructType):
+        if not isinstance(left_type, type_ast.StructType):
             self.add_error("Dot operator requires struct type", expr.linenum)
             return None
         
-        struct_name = left_type.type_obj.name.id
+        struct_name = left_type.name.id
         if struct_name not in self.struct_table:
             return None
         
@@ -347,24 +417,26 @@ class StaticSemanticASTVisitor(mini_ast.ASTVisitor):
             return None
         
         field = struct_info.fields[field_name]
-        return TypeInfo(field.type)
+        expr.offset = struct_info.offsets[field_name]
+        return self.canonical(field.type)
     
     def visit_false_expression(self, expr: expression_ast.FalseExpression):
-        return TypeInfo(type_ast.BoolType())
+        return self.bool_type
     
     def visit_true_expression(self, expr: expression_ast.TrueExpression):
-        return TypeInfo(type_ast.BoolType())
+        return self.bool_type
     
     def visit_identifier_expression(self, expr: expression_ast.IdentifierExpression):
         var_name = expr.id
-        var_info = self.current_scope.lookup(var_name)
+        var_info = self.symbol_table.lookup(var_name)
         
         if not var_info:
             self.add_error(f"Variable '{var_name}' not declared", expr.linenum)
             return None
         
         if isinstance(var_info, VariableInfo):
-            return TypeInfo(var_info.type_obj)
+            expr.binding = var_info
+            return var_info.type_obj
         
         self.add_error(f"'{var_name}' is not a variable", expr.linenum)
         return None
@@ -376,23 +448,24 @@ class StaticSemanticASTVisitor(mini_ast.ASTVisitor):
             self.add_error(f"Struct type '{struct_name}' not defined", expr.linenum)
             return None
         
-        return TypeInfo(type_ast.StructType(expr.linenum, expr.id))
+        expr.id.binding = self.struct_table[struct_name]
+        return self.struct_type(expr.linenum, struct_name)
     
     def visit_null_expression(self, expr: expression_ast.NullExpression):
-        return TypeInfo(type_ast.StructType(expr.linenum, expression_ast.IdentifierExpression(expr.linenum, "__null__")))
+        return self.null_type
     
     def visit_read_expression(self, expr: expression_ast.ReadExpression):
-        return TypeInfo(type_ast.IntType())
+        return self.int_type
     
     def visit_integer_expression(self, expr: expression_ast.IntegerExpression):
-        return TypeInfo(type_ast.IntType())
+        return self.int_type
     
     def visit_invocation_expression(self, expr: expression_ast.InvocationExpression):
         # Lookup function by name in global scope
         # Check arugment count equals parameter count
 
         func_name = expr.name.id
-        func_info = self.global_scope.lookup(func_name)
+        func_info = self.symbol_table.lookup_global(func_name)
         
         if not func_info:
             self.add_error(f"Function '{func_name}' not declared", expr.linenum)
@@ -402,108 +475,92 @@ class StaticSemanticASTVisitor(mini_ast.ASTVisitor):
             self.add_error(f"'{func_name}' is not a function", expr.linenum)
             return None
         
+        expr.name.binding = func_info
+        
         if len(expr.arguments) != len(func_info.params):
             self.add_error(
                 f"Function '{func_name}' expects {len(func_info.params)} arguments, got {len(expr.arguments)}",
                 expr.linenum
             )
-            return TypeInfo(func_info.return_type)
+            return func_info.return_type
         
         for i, (arg, param) in enumerate(zip(expr.arguments, func_info.params)):
-            arg_type = arg.accept(self)
-            param_type = TypeInfo(param.type)
+            arg_type = self.typed(arg)
+            param_type = self.canonical(param.type)
             
-            if arg_type and not arg_type == param_type:
+            if arg_type and arg_type is not param_type:
                 if not (isinstance(arg, expression_ast.NullExpression) and isinstance(param.type, type_ast.StructType)):
                     self.add_error(
-                        f"Argument {i+1} to '{func_name}': expected {self.get_type_string(param.type)}, got {self.get_type_string(arg_type.type_obj)}",
+                        f"Argument {i+1} to '{func_name}': expected {self.get_type_string(param.type)}, got {self.get_type_string(arg_type)}",
                         expr.linenum
                     )
         
-        return TypeInfo(func_info.return_type)
+        return func_info.return_type
     
     def visit_unary_expression(self, expr: expression_ast.UnaryExpression):
-        operand_type = expr.operand.accept(self)
+        operand_type = self.typed(expr.operand)
         
         if not operand_type:
             return None
         
-        if expr.operator == expression_ast.Operator.NOT:
-            if not isinstance(operand_type.type_obj, type_ast.BoolType):
+        if expr.operator is expression_ast.Operator.NOT:
+            if operand_type is not self.bool_type:
                 self.add_error("! operator requires boolean operand", expr.linenum)
-            return TypeInfo(type_ast.BoolType())
-        elif expr.operator == expression_ast.Operator.MINUS:
-            if not isinstance(operand_type.type_obj, type_ast.IntType):
+            return self.bool_type
+        elif expr.operator is expression_ast.Operator.MINUS:
+            if operand_type is not self.int_type:
                 self.add_error("- operator requires int operand", expr.linenum)
-            return TypeInfo(type_ast.IntType())
+            return self.int_type
         
         return None
     
     def visit_binary_expression(self, expr: expression_ast.BinaryExpression):
-        left_type = expr.left.accept(self)
-        right_type = expr.right.accept(self)
+        left_type = self.typed(expr.left)
+        right_type = self.typed(expr.right)
         
         if not left_type or not right_type:
             return None
         
         op = expr.operator
         
-        if op in [expression_ast.Operator.TIMES, expression_ast.Operator.DIVIDE,
-                expression_ast.Operator.PLUS, expression_ast.Operator.MINUS]:
-            left_ok = isinstance(left_type.type_obj, type_ast.IntType)
-            right_ok = isinstance(right_type.type_obj, type_ast.IntType)
-            if not (left_ok and right_ok):
+        if op in ARITHMETIC_OPERATORS:
+            if left_type is not self.int_type or right_type is not self.int_type:
                 self.add_error(f"Operator {op.value} requires int operands", expr.linenum)
-            return TypeInfo(type_ast.IntType())
+            return self.int_type
         
-        elif op in [expression_ast.Operator.LT, expression_ast.Operator.LE,
-                    expression_ast.Operator.GT, expression_ast.Operator.GE]:
-            left_ok = isinstance(left_type.type_obj, type_ast.IntType)
-            right_ok = isinstance(right_type.type_obj, type_ast.IntType)
-            if not (left_ok and right_ok):
+        elif op in RELATIONAL_OPERATORS:
+            if left_type is not self.int_type or right_type is not self.int_type:
                 self.add_error(f"Operator {op.value} requires int operands", expr.linenum)
                 return None 
-            return TypeInfo(type_ast.BoolType())
+            return self.bool_type
         
-        elif op in [expression_ast.Operator.EQ, expression_ast.Operator.NE]:
-            left_is_int = isinstance(left_type.type_obj, type_ast.IntType)
-            right_is_int = isinstance(right_type.type_obj, type_ast.IntType)
-            left_is_struct = isinstance(left_type.type_obj, type_ast.StructType)
-            right_is_struct = isinstance(right_type.type_obj, type_ast.StructType)
-            
-            left_is_null = isinstance(expr.left, expression_ast.NullExpression)
-            right_is_null = isinstance(expr.right, expression_ast.NullExpression)
-            
-            if left_is_int and right_is_int:
+        elif op in EQUALITY_OPERATORS:
+            # null is typed as a struct, so it compares with any struct
+            if left_type is self.int_type and right_type is self.int_type:
                 pass
-            elif (left_is_struct or left_is_null) and (right_is_struct or right_is_null):
-                if not (left_is_null or right_is_null):
-                    pass
-            else:
+            elif not (isinstance(left_type, type_ast.StructType) and isinstance(right_type, type_ast.StructType)):
                 self.add_error(f"Operator {op.value} requires matching types (int or struct)", expr.linenum)
             
-            return TypeInfo(type_ast.BoolType())
+            return self.bool_type
         
-        elif op in [expression_ast.Operator.AND, expression_ast.Operator.OR]:
-            left_ok = isinstance(left_type.type_obj, type_ast.BoolType)
-            right_ok = isinstance(right_type.type_obj, type_ast.BoolType)
-            if not (left_ok and right_ok):
+        elif op in BOOLEAN_OPERATORS:
+            if left_type is not self.bool_type or right_type is not self.bool_type:
                 self.add_error(f"Operator {op.value} requires boolean operands", expr.linenum)
-            return TypeInfo(type_ast.BoolType())
+            return self.bool_type
         
         return None
     
     def visit_lvalue_dot(self, lvalue: lvalue_ast.LValueDot):
-        left_type = lvalue.left.accept(self)
+        left_type = self.typed(lvalue.left)
         
         if not left_type:
             return None
         
-        if not isinstance(left_type.type_obj, type_ast.StructType):
+        if not isinstance(left_type, type_ast.StructType):
             self.add_error("Dot operator requires struct type", lvalue.linenum)
             return None
         
-        struct_name = left_type.type_obj.name.id
+        struct_name = left_type.name.id
         if struct_name not in self.struct_table:
             return None
         
@@ -515,18 +572,20 @@ class StaticSemanticASTVisitor(mini_ast.ASTVisitor):
             return None
         
         field = struct_info.fields[field_name]
-        return TypeInfo(field.type)
+        lvalue.offset = struct_info.offsets[field_name]
+        return self.canonical(field.type)
     
     def visit_lvalue_id(self, lvalue: lvalue_ast.LValueID):
         var_name = lvalue.id.id
-        var_info = self.current_scope.lookup(var_name)
+        var_info = self.symbol_table.lookup(var_name)
         
         if not var_info:
             self.add_error(f"Variable '{var_name}' not declared", lvalue.linenum)
             return None
         
         if isinstance(var_info, VariableInfo):
-            return TypeInfo(var_info.type_obj)
+            lvalue.id.binding = var_info
+            return var_info.type_obj
         
         self.add_error(f"'{var_name}' is not a variable", lvalue.linenum)
         return None
\ No newline at end of file